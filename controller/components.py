@@ -1,9 +1,11 @@
 from __future__ import annotations
 
-import copy
+from typing import Optional
 
 
 class Host(object):
+    __slots__ = ("name", "neighbor_switch")
+
     def __init__(self, name: str, neighbor_switch: str):
         """
         :param name: name of host
@@ -21,41 +23,96 @@ class Host(object):
 
 
 class HostClient(Host):
-    def __init__(self, name: str, neighbor_switch: str, fail_at_sec: int = -1, datasize_gb: int = -1):
+    __slots__ = ("fail_at_sec", "datasize_gb", "sent_gb")
+
+    def __init__(self, name: str, neighbor_switch: str, fail_at_sec: int = -1, datasize_gb: int = -1,
+                 sent_gb: float = 0):
         """
         :param fail_at_sec: this host will fail after this time has elapsed. must be greater than or equal to 0.
             -1 means that fail_at_sec is unknown.
         :param datasize_gb: size(GB) of data that is backed up. -1 means that datasize is unknown.
+        :param sent_gb: size(GB) of data that has been received by the server, which is measured by flow stats.
         """
         super(HostClient, self).__init__(name, neighbor_switch)
         self.fail_at_sec = fail_at_sec
         self.datasize_gb = datasize_gb
+        self.sent_gb = sent_gb
+
+    @property
+    def remaining_gb(self) -> float:
+        """
+        :return: size(GB) of data that has not been sent yet. -1 if datasize is unknown.
+        """
+        if self.datasize_gb < 0:
+            return -1
+        return max(self.datasize_gb - self.sent_gb, 0)
+
+    def is_finished(self) -> bool:
+        return self.datasize_gb >= 0 and self.sent_gb >= self.datasize_gb
+
+    def is_failed(self, elapsed_sec: float) -> bool:
+        return 0 <= self.fail_at_sec <= elapsed_sec
 
 
 class HostServer(Host):
+    __slots__ = ()
+
     def __init__(self, name: str, neighbor_switch: str):
         super(HostServer, self).__init__(name, neighbor_switch)
 
 
 class Switch(object):
-    def __init__(self, name: str):
-        self.name = name
+    """
+    Switch is interned by its name, so Switch(name) returns the same object for the same name.
+    Each switch has a small integer id which is unique in this process.
+    Interned switches are never released, since ids must stay unique while any Link refers to them. the registry
+    grows only by the number of distinct switch names, which is bounded by the topology.
+    """
+    __slots__ = ("__name", "__id")
+
+    # dict[switch_name, Switch]
+    __instances: dict[str, Switch] = {}
+
+    def __new__(cls, name: str):
+        switch = cls.__instances.get(name)
+        if switch is None:
+            switch = super(Switch, cls).__new__(cls)
+            switch.__name = name
+            switch.__id = len(cls.__instances)
+            cls.__instances[name] = switch
+        return switch
+
+    # ids differ between processes, so intern by name again when unpickled
+    def __reduce__(self):
+        return Switch, (self.__name,)
+
+    @property
+    def name(self) -> str:
+        return self.__name
+
+    @property
+    def id(self) -> int:
+        return self.__id
 
     def __repr__(self):
         cls = type(self)
         return f"{self.name} <{cls.__module__}.{cls.__name__} object at {hex(id(self))}>"
 
     def __hash__(self):
-        return hash(self.name)
+        return self.__id
 
     def __eq__(self, other: Switch):
-        return self.name == other.name
+        return self.__id == other.__id
 
     def __ne__(self, other: Switch):
         return not self == other
 
 
 class Link(object):
+    __slots__ = ("__switch1", "__switch2", "bandwidth_mbps", "fail_at_sec", "__key")
+    # tag of the key of each class, so that Link never equals DirectedLink, which is hashed by its direction
+    _KEY_TAG = 0
+
     def __init__(self, switch1: str, switch2: str, bandwidth_mbps: float, fail_at_sec: int = -1):
         """
         :param switch1: name of switch on one side
@@ -64,35 +121,55 @@ class Link(object):
         :param fail_at_sec: this link will fail after fail_at_sec elapsed. fail_at_sec must be greater or equal to 0.
             -1 means that fail_at_sec has not been determined yet.
         """
-        self.switch1 = switch1
-        self.switch2 = switch2
+        # interned switches, which opposite returns without looking them up
+        self.__switch1 = Switch(switch1)
+        self.__switch2 = Switch(switch2)
         self.bandwidth_mbps = bandwidth_mbps
         self.fail_at_sec = fail_at_sec
 
+        # pack ids of both switches in one int regardless of order, so comparing links is comparing ints
+        id1 = self.__switch1.id
+        id2 = self.__switch2.id
+        self.__key = ((id1 << 32) | id2 if id1 <= id2 else (id2 << 32) | id1) | self._KEY_TAG
+
+    def __reduce__(self):
+        return Link, (self.__switch1.name, self.__switch2.name, self.bandwidth_mbps, self.fail_at_sec)
+
+    @property
+    def switch1(self) -> str:
+        return self.__switch1.name
+
+    @property
+    def switch2(self) -> str:
+        return self.__switch2.name
+
     # faster bps, lower cost
     @property
     def cost(self):
         return 10 // self.bandwidth_mbps
 
     def opposite(self, switch: Switch) -> Switch:
-        return Switch(self.switch2) if switch.name == self.switch1 else Switch(self.switch1)
+        # switches are interned, so identity is enough to compare them
+        return self.__switch2 if switch is self.__switch1 else self.__switch1
 
     def __repr__(self):
         cls = type(self)
         return f"{self.switch1}---{self.switch2} <{cls.__module__}.{cls.__name__} object at {hex(id(self))}>"
 
     def __hash__(self):
-        return hash(f"{self.switch1}-{self.switch2}")
+        return self.__key
 
     def __eq__(self, other: Link):
-        return (self.switch1 == other.switch1 and self.switch2 == other.switch2) or \
-               (self.switch1 == other.switch2 and self.switch2 == other.switch1)
+        return self.__key == other.__key
 
     def __ne__(self, other: Link):
         return not self == other
 
 
 class DirectedLink(Link):
+    __slots__ = ("__direction", "__directed_key")
+    _KEY_TAG = 1 << 64
+
     @staticmethod
     def from_link(link: Link, from_: str, to: str):
         if link.switch1 == from_:
@@ -107,83 +184,207 @@ class DirectedLink(Link):
         :param direction: if False, direction is switch1 to switch2. otherwise, it is reverse.
         """
         super(DirectedLink, self).__init__(switch1, switch2, bandwidth_mbps, fail_at_sec)
-        self.direction = direction
+        self.__direction = direction
+        self.__directed_key = (Switch(self.src).id << 32) | Switch(self.dst).id
+
+    def __reduce__(self):
+        return DirectedLink, (self.__direction, self.switch1, self.switch2, self.bandwidth_mbps, self.fail_at_sec)
+
+    @property
+    def direction(self) -> bool:
+        return self.__direction
 
     def __repr__(self):
         cls = type(self)
         return f"{self.__link_repr} <{cls.__module__}.{cls.__name__} object at {hex(id(self))}>"
 
     def __hash__(self):
-        return hash(self.__link_repr)
+        return self.__directed_key
 
-    def __eq__(self, other: DirectedLink):
-        if self.direction == other.direction:
-            return self.switch1 == other.switch1 and self.switch2 == other.switch2
-        else:
-            return self.switch1 == other.switch2 and self.switch2 == other.switch1
+    def __eq__(self, other: Link):
+        # equality follows the hash, which is of the direction
+        if not isinstance(other, DirectedLink):
+            return False
+        return self.__directed_key == other.__directed_key
 
     def __ne__(self, other: DirectedLink):
         return not self == other
 
+    @property
+    def src(self) -> str:
+        return self.switch2 if self.__direction else self.switch1
+
+    @property
+    def dst(self) -> str:
+        return self.switch1 if self.__direction else self.switch2
+
     @property
     def __link_repr(self) -> str:
-        return f"{self.switch1}<--{self.switch2}" if self.direction else f"{self.switch1}-->{self.switch2}"
+        return f"{self.switch1}<--{self.switch2}" if self.__direction else f"{self.switch1}-->{self.switch2}"
 
 
-# TODO: make links private
 class Path(object):
-    # TODO: test this method
+    """
+    Immutable path directed from the first switch to the last switch.
+    It holds switch names and links shared with the topology, and materializes DirectedLinks only when links is read.
+    """
+    __slots__ = ("__switches", "__hops", "__links")
+
+    @staticmethod
+    def from_switches(switches: list[str], links: list[Link]) -> Path:
+        """
+        :param switches: names of switches on the path in order. this must be longer than links by one.
+        :param links: links between each two adjacent switches in order. direction of each link doesn't matter.
+        """
+        assert len(switches) == len(links) + 1 or len(links) == 0
+        path = Path()
+        path.__switches = tuple(switches) if len(links) > 0 else ()
+        path.__hops = tuple(links)
+        path.__links = None
+        return path
+
     @staticmethod
     def merge(path1: Path, path2: Path) -> Path:
-        if path1.len >= path2.len:
-            longer = copy.deepcopy(path1)
-            shorter = copy.deepcopy(path2)
-        else:
-            longer = copy.deepcopy(path2)
-            shorter = copy.deepcopy(path1)
+        """
+        Concatenate path1 and path2 cancelling loops in O(len). path2 must start at the switch where path1 ends.
+        """
+        if path1.len == 0:
+            return path2
+        if path2.len == 0:
+            return path1
+        assert path1.__switches[-1] == path2.__switches[0]
+
+        switches = list(path1.__switches)
+        hops = list(path1.__hops)
+        # dict[switch_name, index in switches]
+        index = {s: i for i, s in enumerate(switches)}
+        for s, hop in zip(path2.__switches[1:], path2.__hops):
+            if s not in index:
+                index[s] = len(switches)
+                switches.append(s)
+                hops.append(hop)
+                continue
+
+            # revisit s, so cancel the loop back to the previous visit
+            i = index[s]
+            for removed in switches[i + 1:]:
+                index.pop(removed)
+            del switches[i + 1:]
+            del hops[i:]
+
+        return Path.from_switches(switches, hops)
+
+    def __init__(self, links: list[DirectedLink] = None):
+        """
+        :param links: links directed from the first switch to the last switch in order.
+        """
+        if links is None or len(links) == 0:
+            self.__switches: tuple[str, ...] = ()
+            self.__hops: tuple[Link, ...] = ()
+            self.__links: Optional[tuple[DirectedLink, ...]] = ()
+            return
+
+        self.__switches = (links[0].src,) + tuple(l.dst for l in links)
+        self.__hops = tuple(links)
+        self.__links = tuple(links)
 
-        for l in copy.deepcopy(longer).links:
-            if l in shorter.links:
-                shorter.rm(l)
+    def __repr__(self):
+        cls = type(self)
+        return "-->".join(self.__switches) + f" <{cls.__module__}.{cls.__name__} object at {hex(id(self))}>"
 
-            if isinstance(l, DirectedLink):
-                reverse_link = DirectedLink(False, l.switch2, l.switch1, l.bandwidth_mbps, l.fail_at_sec)
-                if reverse_link in shorter.links:
-                    longer.rm(l)
-                    shorter.rm(reverse_link)
+    def __hash__(self):
+        return hash(self.__switches)
 
-        longer.extend(shorter)
-        return longer
+    # there is only one link between two switches, so switches identify the path
+    def __eq__(self, other: Path):
+        return self.__switches == other.__switches
 
-    def __init__(self, links: list[Link] = None):
-        if links is None:
-            self.links = []
-        else:
-            self.links = links
+    def __ne__(self, other: Path):
+        return not self == other
 
-    def __repr__(self):
-        cls = type(self)
-        return " ".join([l.__repr__() for l in self.links]) + \
-               f"<{cls.__module__}.{cls.__name__} object at {hex(id(self))}>"
+    @property
+    def switches(self) -> tuple[str, ...]:
+        return self.__switches
+
+    @property
+    def hops(self) -> tuple[Link, ...]:
+        """
+        links on the path in order. unlike links, they are not directed.
+        """
+        return self.__hops
+
+    @property
+    def links(self) -> list[DirectedLink]:
+        if self.__links is None:
+            self.__links = tuple(
+                DirectedLink.from_link(l, self.__switches[i], self.__switches[i + 1]) for i, l in enumerate(self.__hops)
+            )
+        return list(self.__links)
 
     @property
     def len(self):
-        return len(self.links)
+        return len(self.__hops)
 
     def bottleneck_bw_gbps(self):
         bw = 10 ** 10
-        for l in self.links:
+        for l in self.__hops:
             bw = min(l.bandwidth_mbps, bw)
         return bw
 
-    def append(self, link: Link):
-        self.links.append(link)
 
-    def push(self, link: Link):
-        self.links.insert(0, link)
+class MultiPath(object):
+    """
+    Immutable set of paths from the same source to the same destination that share traffic by weight.
+    Union of the paths has no directed cycle, so each switch can forward traffic only by destination.
+    """
+    __slots__ = ("__paths", "__weights")
+
+    def __init__(self, paths: list[Path] = None, weights: list[float] = None):
+        """
+        :param paths: paths directed from the source to the destination
+        :param weights: bandwidth(Mbps) assigned to each path. traffic is split in proportion to it.
+        """
+        paths = paths or []
+        weights = weights or []
+        assert len(paths) == len(weights)
+        self.__paths: tuple[Path, ...] = tuple(paths)
+        self.__weights: tuple[float, ...] = tuple(weights)
+
+    def __repr__(self):
+        cls = type(self)
+        return ", ".join(f"{'-->'.join(p.switches)}({w})" for p, w in zip(self.__paths, self.__weights)) + \
+            f" <{cls.__module__}.{cls.__name__} object at {hex(id(self))}>"
+
+    def __hash__(self):
+        return hash((self.__paths, self.__weights))
+
+    def __eq__(self, other: MultiPath):
+        return self.__paths == other.__paths and self.__weights == other.__weights
+
+    def __ne__(self, other: MultiPath):
+        return not self == other
+
+    @property
+    def paths(self) -> tuple[Path, ...]:
+        return self.__paths
+
+    @property
+    def weights(self) -> tuple[float, ...]:
+        return self.__weights
+
+    @property
+    def hops(self) -> tuple[Link, ...]:
+        """
+        links on any of the paths without duplicates.
+        """
+        return tuple(dict.fromkeys(l for p in self.__paths for l in p.hops))
 
-    def rm(self, link: Link):
-        self.links.remove(link)
+    @property
+    def len(self):
+        return len(self.__paths)
 
-    def extend(self, path: Path):
-        self.links.extend(path.links)
+    def bandwidth_mbps(self) -> float:
+        """
+        :return: total bandwidth assigned to the paths
+        """
+        return sum(self.__weights)
@@ -0,0 +1,155 @@
+"""
+Micro benchmark of components on a grid topology with about 10k links.
+It compares the current components with the former plain ones which had no __slots__ and hashed formatted strings.
+
+usage: python components_benchmark.py [--size SIZE] [--repeat REPEAT]
+"""
+from __future__ import annotations
+
+import gc
+import timeit
+import tracemalloc
+from argparse import ArgumentParser, Namespace
+
+from components import Switch, Link, DirectedLink
+
+
+class LegacySwitch(object):
+    def __init__(self, name: str):
+        self.name = name
+
+    def __hash__(self):
+        return hash(self.name)
+
+    def __eq__(self, other: LegacySwitch):
+        return self.name == other.name
+
+
+class LegacyLink(object):
+    def __init__(self, switch1: str, switch2: str, bandwidth_mbps: float, fail_at_sec: int = -1):
+        self.switch1 = switch1
+        self.switch2 = switch2
+        self.bandwidth_mbps = bandwidth_mbps
+        self.fail_at_sec = fail_at_sec
+
+    def opposite(self, switch: LegacySwitch) -> LegacySwitch:
+        return LegacySwitch(self.switch2) if switch.name == self.switch1 else LegacySwitch(self.switch1)
+
+    def __hash__(self):
+        return hash(f"{self.switch1}-{self.switch2}")
+
+    def __eq__(self, other: LegacyLink):
+        return (self.switch1 == other.switch1 and self.switch2 == other.switch2) or \
+               (self.switch1 == other.switch2 and self.switch2 == other.switch1)
+
+
+class LegacyDirectedLink(LegacyLink):
+    def __init__(self, direction: bool, switch1: str, switch2: str, bandwidth_mbps: float = -1, fail_at_sec: int = -1):
+        super(LegacyDirectedLink, self).__init__(switch1, switch2, bandwidth_mbps, fail_at_sec)
+        self.direction = direction
+
+    def __hash__(self):
+        return hash(f"{self.switch1}<--{self.switch2}" if self.direction else f"{self.switch1}-->{self.switch2}")
+
+    def __eq__(self, other: LegacyDirectedLink):
+        if self.direction == other.direction:
+            return self.switch1 == other.switch1 and self.switch2 == other.switch2
+        else:
+            return self.switch1 == other.switch2 and self.switch2 == other.switch1
+
+
+def grid_link_names(size: int) -> list[tuple[str, str]]:
+    names = []
+    for i in range(size):
+        for j in range(size):
+            dpid = size * i + j + 1
+            if j != size - 1:
+                names.append((f"s{dpid}", f"s{dpid + 1}"))
+            if i != size - 1:
+                names.append((f"s{dpid}", f"s{dpid + size}"))
+    return names
+
+
+def build(names: list[tuple[str, str]], switch_cls, link_cls, directed_link_cls) -> tuple[list, list, list]:
+    switches = [switch_cls(s) for pair in names for s in pair]
+    links = [link_cls(s1, s2, 1000) for s1, s2 in names]
+    directed_links = [directed_link_cls(False, s1, s2, 1000) for s1, s2 in names]
+    return switches, links, directed_links
+
+
+def measure_memory(names: list[tuple[str, str]], switch_cls, link_cls, directed_link_cls) -> int:
+    gc.collect()
+    tracemalloc.start()
+    objects = build(names, switch_cls, link_cls, directed_link_cls)
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del objects
+    return current
+
+
+def measure_throughput(names: list[tuple[str, str]], switch_cls, link_cls, directed_link_cls,
+                       repeat: int) -> dict[str, float]:
+    switches, links, directed_links = build(names, switch_cls, link_cls, directed_link_cls)
+    reversed_links = [link_cls(l.switch2, l.switch1, 1000) for l in links]
+    link_set = set(links)
+    directed_link_set = set(directed_links)
+
+    def hash_links():
+        for l in links:
+            hash(l)
+
+    def lookup_links():
+        for l in reversed_links:
+            _ = l in link_set
+
+    def lookup_directed_links():
+        for l in directed_links:
+            _ = l in directed_link_set
+
+    # switches are looked up beforehand, since callers already hold them
+    link_ends = [(l, switch_cls(l.switch1)) for l in links]
+
+    def opposite():
+        for l, switch in link_ends:
+            l.opposite(switch)
+
+    # seconds per one pass over all links
+    return {
+        "hash": min(timeit.repeat(hash_links, number=1, repeat=repeat)),
+        "lookup": min(timeit.repeat(lookup_links, number=1, repeat=repeat)),
+        "lookup_directed": min(timeit.repeat(lookup_directed_links, number=1, repeat=repeat)),
+        "opposite": min(timeit.repeat(opposite, number=1, repeat=repeat)),
+    }
+
+
+def main():
+    args = parse()
+    names = grid_link_names(args.size)
+    print(f"grid {args.size}x{args.size}: {len(names)} links")
+
+    legacy = (LegacySwitch, LegacyLink, LegacyDirectedLink)
+    current = (Switch, Link, DirectedLink)
+
+    legacy_memory = measure_memory(names, *legacy)
+    current_memory = measure_memory(names, *current)
+    print(f"{'memory[KiB]':<16}{'legacy':>12}{'current':>12}{'ratio':>8}")
+    print(f"{'':<16}{legacy_memory / 1024:>12.1f}{current_memory / 1024:>12.1f}"
+          f"{legacy_memory / current_memory:>8.2f}")
+
+    legacy_throughput = measure_throughput(names, *legacy, args.repeat)
+    current_throughput = measure_throughput(names, *current, args.repeat)
+    print(f"{'time[ms]':<16}{'legacy':>12}{'current':>12}{'speedup':>8}")
+    for k in legacy_throughput:
+        print(f"{k:<16}{legacy_throughput[k] * 1000:>12.2f}{current_throughput[k] * 1000:>12.2f}"
+              f"{legacy_throughput[k] / current_throughput[k]:>8.2f}")
+
+
+def parse() -> Namespace:
+    parser = ArgumentParser()
+    parser.add_argument("--size", dest="size", type=int, default=71, help="size of grid topology")
+    parser.add_argument("--repeat", dest="repeat", type=int, default=5, help="number of repetitions")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    main()
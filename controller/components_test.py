@@ -0,0 +1,102 @@
+import pickle
+import unittest
+
+from components import Switch, Link, DirectedLink, Path
+
+
+class SwitchTest(unittest.TestCase):
+    def test_intern(self):
+        self.assertIs(Switch('s1'), Switch('s1'))
+        self.assertNotEqual(Switch('s1').id, Switch('s2').id)
+        self.assertIs(pickle.loads(pickle.dumps(Switch('s1'))), Switch('s1'))
+
+
+class LinkTest(unittest.TestCase):
+    def test_eq(self):
+        link = Link('s1', 's2', 1)
+        self.assertEqual(link, Link('s2', 's1', 2))
+        self.assertEqual(hash(link), hash(Link('s2', 's1', 2)))
+        self.assertNotEqual(link, Link('s1', 's3', 1))
+        self.assertEqual(pickle.loads(pickle.dumps(link)), link)
+
+        directed_link = DirectedLink.from_link(link, 's2', 's1')
+        self.assertEqual(directed_link, DirectedLink(True, 's1', 's2'))
+        self.assertEqual(hash(directed_link), hash(DirectedLink(True, 's1', 's2')))
+        self.assertNotEqual(directed_link, DirectedLink(False, 's1', 's2'))
+        self.assertEqual(pickle.loads(pickle.dumps(directed_link)), directed_link)
+
+        # directed link is not equal to the undirected one, as their hashes differ
+        self.assertNotEqual(directed_link, link)
+        self.assertNotEqual(link, directed_link)
+        self.assertEqual(len({link, directed_link, Link('s2', 's1', 1), DirectedLink(True, 's1', 's2')}), 2)
+
+
+class PathTest(unittest.TestCase):
+    def test_from_switches(self):
+        """
+        s1 --1-- s2 --2-- s3
+        """
+        links = [Link('s1', 's2', 1), Link('s3', 's2', 2)]
+        path = Path.from_switches(['s1', 's2', 's3'], links)
+
+        self.assertEqual(path.len, 2)
+        self.assertEqual(path.bottleneck_bw_gbps(), 1)
+        self.assertTupleEqual(path.switches, ('s1', 's2', 's3'))
+        self.assertListEqual(path.links, [
+            DirectedLink.from_link(links[0], 's1', 's2'),
+            DirectedLink.from_link(links[1], 's2', 's3'),
+        ])
+        self.assertEqual(path, Path(path.links))
+
+    def test_merge(self):
+        """
+        s1 --1-- s2 --2-- s3
+        """
+        links = [Link('s1', 's2', 1), Link('s2', 's3', 2)]
+        path1 = Path([DirectedLink.from_link(links[0], 's1', 's2')])
+        path2 = Path([DirectedLink.from_link(links[1], 's2', 's3')])
+
+        merged = Path.merge(path1, path2)
+        self.assertTupleEqual(merged.switches, ('s1', 's2', 's3'))
+        self.assertListEqual(merged.links, [
+            DirectedLink.from_link(links[0], 's1', 's2'),
+            DirectedLink.from_link(links[1], 's2', 's3'),
+        ])
+
+        # inputs are not modified
+        self.assertTupleEqual(path1.switches, ('s1', 's2'))
+        self.assertTupleEqual(path2.switches, ('s2', 's3'))
+
+        self.assertEqual(Path.merge(Path(), path1), path1)
+        self.assertEqual(Path.merge(path1, Path()), path1)
+
+    def test_merge_cancelling_loop(self):
+        """
+        s1 --1-- s2 --2-- s3
+                  |        |
+                  3        4
+                  |        |
+                 s4 --5-- s5
+        """
+        links = {
+            ('s1', 's2'): Link('s1', 's2', 1),
+            ('s2', 's3'): Link('s2', 's3', 2),
+            ('s2', 's4'): Link('s2', 's4', 3),
+            ('s3', 's5'): Link('s3', 's5', 4),
+            ('s4', 's5'): Link('s4', 's5', 5),
+        }
+        path1 = Path.from_switches(['s1', 's2', 's3'], [links['s1', 's2'], links['s2', 's3']])
+
+        # reverse link is cancelled
+        path2 = Path.from_switches(['s3', 's2', 's4'], [links['s2', 's3'], links['s2', 's4']])
+        self.assertTupleEqual(Path.merge(path1, path2).switches, ('s1', 's2', 's4'))
+
+        # loop s2 -> s3 -> s5 -> s4 -> s2 is cancelled
+        path2 = Path.from_switches(['s3', 's5', 's4', 's2'], [links['s3', 's5'], links['s4', 's5'], links['s2', 's4']])
+        merged = Path.merge(path1, path2)
+        self.assertTupleEqual(merged.switches, ('s1', 's2'))
+        self.assertListEqual(merged.links, [DirectedLink.from_link(links['s1', 's2'], 's1', 's2')])
+
+
+if __name__ == '__main__':
+    unittest.main()
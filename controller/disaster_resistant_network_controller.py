@@ -1,21 +1,37 @@
 from __future__ import annotations
 
-import json
+import math
+import os
+import queue
 import threading
-from typing import Optional
+import time
+from concurrent.futures import Future
+from typing import Callable, Optional, Union
 
 import webob
 from ryu.app import wsgi
 from ryu.base import app_manager
 from ryu.controller import ofp_event, controller, handler
-from ryu.lib.packet import ether_types, ethernet, packet
+from ryu.lib import hub
+from ryu.lib.packet import ether_types
 from ryu.ofproto import ofproto_v1_3 as ofproto
 from ryu.ofproto import ofproto_v1_3_parser as ofparser
 
-from components import Switch, Path, Link, HostClient, HostServer
+from components import Switch, Path, MultiPath, Link, HostClient, HostServer
 from enums import RoutingAlgorithm
+from event_feed import EventFeed
 from flow_addable import FlowAddable
-from route_calculator import RouteCalculator
+from flow_table import FlowTable, FlowKey, FlowAction, Buckets
+from instrumentation import METRICS, Profiler
+from log_sampler import LogSampler
+from packet_parser import EthernetHeader, ArpPacket, parse_ethernet, parse_arp, build_arp_reply, ARP_REQUEST
+from response_cache import ResponseCache
+from route_calculator import RouteCalculator, Snapshot, CompactPaths
+from route_plan import RoutePlanCache
+from route_worker import RouteWorker
+from state_journal import StateJournal
+from stats_collector import StatsCollector
+from update_scheduler import UpdateScheduler
 
 
 class DisasterResistantNetworkController(app_manager.RyuApp, FlowAddable):
@@ -26,27 +42,141 @@ class DisasterResistantNetworkController(app_manager.RyuApp, FlowAddable):
 
     __ROUTING_ALGORITHM = RoutingAlgorithm.TAKAHIRA
     __UPDATE_INTERVAL_SEC = 30
-    __INITIAL_ROUTE_PRIORITY = 100
+    # precompute paths of all intervals up to the last failure when a disaster is declared
+    __PRECOMPUTE_ROUTE_PLAN = True
+    __MAX_ROUTE_PLANS = 4
+    __ROUTE_PRIORITY = 100
+    # ARP requests are answered by the controller, and multicast including broadcast is dropped, so that no packet
+    # is flooded around loops of the grid
+    __ARP_REQUEST_PRIORITY = 200
+    __MULTICAST_DROP_PRIORITY = 150
+    # one of this number of PacketIn of each datapath is logged
+    __PACKET_IN_LOG_SAMPLING = 100
+    # sum of bucket weights of a group split by MultiPath
+    __TOTAL_BUCKET_WEIGHT = 1000
+    # rank host pairs by data that servers have not received yet, which is measured by flow stats of their edge
+    __PROGRESS_FEEDBACK = True
+    # route plan is rebuilt when progress of a host pair has changed by this fraction of its data size
+    __REPLAN_PROGRESS_STEP = 0.1
+    # flow stats are requested this long before each update, so that replies arrive in time
+    __FLOW_STATS_LEAD_SEC = 1
+    # port stats and flow stats of all datapaths are polled at this interval
+    __STATS_INTERVAL_SEC = 5
+    # route with bandwidth of links that is not used by traffic other than host pairs, which is measured by stats
+    __MEASURED_BANDWIDTH = True
+    # route plan is rebuilt when measured bandwidth of a link has changed by this fraction of its bandwidth
+    __REPLAN_BANDWIDTH_STEP = 0.1
+    # journal of topology, host pairs and failures, which is replayed on restart. None not to keep it.
+    __JOURNAL_PATH: Optional[str] = "disaster_resistant_network_controller.journal"
+    # path update resumed on restart waits for datapaths to reconnect
+    __RESUME_DELAY_SEC = 5
+    # measure durations of route calculation, flow installation, PacketIn and REST requests, exposed by /metrics
+    __INSTRUMENTATION = True
+    # directory to dump profiles of path update requested by /profile
+    __PROFILE_DIR = "."
+    # green threads poll results of worker and tasks posted by the scheduler thread at this interval
+    __HUB_POLL_SEC = 0.01
 
     def __init__(self, *args, **kwargs):
         super(DisasterResistantNetworkController, self).__init__(*args, **kwargs)
 
         self.__is_updating = False
         self.__update_times = 0
-        self.__route_priority = self.__INITIAL_ROUTE_PRIORITY  # this will be incremented on each routing
-        self.__datapaths: list[controller.Datapath] = []
+        # calls __update_path on the hub at the deadline of each interval from the start of path update
+        self.__update_scheduler = UpdateScheduler(self.__on_update_deadline, self.__UPDATE_INTERVAL_SEC)
+        # tasks posted by other threads to run on the hub, where datapaths and paths are touched.
+        # queue[(task, event set when it is done)]
+        self.__hub_tasks: queue.Queue[tuple[Callable[[], None], threading.Event]] = queue.Queue()
+        # green thread running the tasks while path update is scheduled. None while it is not running
+        self.__hub_task_thread = None
+        # incremented whenever path update starts or stops, so that updates posted by the previous run are dropped
+        self.__update_generation = 0
+        # route flows installed in each datapath
+        self.__flow_table = FlowTable()
+        # number of flow-mods and group-mods sent in total. dict["add" | "modify" | "delete" | "group", count]
+        self.__flow_mod_counts: dict[str, int] = {"add": 0, "modify": 0, "delete": 0, "group": 0}
+        self.__route_worker = RouteWorker()
+        # route plans cached by fingerprint of topology, which includes progress with progress feedback and
+        # measured bandwidth of links with measurement
+        self.__route_plans = RoutePlanCache(self.__calc_in_worker, self.__UPDATE_INTERVAL_SEC, self.__MAX_ROUTE_PLANS,
+                                            self.__REPLAN_PROGRESS_STEP if self.__PROGRESS_FEEDBACK else 0,
+                                            self.__REPLAN_BANDWIDTH_STEP if self.__MEASURED_BANDWIDTH else 0)
+        # calc_sec: total time to calculate paths in worker, which would block the controller without worker.
+        # waiting_sec: total time to wait for worker, during which the controller can handle other events.
+        # blocking_sec: total time for which the controller was actually blocked to update paths.
+        self.__route_calc_stats: dict[str, float] = {"calc_sec": 0, "waiting_sec": 0, "blocking_sec": 0}
+        self.__datapaths: dict[int, controller.Datapath] = {}
         self.__dpid_to_mac_to_port: dict[int, dict[str, int]] = {}
         self.__host_to_ip: dict[str, str] = {}
+        # mac address of each host registered or learned from ARP requests. dict[ip, mac]
+        self.__ip_to_mac: dict[str, str] = {}
+        # switch and port where each registered host is connected. dict[ip, (dpid, port)]
+        self.__ip_to_edge: dict[str, tuple[int, int]] = {}
+        # number of PacketIn in total. dict["total" | "arp_reply", count]
+        self.__packet_in_counts: dict[str, int] = {"total": 0, "arp_reply": 0}
+        self.__packet_in_log_sampler = LogSampler(self.__PACKET_IN_LOG_SAMPLING)
         self.__port_to_switch: dict[int, dict[int, Switch]] = {}
+        # reverse index of port_to_switch. dict[(dpid, neighbor_switch_name), port]
+        self.__switch_to_port: dict[tuple[int, str], int] = {}
         self.__route_calculator = RouteCalculator(self.__ROUTING_ALGORITHM)
+        # held while paths are replaced and their flows are sent, because path update, reroute and resync run in
+        # different green threads, which switch while sending messages to datapaths
+        self.__route_lock = hub.Semaphore()
+        # current path of each host pair. dict[client_name, [HostClient, HostServer, Path or MultiPath]]
+        self.__client_to_path: dict[str, list[HostClient, HostServer, Union[Path, MultiPath]]] = {}
+        # reverse index to find host pairs whose path crosses a link. dict[Link, set[client_name]]
+        self.__link_to_clients: dict[Link, set[str]] = {}
+        # cookie of the flow toward each server, whose byte count is data received from the client.
+        # dict[client_name, cookie] and its reverse index
+        self.__client_to_cookie: dict[str, int] = {}
+        self.__cookie_to_client: dict[int, str] = {}
+        self.__stats_collector = StatsCollector()
+        # xid of flow stats request to resynchronize route flows of each datapath, and route flows found so far in
+        # its replies. dict[dpid, xid] and dict[dpid, dict[FlowKey, out_port]]
+        self.__resync_xids: dict[int, int] = {}
+        self.__resync_flows: dict[int, dict[FlowKey, int]] = {}
+        self.__journal = None if self.__JOURNAL_PATH is None else StateJournal(self.__JOURNAL_PATH)
+        self.__is_restoring = False
+        # bodies of GET responses, which are dropped on every mutation of topology and host pairs
+        self.__response_cache = ResponseCache()
+        # changes of topology and routes pushed to subscribers of /events
+        self.__event_feed = EventFeed()
+        self.__profiler = Profiler()
+        self.__register_metrics()
 
         kwargs['wsgi'].register(DisasterResistantNetworkWsgiController, {self.APP_INSTANCE_NAME: self})
+        self.__restore()
+        hub.spawn(self.__poll_stats)
 
     @property
     def host_pairs(self) -> list[list[HostClient, str, HostServer, str]]:
         return list(map(lambda x: [x[0], self.__host_to_ip[x[0].name], x[1], self.__host_to_ip[x[1].name]],
                         self.__route_calculator.host_pairs))
 
+    @property
+    def flow_mod_counts(self) -> dict[str, int]:
+        return self.__flow_mod_counts
+
+    @property
+    def route_calc_stats(self) -> dict[str, float]:
+        return self.__route_calc_stats
+
+    @property
+    def packet_in_counts(self) -> dict[str, int]:
+        return self.__packet_in_counts
+
+    @property
+    def stats_collector(self) -> StatsCollector:
+        return self.__stats_collector
+
+    @property
+    def response_cache(self) -> ResponseCache:
+        return self.__response_cache
+
+    @property
+    def event_feed(self) -> EventFeed:
+        return self.__event_feed
+
     @property
     def port_to_switch(self):
         return self.__port_to_switch
@@ -59,111 +189,688 @@ class DisasterResistantNetworkController(app_manager.RyuApp, FlowAddable):
     def links(self):
         return self.__route_calculator.links
 
+    def __register_metrics(self):
+        METRICS.enable(self.__INSTRUMENTATION)
+        METRICS.describe("drn_route_calc_seconds", "time to calculate paths of an interval")
+        METRICS.describe("drn_update_path_seconds", "time for which path update blocked the controller")
+        METRICS.describe("drn_update_lag_seconds", "delay of path update from the deadline of its interval")
+        METRICS.describe("drn_set_route_seconds", "time to diff and send flow-mods of paths")
+        METRICS.describe("drn_packet_in_seconds", "time to handle a PacketIn")
+        METRICS.describe("drn_rest_request_seconds", "time to handle a REST request")
+        METRICS.register_callback("drn_flow_mods_total", "counter", "flow-mods and group-mods sent", "kind",
+                                  lambda: self.__flow_mod_counts)
+        METRICS.register_callback("drn_route_calc_seconds_total", "counter", "time spent on path update", "kind",
+                                  lambda: self.__route_calc_stats)
+        METRICS.register_callback("drn_packet_in_total", "counter", "PacketIn received", "kind",
+                                  lambda: self.__packet_in_counts)
+
+    def request_profile(self) -> str:
+        """
+        Profile the next path update by cProfile.
+
+        :return: file that the profile will be dumped to
+        """
+        path = os.path.join(self.__PROFILE_DIR, f"update_path_{time.strftime('%Y%m%d-%H%M%S')}.prof")
+        self.__profiler.request(path)
+        self.logger.info("[INFO]requested profile of the next path update to %s", path)
+        return path
+
     def init(self):
         self.logger.info('[INFO]initializing controller...')
 
-        self.__is_updating = False
-        self.__update_times = 0
-        self.__route_priority = self.__INITIAL_ROUTE_PRIORITY
-        self.__datapaths = []
-        self.__dpid_to_mac_to_port = {}
-        self.__host_to_ip = {}
-        self.__port_to_switch = {}
-        self.__route_calculator.reset()
+        # paths being applied are completed before they are reset
+        with self.__route_lock:
+            self.__is_updating = False
+            self.__update_times = 0
+            self.__update_scheduler.cancel()
+            self.__update_generation += 1
+            self.__flow_table.reset()
+            self.__flow_mod_counts = {"add": 0, "modify": 0, "delete": 0, "group": 0}
+            self.__route_plans.clear()
+            self.__route_calc_stats = {"calc_sec": 0, "waiting_sec": 0, "blocking_sec": 0}
+            self.__datapaths = {}
+            self.__dpid_to_mac_to_port = {}
+            self.__host_to_ip = {}
+            self.__ip_to_mac = {}
+            self.__ip_to_edge = {}
+            self.__packet_in_counts = {"total": 0, "arp_reply": 0}
+            self.__packet_in_log_sampler.reset()
+            self.__port_to_switch = {}
+            self.__switch_to_port = {}
+            self.__route_calculator.reset()
+            self.__client_to_path = {}
+            self.__link_to_clients = {}
+            self.__client_to_cookie = {}
+            self.__cookie_to_client = {}
+            self.__stats_collector.reset()
+            self.__resync_xids = {}
+            self.__resync_flows = {}
+        if self.__journal is not None:
+            self.__journal.clear()
+        self.__response_cache.bump()
+        self.__event_feed.publish("init")
+
+    def __restore(self):
+        """
+        Replay the journal to restore topology, host pairs and failures after restart. path update that was running
+        is resumed from the interval of the current time, and route flows left in each datapath are resynchronized
+        when it connects. see switch_features_handler.
+        """
+        if self.__journal is None:
+            return
+
+        started_at = time.perf_counter()
+        # wall clock time when path update started
+        update_started_at: Optional[float] = None
+        n_entries = 0
+
+        def apply(op: str, args: dict):
+            nonlocal update_started_at, n_entries
+            n_entries += 1
+            if op == "start_update_path":
+                update_started_at = args["started_at"]
+            else:
+                self.__apply(op, args)
+
+        self.__is_restoring = True
+        try:
+            # entries that fail are logged and dropped, so that they never stop the controller from starting
+            failures = self.__journal.restore(apply)
+        finally:
+            self.__is_restoring = False
+        for op, args, e in failures:
+            self.logger.info("[INFO]failed to restore %s %s from journal: %r", op, args, e)
+        if n_entries == 0:
+            return
+        self.logger.info("[INFO]restored %d entries from %s in %.1fms", n_entries - len(failures),
+                         self.__journal.path, (time.perf_counter() - started_at) * 1000)
+
+        if update_started_at is not None:
+            # resume at the first deadline after datapaths reconnect, keeping deadlines from the start
+            elapsed_sec = time.time() - update_started_at
+            first_nth = max(math.ceil((elapsed_sec + self.__RESUME_DELAY_SEC) / self.__UPDATE_INTERVAL_SEC), 0)
+            delay_sec = first_nth * self.__UPDATE_INTERVAL_SEC - elapsed_sec
+            self.__update_times = first_nth
+            self.__is_updating = True
+            self.logger.info("[INFO]resuming path update from %dth in %.1fs", first_nth, delay_sec)
+            self.__start_update_scheduler(first_nth, delay_sec)
+
+    def __apply(self, op: str, args: dict):
+        if op == "add_link":
+            self.add_link(*self.__parse_link_entry(args))
+        elif op == "add_links":
+            self.add_links(list(map(self.__parse_link_entry, args["links"])))
+        elif op == "register_link_fail_time":
+            self.register_link_fail_time(args["switch1"], args["switch2"], args["fail_at_sec"])
+        elif op == "add_host_pair":
+            self.add_host_pair(*self.__parse_host_pair_entry(args))
+        elif op == "add_host_pairs":
+            self.add_host_pairs(list(map(self.__parse_host_pair_entry, args["host_pairs"])))
+        elif op == "update_host_client":
+            self.update_host_client(args["client"], args["fail_at_sec"], args["datasize_gb"])
+        elif op == "rm_port":
+            self.__rm_link_by_port(args["dpid"], args["port"])
+        else:
+            raise ValueError(f"Journal entry is invalid: {op}")
+
+    @staticmethod
+    def __parse_link_entry(args: dict) -> list[Link, int, int]:
+        return [Link(args["switch1"], args["switch2"], args["bandwidth_mbps"]), args["s1_port"], args["s2_port"]]
+
+    @staticmethod
+    def __parse_host_pair_entry(args: dict) -> list[HostClient, str, int, HostServer, str, int, str, str]:
+        return [HostClient(args["client"], args["client_neighbor"]), args["client_ip"], args["client_port"],
+                HostServer(args["server"], args["server_neighbor"]), args["server_ip"], args["server_port"],
+                args["client_mac"], args["server_mac"]]
+
+    def __record(self, op: str, **args):
+        """
+        Append the mutation to the journal unless it is being replayed, and drop responses built before it.
+        this is called after the mutation has succeeded, so that the journal never has one that fails on replay.
+        """
+        if self.__journal is not None and not self.__is_restoring:
+            self.__journal.append(op, args)
+        # bumped last, so that a response built during the mutation is not cached as the new generation
+        self.__response_cache.bump()
 
     def add_link(self, link: Link, s1_port: int, s2_port: int):
+        self.__add_link(link, s1_port, s2_port)
+        self.__event_feed.publish("link_added", switch1=link.switch1, switch2=link.switch2,
+                                  bandwidth_mbps=link.bandwidth_mbps)
+        self.__record("add_link", switch1=link.switch1, switch2=link.switch2, bandwidth_mbps=link.bandwidth_mbps,
+                      s1_port=s1_port, s2_port=s2_port)
+
+    def add_links(self, links: list[list[Link, int, int]]):
+        """
+        Add links at once, which are journaled, published and invalidate responses once for all of them.
+
+        :param links: list[[Link, port of switch1, port of switch2]]
+        """
+        entries = []
+        for [link, s1_port, s2_port] in links:
+            self.__add_link(link, s1_port, s2_port)
+            entries.append({"switch1": link.switch1, "switch2": link.switch2, "bandwidth_mbps": link.bandwidth_mbps,
+                            "s1_port": s1_port, "s2_port": s2_port})
+
+        self.__event_feed.publish("links_added", links=[
+            {"switch1": e["switch1"], "switch2": e["switch2"], "bandwidth_mbps": e["bandwidth_mbps"]} for e in entries
+        ])
+        self.__record("add_links", links=entries)
+
+    def __add_link(self, link: Link, s1_port: int, s2_port: int):
         self.__route_calculator.add_link(link)
+        self.__add_port(self.__to_dpid(link.switch1), s1_port, Switch(link.switch2))
+        self.__add_port(self.__to_dpid(link.switch2), s2_port, Switch(link.switch1))
 
-        s1_dpid = self.__to_dpid(link.switch1)
-        self.__port_to_switch.setdefault(s1_dpid, {})
-        self.__port_to_switch[s1_dpid][s1_port] = Switch(link.switch2)
+    def __add_port(self, dpid: int, port: int, neighbor: Switch):
+        self.__port_to_switch.setdefault(dpid, {})
+        self.__port_to_switch[dpid][port] = neighbor
+        self.__switch_to_port[(dpid, neighbor.name)] = port
 
-        s2_dpid = self.__to_dpid(link.switch2)
-        self.__port_to_switch.setdefault(s2_dpid, {})
-        self.__port_to_switch[s2_dpid][s2_port] = Switch(link.switch1)
+    def __rm_port(self, dpid: int, port: int) -> Optional[Switch]:
+        neighbor = self.__port_to_switch.get(dpid, {}).pop(port, None)
+        if neighbor is None:
+            return None
+
+        if self.__switch_to_port.get((dpid, neighbor.name)) == port:
+            self.__switch_to_port.pop((dpid, neighbor.name))
+        return neighbor
 
     def register_link_fail_time(self, switch1: str, switch2: str, fail_at_sec: int):
         self.__route_calculator.register_link_fail_time(switch1, switch2, fail_at_sec)
+        self.__record("register_link_fail_time", switch1=switch1, switch2=switch2, fail_at_sec=fail_at_sec)
 
     def add_host_pair(self, client: HostClient, client_ip: str, client_port: int,
-                      server: HostServer, server_ip: str, server_port: int):
+                      server: HostServer, server_ip: str, server_port: int,
+                      client_mac: Optional[str] = None, server_mac: Optional[str] = None):
+        """
+        :param client_mac: mac address of the client to answer ARP requests. it is learned from ARP requests of the
+            client if None. so is server_mac.
+        """
+        self.__record("add_host_pair", **self.__add_host_pair(client, client_ip, client_port, server, server_ip,
+                                                              server_port, client_mac, server_mac))
+
+    def add_host_pairs(self, host_pairs: list[list[HostClient, str, int, HostServer, str, int, str, str]]):
+        """
+        Add host pairs at once, which are journaled and invalidate responses once for all of them.
+
+        :param host_pairs: list[[HostClient, client ip, client port, HostServer, server ip, server port,
+            client mac, server mac]]. mac addresses are optional.
+        """
+        entries = [self.__add_host_pair(*host_pair) for host_pair in host_pairs]
+        self.__record("add_host_pairs", host_pairs=entries)
+
+    def __add_host_pair(self, client: HostClient, client_ip: str, client_port: int,
+                        server: HostServer, server_ip: str, server_port: int,
+                        client_mac: Optional[str] = None, server_mac: Optional[str] = None) -> dict:
+        """
+        :return: arguments of the host pair to be journaled
+        """
         self.__host_to_ip[client.name] = client_ip
         self.__host_to_ip[server.name] = server_ip
+        self.__ip_to_edge[client_ip] = (self.__to_dpid(client.neighbor_switch), client_port)
+        self.__ip_to_edge[server_ip] = (self.__to_dpid(server.neighbor_switch), server_port)
+        if client_mac is not None:
+            self.__ip_to_mac[client_ip] = client_mac
+        if server_mac is not None:
+            self.__ip_to_mac[server_ip] = server_mac
 
         self.__route_calculator.add_host_pairs(client, server)
+        cookie = self.__client_to_cookie.setdefault(client.name, len(self.__client_to_cookie) + 1)
+        self.__cookie_to_client[cookie] = client.name
+        self.__add_flows_for_host_pair(client, server)
 
-        self.__add_flow_for_host(self.__find_dp(self.__to_dpid(client.neighbor_switch)), client_ip, client_port)
-        self.__add_flow_for_host(self.__find_dp(self.__to_dpid(server.neighbor_switch)), server_ip, server_port)
+        return {"client": client.name, "client_neighbor": client.neighbor_switch, "client_ip": client_ip,
+                "client_port": client_port, "client_mac": client_mac, "server": server.name,
+                "server_neighbor": server.neighbor_switch, "server_ip": server_ip, "server_port": server_port,
+                "server_mac": server_mac}
 
     def update_host_client(self, client: str, fail_at_sec: int, datasize_gb: int):
         self.__route_calculator.update_host_client(client, fail_at_sec, datasize_gb)
-
-    def __add_flow_for_host(self, dp: controller.Datapath, ip: str, port: int, priority=50):
+        self.__record("update_host_client", client=client, fail_at_sec=fail_at_sec, datasize_gb=datasize_gb)
+
+    def __add_flows_for_host_pair(self, client: HostClient, server: HostServer, dpid: Optional[int] = None):
+        """
+        Install flows toward the client and the server at their edge switches that are connected.
+
+        :param dpid: install flows only at this datapath if it is given
+        """
+        # bytes sent to the server are counted by the cookie
+        for host, cookie in [(client, 0), (server, self.__client_to_cookie.get(client.name, 0))]:
+            ip = self.__host_to_ip[host.name]
+            edge_dpid, port = self.__ip_to_edge[ip]
+            dp = self.__find_dp(edge_dpid)
+            if dp is not None and (dpid is None or dpid == edge_dpid):
+                self.__add_flow_for_host(dp, ip, port, cookie=cookie)
+
+    def __add_flow_for_host(self, dp: controller.Datapath, ip: str, port: int, priority=50, cookie=0):
+        """
+        :param cookie: cookie of the IP flow to count bytes sent to the host
+        """
         self._add_flow(dp, priority, ofparser.OFPMatch(eth_type=ether_types.ETH_TYPE_IP, ipv4_dst=ip),
-                       [ofparser.OFPActionOutput(port)])
+                       [ofparser.OFPActionOutput(port)], cookie=cookie)
         self._add_flow(dp, priority, ofparser.OFPMatch(eth_type=ether_types.ETH_TYPE_ARP, arp_tpa=ip),
                        [ofparser.OFPActionOutput(port)])
 
     def start_update_path(self):
         self.logger.info('[INFO]started path update')
+        started_at = time.time()
         self.__is_updating = True
-        self.__update_path()
-
-    def __update_path(self):
+        self.__start_update_scheduler()
+        self.__record("start_update_path", started_at=started_at)
+
+    def __on_update_deadline(self, nth_update: int):
+        """
+        Called back in the scheduler thread, which waits until the path update on the hub completes, so that intervals
+        that have passed meanwhile are skipped.
+        """
+        generation = self.__update_generation
+
+        def update_path():
+            # path update has been stopped or restarted since this was posted
+            if generation == self.__update_generation:
+                self.__update_path(nth_update)
+
+        done = threading.Event()
+        self.__hub_tasks.put((update_path, done))
+        # the task is not run if the hub stops running tasks just before it is posted
+        while not done.wait(self.__HUB_POLL_SEC * 10) and generation == self.__update_generation:
+            pass
+
+    def __start_update_scheduler(self, first_nth: int = 0, delay_sec: float = 0):
+        self.__update_generation += 1
+        self.__update_scheduler.start(first_nth, delay_sec)
+        if self.__hub_task_thread is None:
+            self.__hub_task_thread = hub.spawn(self.__run_hub_tasks)
+
+    def __run_hub_tasks(self):
+        """
+        Run tasks posted by other threads one by one on the hub. the queue is polled, because blocking on it would
+        block the hub. polling ends when the scheduler has stopped, e.g. by init, and all tasks posted have run.
+        """
+        while self.__update_scheduler.is_running or not self.__hub_tasks.empty():
+            try:
+                task, done = self.__hub_tasks.get_nowait()
+            except queue.Empty:
+                hub.sleep(self.__HUB_POLL_SEC)
+                continue
+
+            try:
+                task()
+            except Exception as e:
+                self.logger.info("[INFO]failed to run task on hub: %r", e)
+            finally:
+                done.set()
+        self.__hub_task_thread = None
+
+    def __update_path(self, nth_update: int):
+        """
+        Update paths of the nth_update interval on the hub. intervals that have passed while calculating paths are
+        skipped.
+        """
+        lag_sec = self.__update_scheduler.last_lag_sec
+        METRICS.observe("drn_update_lag_seconds", lag_sec)
+        if nth_update != self.__update_times:
+            self.logger.info("[INFO]skipped path update from %dth to %dth", self.__update_times, nth_update - 1)
+        self.__update_times = nth_update
+        self.__profiler.run(self.__update_path_in_interval, lag_sec)
+
+    def __update_path_in_interval(self, lag_sec: float):
         if not self.__is_updating:
             return
 
-        path = self.__route_calculator.calc_shortest_path(self.__update_times, self.__UPDATE_INTERVAL_SEC)
-        if len(path) == 0:
-            self.logger.info("[INFO]no path available")
-            return
-
-        self.logger.info(f"[INFO]updated path {self.__update_times}th")
-        self.__set_route_by_path(path)
+        # only taking snapshot and applying paths occupy the hub. see __calc_paths
+        started_at = time.perf_counter()
+        waiting_sec = self.__route_calc_stats["waiting_sec"]
+        calc_sec = self.__route_calc_stats["calc_sec"]
+        self.__update_measured_bandwidths()
+        compact_paths = self.__calc_paths()
+        with self.__route_lock:
+            if not self.__is_updating:
+                return
+
+            path = self.__route_calculator.restore_paths(compact_paths)
+            if len(path) == 0:
+                self.logger.info("[INFO]no path available")
+                self.__update_scheduler.cancel()
+                return
+
+            self.logger.info("[INFO]updated path %dth %.1fms behind schedule", self.__update_times, lag_sec * 1000)
+            # host pairs that have sent all data or whose client has failed are not in path, and their flows are
+            # deleted
+            self.__set_route_by_path(path, replace_all=True)
+
+        blocking_sec = time.perf_counter() - started_at - (self.__route_calc_stats["waiting_sec"] - waiting_sec)
+        self.__route_calc_stats["blocking_sec"] += blocking_sec
+        METRICS.observe("drn_update_path_seconds", blocking_sec)
+        self.logger.info("[INFO]updated path blocking controller for %.1fms", blocking_sec * 1000)
+        self.__event_feed.publish("path_update", nth_update=self.__update_times,
+                                  calc_ms=(self.__route_calc_stats["calc_sec"] - calc_sec) * 1000,
+                                  blocking_ms=blocking_sec * 1000, lag_ms=lag_sec * 1000,
+                                  skipped=self.__update_scheduler.skipped)
 
         self.__update_times += 1
 
-        # update path every self.__update_interval_sec
-        t = threading.Timer(self.__UPDATE_INTERVAL_SEC, self.__update_path)
-        t.start()
+        if self.__PROGRESS_FEEDBACK:
+            # progress is measured just before the deadline of the next interval
+            hub.spawn_after(max(self.__update_scheduler.sec_until(self.__update_times) - self.__FLOW_STATS_LEAD_SEC,
+                                0), self.__request_flow_stats)
+
+    def __poll_stats(self):
+        """
+        Request port stats and flow stats of all datapaths every __STATS_INTERVAL_SEC in a green thread. replies are
+        handled asynchronously by port_stats_reply_handler and flow_stats_reply_handler.
+        """
+        while True:
+            for dp in list(self.__datapaths.values()):
+                self._request_port_stats(dp)
+                self._request_flow_stats(dp, 0, cookie_mask=0)
+            hub.sleep(self.__STATS_INTERVAL_SEC)
+
+    def __update_measured_bandwidths(self):
+        """
+        Register available bandwidth of each link, which is its bandwidth minus the rate of traffic other than route
+        flows in the busier direction. rate of route flows on a port is split by bucket weights of their groups.
+        """
+        if not self.__MEASURED_BANDWIDTH:
+            return
 
-    def __set_route_by_path(self, paths: list[list[HostClient, HostServer, Path]]):
-        for [client, server, path] in paths:
+        for link in self.__route_calculator.links:
+            other_mbps = 0
+            for switch, neighbor in [(link.switch1, link.switch2), (link.switch2, link.switch1)]:
+                dpid = self.__to_dpid(switch)
+                port = self.__find_port(dpid, Switch(neighbor))
+                rates = None if port is None else self.__stats_collector.port_rate_mbps(dpid, port)
+                if rates is None:
+                    continue
+
+                route_mbps = 0
+                for key, action in self.__flow_table.flows.get(dpid, {}).items():
+                    flow_mbps = self.__stats_collector.flow_rate_mbps(dpid, key) or 0
+                    if isinstance(action, tuple):
+                        total = sum(w for _, w in action)
+                        route_mbps += flow_mbps * sum(w for p, w in action if p == port) / total
+                    elif action == port:
+                        route_mbps += flow_mbps
+                other_mbps = max(other_mbps, rates[1] - route_mbps)
+
+            self.__route_calculator.update_measured_bandwidth(link.switch1, link.switch2,
+                                                              max(link.bandwidth_mbps - other_mbps, 0))
+
+    def __request_flow_stats(self):
+        """
+        Request byte count of the flow toward each server from its edge switch. replies update progress of host
+        pairs by flow_stats_reply_handler before the next update.
+        """
+        if not self.__is_updating:
+            return
+
+        for [client, server] in self.__route_calculator.host_pairs:
+            cookie = self.__client_to_cookie.get(client.name)
+            dp = self.__find_dp(self.__to_dpid(server.neighbor_switch))
+            if cookie is not None and dp is not None:
+                self._request_flow_stats(dp, cookie)
+
+    def __calc_paths(self) -> CompactPaths:
+        """
+        Calculate paths of the current interval in worker processes so as not to block handlers of OpenFlow messages,
+        which run on the hub while waiting for them.
+        With route plan, paths are looked up from the plan precomputed for all intervals up to the last failure,
+        which is rebuilt only when the topology, failures or host pairs have changed, a host pair has finished, with
+        progress feedback, a host pair has progressed by __REPLAN_PROGRESS_STEP of its data size, or with measured
+        bandwidth, that of a link has changed by __REPLAN_BANDWIDTH_STEP of its bandwidth.
+        Without it, progress of host pairs is reflected in every interval.
+        """
+        if not self.__PRECOMPUTE_ROUTE_PLAN:
+            return self.__calc_in_worker(self.__route_calculator.snapshot(), [self.__update_times])[0]
+
+        latest = self.__route_plans.latest
+        paths = self.__route_plans.paths_at(self.__route_calculator, self.__update_times)
+        plan = self.__route_plans.latest
+        if plan is not latest:
+            self.logger.info("[INFO]precomputed route plan from %dth to %dth update", plan.first_nth_update,
+                             plan.last_nth_update)
+        return paths
+
+    def __calc_in_worker(self, snapshot: Snapshot, nth_updates: list[int]) -> list[CompactPaths]:
+        """
+        Calculate paths of each interval in parallel.
+        Optimal and time expanded calculate consecutive intervals at once in one worker instead, so that they share one
+        time budget of the solver.
+        """
+        if self.__ROUTING_ALGORITHM in (RoutingAlgorithm.OPTIMAL, RoutingAlgorithm.TIME_EXPANDED) \
+                and len(nth_updates) > 1:
+            future = self.__route_worker.submit_plan(snapshot, nth_updates[0], nth_updates[-1],
+                                                     self.__UPDATE_INTERVAL_SEC)
+            started_at = time.perf_counter()
+            self.__wait_for([future])
+            results = future.result()
+        else:
+            futures = [self.__route_worker.submit(snapshot, n, self.__UPDATE_INTERVAL_SEC) for n in nth_updates]
+            started_at = time.perf_counter()
+            self.__wait_for(futures)
+            results = [f.result() for f in futures]
+        self.__route_calc_stats["waiting_sec"] += time.perf_counter() - started_at
+        self.__route_calc_stats["calc_sec"] += sum(map(lambda x: x.calc_sec, results))
+        for result in results:
+            METRICS.observe("drn_route_calc_seconds", result.calc_sec, algorithm=self.__ROUTING_ALGORITHM.name)
+        return list(map(lambda x: x.paths, results))
+
+    def __wait_for(self, futures: list[Future]):
+        """
+        Wait for futures of worker by polling, so that other green threads including handlers run meanwhile.
+        """
+        while not all(f.done() for f in futures):
+            hub.sleep(self.__HUB_POLL_SEC)
+
+    @METRICS.timed("drn_set_route_seconds")
+    def __set_route_by_path(self, paths: list[list[HostClient, HostServer, Union[Path, MultiPath]]],
+                            replace_all: bool = False, clients: Optional[set[str]] = None):
+        """
+        Replace paths of the host pairs with paths, and send only flow-mods and group-mods that differ from
+        installed ones. a flow whose action has changed is modified by ADD overwriting it instead of MODIFY_STRICT,
+        which is counted as "modify". this must be called holding __route_lock.
+
+        :param replace_all: if True, paths of host pairs that are not in paths are removed
+        :param clients: names of clients whose paths are removed if they are not in paths
+        """
+        replaced = self.__client_to_path.keys() if replace_all else self.__client_to_path.keys() & (clients or set())
+        for client in replaced - {c.name for c, _, _ in paths}:
+            self.__unregister_path(client)
+            self.__event_feed.publish("path_removed", client=client)
+        changed = [[c, s, p] for c, s, p in paths if not self.__is_current_path(c.name, p)]
+        self.__register_paths(paths)
+        for [client, server, path] in changed:
+            self.__event_feed.publish("path_changed", client=client.name, server=server.name,
+                                      **self.__path_to_dict(path))
+
+        diffs = self.__flow_table.update(self.__route_flows())
+        counts = {"add": 0, "modify": 0, "delete": 0, "group": 0}
+        for dpid, diff in diffs.items():
+            dp = self.__find_dp(dpid)
+            if dp is None:
+                self.__flow_table.forget(dpid)
+                continue
+
+            # groups must exist before flows refer to them
+            for group_id, buckets in diff.added_groups:
+                self._add_group(dp, group_id, self.__route_buckets(buckets))
+            for group_id, buckets in diff.modified_groups:
+                self._modify_group(dp, group_id, self.__route_buckets(buckets))
+            if len(diff.added_groups) > 0:
+                self._send_barrier(dp)
+
+            # send all flow-mods for the datapath back-to-back, and then wait for them by one barrier.
+            # modified flows are also added, because MODIFY_STRICT silently does nothing if the datapath has lost the
+            # flow, while ADD replaces the flow keeping its counters.
+            for (eth_type, ip), action in diff.added + diff.modified:
+                self._add_flow(dp, self.__ROUTE_PRIORITY, self.__route_match(eth_type, ip),
+                               self.__route_actions(dpid, (eth_type, ip), action))
+            for eth_type, ip in diff.deleted:
+                self._delete_flow(dp, self.__ROUTE_PRIORITY, self.__route_match(eth_type, ip))
+            # groups are deleted after no flow refers to them
+            for group_id in diff.deleted_groups:
+                self._delete_group(dp, group_id)
+            self._send_barrier(dp)
+
+            counts["add"] += len(diff.added)
+            counts["modify"] += len(diff.modified)
+            counts["delete"] += len(diff.deleted)
+            counts["group"] += len(diff.added_groups) + len(diff.modified_groups) + len(diff.deleted_groups)
+
+        for k, v in counts.items():
+            self.__flow_mod_counts[k] += v
+        self.__event_feed.publish("flow_mods", datapaths=len(diffs), **counts)
+        self.logger.info("[INFO]sent flow-mods add:%d modify:%d delete:%d and group-mods:%d to %d datapaths",
+                         counts["add"], counts["modify"], counts["delete"], counts["group"], len(diffs))
+
+    def __route_flows(self) -> dict[int, dict[FlowKey, FlowAction]]:
+        """
+        Build route flows that should be installed for current paths of all host pairs.
+        A switch where paths of MultiPath branch splits packets by weights of the paths through each port.
+
+        :return: dict[dpid, dict[FlowKey, FlowAction]]
+        """
+        # weight of each out_port. dict[dpid, dict[FlowKey, dict[out_port, weight]]]
+        port_weights: dict[int, dict[FlowKey, dict[int, float]]] = {}
+
+        def add(dpid: int, ip: str, port: int, weight: float):
+            for eth_type in [ether_types.ETH_TYPE_IP, ether_types.ETH_TYPE_ARP]:
+                weights = port_weights.setdefault(dpid, {}).setdefault((eth_type, ip), {})
+                weights[port] = weights.get(port, 0) + weight
+
+        for [client, server, path] in self.__client_to_path.values():
             client_ip = self.__host_to_ip[client.name]
             server_ip = self.__host_to_ip[server.name]
 
-            for l in path.links:
-                # control packet from client to server
-                switch1_dpid = self.__to_dpid(l.switch1)
-                port_switch1_to_switch2 = self.__find_port(switch1_dpid, Switch(l.switch2))
-
-                actions = [ofparser.OFPActionOutput(port_switch1_to_switch2)]
-                self._add_flow(self.__find_dp(switch1_dpid), self.__route_priority,
-                               ofparser.OFPMatch(eth_type=ether_types.ETH_TYPE_IP, ipv4_dst=server_ip), actions)
-                self._add_flow(self.__find_dp(switch1_dpid), self.__route_priority,
-                               ofparser.OFPMatch(eth_type=ether_types.ETH_TYPE_ARP, arp_tpa=server_ip), actions)
-
-                # control packet from server to client
-                switch2_dpid = self.__to_dpid(l.switch2)
-                port_switch2_to_switch1 = self.__find_port(switch2_dpid, Switch(l.switch1))
+            weighted_paths = zip(path.paths, path.weights) if isinstance(path, MultiPath) else [(path, 1)]
+            for p, weight in weighted_paths:
+                for l in p.links:
+                    # control packet from client to server
+                    switch1_dpid = self.__to_dpid(l.switch1)
+                    port_switch1_to_switch2 = self.__find_port(switch1_dpid, Switch(l.switch2))
+                    if port_switch1_to_switch2 is not None:
+                        add(switch1_dpid, server_ip, port_switch1_to_switch2, weight)
+
+                    # control packet from server to client
+                    switch2_dpid = self.__to_dpid(l.switch2)
+                    port_switch2_to_switch1 = self.__find_port(switch2_dpid, Switch(l.switch1))
+                    if port_switch2_to_switch1 is not None:
+                        add(switch2_dpid, client_ip, port_switch2_to_switch1, weight)
+
+        return {dpid: {key: self.__flow_action(weights) for key, weights in v.items()}
+                for dpid, v in port_weights.items()}
+
+    def __flow_action(self, port_weights: dict[int, float]) -> FlowAction:
+        """
+        :return: out_port if there is only one port, otherwise buckets whose weights are scaled to integers
+        """
+        if len(port_weights) == 1:
+            return next(iter(port_weights))
+
+        total = sum(port_weights.values())
+        return tuple(sorted(
+            (port, max(1, round(self.__TOTAL_BUCKET_WEIGHT * w / total)) if total > 0 else 1)
+            for port, w in port_weights.items()
+        ))
+
+    def __route_actions(self, dpid: int, key: FlowKey, action: FlowAction) -> list[ofparser.OFPAction]:
+        if isinstance(action, tuple):
+            return [ofparser.OFPActionGroup(self.__flow_table.group_id(dpid, key))]
+        return [ofparser.OFPActionOutput(action)]
+
+    @staticmethod
+    def __route_buckets(buckets: Buckets) -> list[ofparser.OFPBucket]:
+        return [ofparser.OFPBucket(weight=weight, watch_port=ofproto.OFPP_ANY, watch_group=ofproto.OFPG_ANY,
+                                   actions=[ofparser.OFPActionOutput(port)])
+                for port, weight in buckets]
+
+    @staticmethod
+    def __route_match(eth_type: int, ip: str) -> ofparser.OFPMatch:
+        if eth_type == ether_types.ETH_TYPE_ARP:
+            return ofparser.OFPMatch(eth_type=eth_type, arp_tpa=ip)
+        return ofparser.OFPMatch(eth_type=eth_type, ipv4_dst=ip)
+
+    def __is_current_path(self, client: str, path: Union[Path, MultiPath]) -> bool:
+        current = self.__client_to_path.get(client)
+        return current is not None and type(current[2]) is type(path) and current[2] == path
+
+    @staticmethod
+    def __path_to_dict(path: Union[Path, MultiPath]) -> dict:
+        """
+        :return: {"paths": switches of each path, "weights": bandwidth(Mbps) of each path}. weights is None for Path.
+        """
+        if isinstance(path, MultiPath):
+            return {"paths": [list(p.switches) for p in path.paths], "weights": list(path.weights)}
+        return {"paths": [list(path.switches)], "weights": None}
+
+    def __register_paths(self, paths: list[list[HostClient, HostServer, Union[Path, MultiPath]]]):
+        """
+        Record paths as current ones and index them by links they cross.
+        """
+        for [client, server, path] in paths:
+            self.__unregister_path(client.name)
+            self.__client_to_path[client.name] = [client, server, path]
+            for l in path.hops:
+                self.__link_to_clients.setdefault(l, set()).add(client.name)
+
+    def __unregister_path(self, client: str):
+        old = self.__client_to_path.pop(client, None)
+        if old is None:
+            return
 
-                actions = [ofparser.OFPActionOutput(port_switch2_to_switch1)]
-                self._add_flow(self.__find_dp(switch2_dpid), self.__route_priority,
-                               ofparser.OFPMatch(eth_type=ether_types.ETH_TYPE_IP, ipv4_dst=client_ip), actions)
-                self._add_flow(self.__find_dp(switch2_dpid), self.__route_priority,
-                               ofparser.OFPMatch(eth_type=ether_types.ETH_TYPE_ARP, arp_tpa=client_ip), actions)
+        for l in old[2].hops:
+            clients = self.__link_to_clients.get(l)
+            if clients is not None:
+                clients.discard(client)
+                if len(clients) == 0:
+                    self.__link_to_clients.pop(l)
+
+    def __reroute(self, failed_link: Link):
+        """
+        Recalculate paths of only host pairs whose current path crosses failed_link in worker, and install them as
+        soon as they are calculated. waiting for worker runs in another green thread so as not to block handlers.
+        """
+        clients = self.__link_to_clients.pop(failed_link, set())
+        if not self.__is_updating or len(clients) == 0:
+            return
 
-        self.__route_priority += 1
+        started_at = time.perf_counter()
+        fixed_paths = RouteCalculator.compact_paths([v for k, v in self.__client_to_path.items() if k not in clients])
+        # paths are being used in the interval of the last update
+        nth_update = max(self.__update_times - 1, 0)
+        future = self.__route_worker.submit(self.__route_calculator.snapshot(), nth_update,
+                                            self.__UPDATE_INTERVAL_SEC, frozenset(clients), fixed_paths)
+        hub.spawn(self.__apply_reroute, failed_link, clients, future, self.__update_times, started_at)
+
+    def __apply_reroute(self, failed_link: Link, clients: set[str], future: Future, update_times: int,
+                        started_at: float):
+        """
+        :param clients: names of clients rerouted. those without new path, e.g. which have failed or sent all data,
+            are removed, so that their flows through failed_link are deleted.
+        :param update_times: __update_times when rerouting started. paths are dropped if update has run since then,
+            because it has already routed around failed_link.
+        """
+        self.__wait_for([future])
+        result = future.result()
+        METRICS.observe("drn_route_calc_seconds", result.calc_sec, algorithm=self.__ROUTING_ALGORITHM.name)
+        with self.__route_lock:
+            if not self.__is_updating or self.__update_times != update_times:
+                self.logger.info("[INFO]dropped reroute around %s---%s superseded by path update",
+                                 failed_link.switch1, failed_link.switch2)
+                return
+
+            paths = self.__route_calculator.restore_paths(result.paths)
+            self.__set_route_by_path(paths, clients=clients)
+
+        self.logger.info("[INFO]rerouted %d host pairs around %s---%s in %.1fms", len(paths),
+                         failed_link.switch1, failed_link.switch2, (time.perf_counter() - started_at) * 1000)
 
     def __find_port(self, dpid: int, switch: Switch) -> Optional[int]:
-        for k, v in self.__port_to_switch[dpid].items():
-            if v == switch:
-                return k
+        return self.__switch_to_port.get((dpid, switch.name))
 
     def __find_dp(self, dpid: int) -> Optional[controller.Datapath]:
-        for dp in self.__datapaths:
-            if dp.id == dpid:
-                return dp
+        return self.__datapaths.get(dpid)
 
     def __to_dpid(self, switch_name: str) -> int:
         # assume switch name is like "s[0-9]+"
@@ -174,13 +881,31 @@ class DisasterResistantNetworkController(app_manager.RyuApp, FlowAddable):
         dp: controller.Datapath = ev.msg.datapath
         self.logger.info("[INFO]OFPSwitchFeature: datapath %d", dp.id)
 
-        self.__datapaths.append(dp)
+        self.__datapaths[dp.id] = dp
         self.__route_calculator.add_switch(Switch(f"s{dp.id}"))
 
         # send PacketIn to controller when receive unknown packet
         actions = [ofparser.OFPActionOutput(ofproto.OFPP_CONTROLLER, ofproto.OFPCML_NO_BUFFER)]
         self._add_flow(dp, 0, ofparser.OFPMatch(), actions)
 
+        # answer ARP requests by the controller instead of flooding them
+        self._add_flow(dp, self.__ARP_REQUEST_PRIORITY,
+                       ofparser.OFPMatch(eth_type=ether_types.ETH_TYPE_ARP, arp_op=ARP_REQUEST), actions)
+        # drop multicast including broadcast and IPv6, which would be flooded around loops or ignored anyway
+        self._add_flow(dp, self.__MULTICAST_DROP_PRIORITY,
+                       ofparser.OFPMatch(eth_dst=("01:00:00:00:00:00", "01:00:00:00:00:00")), [])
+        self._add_flow(dp, self.__MULTICAST_DROP_PRIORITY, ofparser.OFPMatch(eth_type=ether_types.ETH_TYPE_IPV6), [])
+
+        for [client, server] in self.__route_calculator.host_pairs:
+            self.__add_flows_for_host_pair(client, server, dp.id)
+
+        # route flows may be left in the datapath, e.g. after restart of the controller. groups are deleted with
+        # flows that refer to them, and the rest of route flows are taken as installed by flow_stats_reply_handler.
+        self._delete_all_groups(dp)
+        self.__resync_flows[dp.id] = {}
+        self.__resync_xids[dp.id] = self._request_flow_stats(dp, 0, cookie_mask=0)
+        self.__response_cache.bump()
+
     # TODO: use to create topology dynamically
     # @set_ev_cls(ofp_event.EventOFPPortDescStatsReply)
     # def desc_stats_reply_handler(self, ev):
@@ -201,25 +926,119 @@ class DisasterResistantNetworkController(app_manager.RyuApp, FlowAddable):
 
         self.logger.info("[INFO]PortStatus reason:%d datapath:%s port:%d", msg.reason, dpid, port_no)
 
-        if msg.reason == ofproto.OFPPR_DELETE and self.__port_to_switch[dpid].get(port_no) is not None:
-            opposite = self.__port_to_switch[dpid].pop(port_no)
-            self.__route_calculator.rm_link(f"s{dpid}", opposite.name)
+        if msg.reason != ofproto.OFPPR_DELETE:
+            return
+
+        link = self.__rm_link_by_port(dpid, port_no)
+        if link is not None:
+            self.__event_feed.publish("link_removed", switch1=link.switch1, switch2=link.switch2)
+            self.__reroute(link)
+
+    def __rm_link_by_port(self, dpid: int, port_no: int) -> Optional[Link]:
+        """
+        :return: removed link. None if the link has been already removed.
+        """
+        opposite = self.__rm_port(dpid, port_no)
+        if opposite is None:
+            return None
+
+        # both switches notify the deletion, and only the first one removes the link
+        link = self.__route_calculator.rm_link(f"s{dpid}", opposite.name)
+        self.__record("rm_port", dpid=dpid, port=port_no)
+        return link
+
+    @handler.set_ev_cls(ofp_event.EventOFPStateChange, [handler.MAIN_DISPATCHER, handler.DEAD_DISPATCHER])
+    def state_change_handler(self, ev):
+        dp: controller.Datapath = ev.datapath
+        if ev.state != handler.DEAD_DISPATCHER or dp.id is None:
+            return
+
+        # datapath may have been replaced by reconnection
+        if self.__datapaths.get(dp.id) is not dp:
+            return
+
+        self.logger.info("[INFO]datapath %d disconnected", dp.id)
+        self.__datapaths.pop(dp.id)
+        self.__dpid_to_mac_to_port.pop(dp.id, None)
+        self.__flow_table.forget(dp.id)
+        self.__stats_collector.forget(dp.id)
+
+    @handler.set_ev_cls(ofp_event.EventOFPPortStatsReply, handler.MAIN_DISPATCHER)
+    def port_stats_reply_handler(self, ev):
+        msg: ofparser.OFPPortStatsReply = ev.msg
+        at_sec = time.monotonic()
+        for stat in msg.body:
+            if stat.port_no <= ofproto.OFPP_MAX:
+                self.__stats_collector.record_port(msg.datapath.id, stat.port_no, at_sec, stat.rx_bytes,
+                                                   stat.tx_bytes)
+
+    @handler.set_ev_cls(ofp_event.EventOFPFlowStatsReply, handler.MAIN_DISPATCHER)
+    def flow_stats_reply_handler(self, ev):
+        msg: ofparser.OFPFlowStatsReply = ev.msg
+        dpid = msg.datapath.id
+        at_sec = time.monotonic()
+        resync_flows = self.__resync_flows.get(dpid) if self.__resync_xids.get(dpid) == msg.xid else None
+        is_progressed = False
+        for stat in msg.body:
+            client = self.__cookie_to_client.get(stat.cookie)
+            if client is not None and self.__route_calculator.update_sent_gb(client, stat.byte_count / 10 ** 9):
+                is_progressed = True
+
+            if stat.priority == self.__ROUTE_PRIORITY:
+                eth_type = stat.match.get("eth_type")
+                ip = stat.match.get("arp_tpa") if eth_type == ether_types.ETH_TYPE_ARP else stat.match.get("ipv4_dst")
+                self.__stats_collector.record_flow(dpid, (eth_type, ip), at_sec, stat.byte_count)
+
+                out_port = self.__output_port(stat.instructions)
+                if resync_flows is not None and out_port is not None:
+                    resync_flows[(eth_type, ip)] = out_port
+
+        # reply is split into multiple messages if it is large
+        if resync_flows is not None and msg.flags & ofproto.OFPMPF_REPLY_MORE == 0:
+            self.__resync_xids.pop(dpid)
+            self.__resync_flows.pop(dpid)
+            with self.__route_lock:
+                if self.__flow_table.adopt(dpid, resync_flows):
+                    self.logger.info("[INFO]resynchronized %d route flows of datapath %d", len(resync_flows), dpid)
+                    # send flows that are missing or differ from current paths
+                    self.__set_route_by_path([])
+
+        if is_progressed:
+            self.__response_cache.bump()
+
+    @staticmethod
+    def __output_port(instructions: list[ofparser.OFPInstruction]) -> Optional[int]:
+        """
+        :return: out_port of the flow whose action is only output. None for the other actions.
+        """
+        actions = [a for i in instructions if isinstance(i, ofparser.OFPInstructionActions) for a in i.actions]
+        if len(actions) == 1 and isinstance(actions[0], ofparser.OFPActionOutput):
+            return actions[0].port
+        return None
 
     @handler.set_ev_cls(ofp_event.EventOFPPacketIn, handler.MAIN_DISPATCHER)
+    @METRICS.timed("drn_packet_in_seconds")
     def packet_in_handler(self, ev):
         msg: ofparser.OFPPacketIn = ev.msg
         buffer_id = msg.buffer_id
 
-        data = msg.data
-        pkt = packet.Packet(data)
-        eth: ethernet.ether = pkt.get_protocol(ethernet.ethernet)
+        self.__packet_in_counts["total"] += 1
 
+        # only the Ethernet header is parsed, and ARP only if the payload is ARP
+        data = msg.data
+        eth = parse_ethernet(data)
         # ignore IPv6 ICMP
-        if eth.ethertype == ether_types.ETH_TYPE_IPV6:
+        if eth is None or eth.ethertype == ether_types.ETH_TYPE_IPV6:
             return
 
         dp = msg.datapath
         in_port = msg.match["in_port"]
+        if eth.ethertype == ether_types.ETH_TYPE_ARP:
+            req = parse_arp(data, eth)
+            if req is not None and req.opcode == ARP_REQUEST:
+                self.__handle_arp_request(req, dp, in_port, data)
+                return
+
         actions = self.__handle_eth(eth, dp, in_port, buffer_id)
         if actions is None:
             return
@@ -233,11 +1052,39 @@ class DisasterResistantNetworkController(app_manager.RyuApp, FlowAddable):
         )
         dp.send_msg(out)
 
-    def __handle_eth(self, eth: ethernet.ethernet, dp: controller.Datapath, in_port: int, buffer_id) \
+    def __handle_arp_request(self, req: ArpPacket, dp: controller.Datapath, in_port: int, data: bytes):
+        """
+        Reply to ARP request with mac address of the target. if it is unknown, the request is sent only to the port
+        of the target host, and it is dropped if the target is not registered.
+        """
+        # ARP probe has no sender ip address
+        if req.src_ip != "0.0.0.0":
+            self.__ip_to_mac.setdefault(req.src_ip, req.src_mac)
+
+        mac = self.__ip_to_mac.get(req.dst_ip)
+        if mac is not None:
+            self.__packet_out(dp, in_port, build_arp_reply(req, mac))
+            self.__packet_in_counts["arp_reply"] += 1
+            return
+
+        edge = self.__ip_to_edge.get(req.dst_ip)
+        edge_dp = None if edge is None else self.__find_dp(edge[0])
+        if edge_dp is not None:
+            self.__packet_out(edge_dp, edge[1], data)
+
+    @staticmethod
+    def __packet_out(dp: controller.Datapath, out_port: int, data: bytes):
+        dp.send_msg(ofparser.OFPPacketOut(datapath=dp, buffer_id=ofproto.OFP_NO_BUFFER, in_port=ofproto.OFPP_CONTROLLER,
+                                          actions=[ofparser.OFPActionOutput(out_port)], data=data))
+
+    def __handle_eth(self, eth: EthernetHeader, dp: controller.Datapath, in_port: int, buffer_id) \
             -> Optional[list[ofparser.OFPAction]]:
         self.__dpid_to_mac_to_port.setdefault(dp.id, {})
-        self.logger.info("[INFO]PacketIn ether_type:%s datapath:%s mac_src:%s mac_dst:%s in_port:%d",
-                         hex(eth.ethertype), dp.id, eth.src, eth.dst, in_port)
+        # logging every PacketIn would dominate the controller under a flood
+        count = self.__packet_in_log_sampler.sample(dp.id)
+        if count > 0:
+            self.logger.info("[INFO]PacketIn ether_type:%s datapath:%s mac_src:%s mac_dst:%s in_port:%d (%d since "
+                             "the last log)", hex(eth.ethertype), dp.id, eth.src, eth.dst, in_port, count)
 
         # learn a mac address to avoid FLOOD next time.
         self.__dpid_to_mac_to_port[dp.id][eth.src] = in_port
@@ -264,6 +1111,10 @@ class DisasterResistantNetworkWsgiController(wsgi.ControllerBase):
         self.disaster_resistant_network_app: DisasterResistantNetworkController = \
             data[DisasterResistantNetworkController.APP_INSTANCE_NAME]
 
+    def __call__(self, req):
+        with METRICS.timer("drn_rest_request_seconds", action=req.urlvars.get("action", "")):
+            return super(DisasterResistantNetworkWsgiController, self).__call__(req)
+
     @wsgi.route("disaster", "/disaster", methods=["POST"])
     def handle_disaster(self, req, **kwargs):
         self.disaster_resistant_network_app.start_update_path()
@@ -274,40 +1125,127 @@ class DisasterResistantNetworkWsgiController(wsgi.ControllerBase):
         self.disaster_resistant_network_app.init()
         return webob.Response(content_type="text/plain", body="success")
 
+    __LINK_FIELDS = ["switch1", "switch2", "bandwidth_mbps", "fail_at_sec"]
+    __EVENTS_POLL_SEC = 0.2
+    __EVENTS_HEARTBEAT_SEC = 15
+
+    def __cached_response(self, req, key, build) -> webob.Response:
+        """
+        Respond the body cached for the current generation, or 304 if the client has it already.
+
+        :param key: key of the response including its parameters
+        :param build: function to build the object to be encoded as JSON
+        """
+        body, etag = self.disaster_resistant_network_app.response_cache.get(key, build)
+        if etag in req.if_none_match:
+            return webob.Response(status=304, etag=etag)
+        return webob.Response(content_type="application/json", charset="utf-8", body=body, etag=etag)
+
     @wsgi.route("get port_to_switch", "/port-to-switch", methods=["GET"])
     def handle_get_port_to_swtich(self, req, **kwargs):
-        port_to_switch = {dpid: {
-            port: switch.name for port, switch in v.items()
-        } for dpid, v in self.disaster_resistant_network_app.port_to_switch.items()}
-        body = json.dumps({"result": "success", "data": {"port_to_switch": port_to_switch}})
-        return webob.Response(content_type="application/json", json_body=body)
+        def build():
+            port_to_switch = {dpid: {
+                port: switch.name for port, switch in v.items()
+            } for dpid, v in self.disaster_resistant_network_app.port_to_switch.items()}
+            return {"result": "success", "data": {"port_to_switch": port_to_switch}}
+
+        return self.__cached_response(req, "port_to_switch", build)
+
+    @wsgi.route("get stats", "/stats", methods=["GET"])
+    def handle_get_stats(self, req, **kwargs):
+        body = {"result": "success", "data": self.disaster_resistant_network_app.stats_collector.to_dict()}
+        return webob.Response(content_type="application/json", charset="utf-8", json_body=body)
+
+    @wsgi.route("get metrics", "/metrics", methods=["GET"])
+    def handle_get_metrics(self, req, **kwargs):
+        # text exposition format of Prometheus
+        return webob.Response(content_type="text/plain; version=0.0.4", charset="utf-8",
+                              body=METRICS.to_prometheus().encode("utf-8"))
+
+    @wsgi.route("profile", "/profile", methods=["PUT"])
+    def handle_profile(self, req, **kwargs):
+        path = self.disaster_resistant_network_app.request_profile()
+        return webob.Response(content_type="text/plain", body=path)
+
+    @wsgi.route("stream events", "/events", methods=["GET"])
+    def handle_stream_events(self, req, **kwargs):
+        """
+        Stream events of topology and routes as JSON lines by chunked transfer until the client disconnects.
+        see EventFeed about events.
+        """
+        feed = self.disaster_resistant_network_app.event_feed
+        subscription = feed.subscribe()
+
+        def stream():
+            idle_sec = 0
+            try:
+                while True:
+                    events = subscription.drain()
+                    if len(events) > 0:
+                        idle_sec = 0
+                        yield b"".join(events)
+                    elif idle_sec >= self.__EVENTS_HEARTBEAT_SEC:
+                        # an empty line keeps the connection alive and detects disconnection of the client
+                        idle_sec = 0
+                        yield b"\n"
+                    # events are published by other threads, so this green thread only polls them
+                    hub.sleep(self.__EVENTS_POLL_SEC)
+                    idle_sec += self.__EVENTS_POLL_SEC
+            finally:
+                feed.unsubscribe(subscription)
+
+        return webob.Response(content_type="application/x-ndjson", app_iter=stream())
 
     @wsgi.route("list switches", "/switch", methods=["GET"])
     def handle_list_switches(self, req, **kwargs):
-        switches = list(map(lambda x: x.name, self.disaster_resistant_network_app.switches))
-        body = json.dumps({"result": "success", "data": {"switches": switches}})
-        return webob.Response(content_type="application/json", json_body=body)
+        def build():
+            switches = list(map(lambda x: x.name, self.disaster_resistant_network_app.switches))
+            return {"result": "success", "data": {"switches": switches}}
+
+        return self.__cached_response(req, "switches", build)
 
     @wsgi.route("list links", "/link", methods=["GET"])
     def handle_list_links(self, req, **kwargs):
-        links = list(map(lambda x: {
-            "switch1": x.switch1,
-            "switch2": x.switch2,
-            "bandwidth_mbps": x.bandwidth_mbps,
-            "fail_at_sec": x.fail_at_sec
-        }, self.disaster_resistant_network_app.links))
-        body = json.dumps({"result": "success", "data": {"links": links}})
-        return webob.Response(content_type="application/json", json_body=body)
+        """
+        query parameters are optional.
+        fields: comma separated fields of links to respond. all fields if not given.
+        offset, limit: respond links from offset-th to (offset + limit - 1)-th. all links if not given.
+        """
+        fields = req.params.get("fields")
+        fields = self.__LINK_FIELDS if fields is None else fields.split(",")
+        if any(f not in self.__LINK_FIELDS for f in fields):
+            return webob.Response(status=400, content_type="text/plain", body=f"fields must be in {self.__LINK_FIELDS}")
+        try:
+            offset = int(req.params.get("offset", 0))
+            limit = int(req.params["limit"]) if "limit" in req.params else None
+        except ValueError:
+            return webob.Response(status=400, content_type="text/plain", body="offset and limit must be integers")
+        if offset < 0 or (limit is not None and limit < 0):
+            return webob.Response(status=400, content_type="text/plain", body="offset and limit must not be negative")
+
+        def build():
+            links = self.disaster_resistant_network_app.links
+            links = links[offset:] if limit is None else links[offset:offset + limit]
+            return {"result": "success", "data": {"links": [{f: getattr(x, f) for f in fields} for x in links]}}
+
+        return self.__cached_response(req, ("links", tuple(fields), offset, limit), build)
 
     @wsgi.route("add link", "/link", methods=["POST"])
     def handle_add_link(self, req, **kwargs):
-        s1 = req.json["switch1"]
-        s2 = req.json["switch2"]
-        link = Link(s1["name"], s2["name"], req.json["bandwidth_mbps"])
+        self.disaster_resistant_network_app.add_link(*self.__parse_link(req.json))
+        return webob.Response(content_type="text/plain", body="success")
 
-        self.disaster_resistant_network_app.add_link(link, s1["port"], s2["port"])
+    @wsgi.route("add links", "/links", methods=["POST"])
+    def handle_add_links(self, req, **kwargs):
+        self.disaster_resistant_network_app.add_links(list(map(self.__parse_link, req.json)))
         return webob.Response(content_type="text/plain", body="success")
 
+    @staticmethod
+    def __parse_link(body: dict) -> list[Link, int, int]:
+        s1 = body["switch1"]
+        s2 = body["switch2"]
+        return [Link(s1["name"], s2["name"], body["bandwidth_mbps"]), s1["port"], s2["port"]]
+
     @wsgi.route("register link fail time", "/link", methods=["PUT"])
     def handle_register_link_fail_time(self, req, **kwargs):
         self.disaster_resistant_network_app.register_link_fail_time(req.json["switch1"], req.json["switch2"],
@@ -316,12 +1254,16 @@ class DisasterResistantNetworkWsgiController(wsgi.ControllerBase):
 
     @wsgi.route("list host pairs", "/host-pair", methods=["GET"])
     def handle_list_host_pairs(self, req, **kwargs):
+        return self.__cached_response(req, "host_pairs", self.__build_host_pairs)
+
+    def __build_host_pairs(self) -> dict:
         host_pairs = list(map(lambda x: {
             "client": {
                 "name": x[0].name,
                 "neighbor": x[0].neighbor_switch,
                 "fail_at_sec": x[0].fail_at_sec,
                 "datasize_gb": x[0].datasize_gb,
+                "sent_gb": x[0].sent_gb,
                 "ip_address": x[1]
             },
             "server": {
@@ -330,20 +1272,27 @@ class DisasterResistantNetworkWsgiController(wsgi.ControllerBase):
                 "ip_address": x[3]
             }
         }, self.disaster_resistant_network_app.host_pairs))
-        body = json.dumps({"result": "success", "data": {"host_pairs": host_pairs}})
-        return webob.Response(content_type="application/json", json_body=body)
+        return {"result": "success", "data": {"host_pairs": host_pairs}}
 
     @wsgi.route("add host pair", "/host-pair", methods=["POST"])
     def handle_add_host_pair(self, req, **kwargs):
-        req_client = req.json["client"]
-        req_server = req.json["server"]
-        client = HostClient(req_client["name"], req_client["neighbor"])
-        server = HostServer(req_server["name"], req_server["neighbor"])
+        self.disaster_resistant_network_app.add_host_pair(*self.__parse_host_pair(req.json))
+        return webob.Response(content_type="text/plain", body="success")
 
-        self.disaster_resistant_network_app.add_host_pair(client, req_client["ip_address"], req_client["port"],
-                                                          server, req_server["ip_address"], req_server["port"])
+    @wsgi.route("add host pairs", "/host-pairs", methods=["POST"])
+    def handle_add_host_pairs(self, req, **kwargs):
+        self.disaster_resistant_network_app.add_host_pairs(list(map(self.__parse_host_pair, req.json)))
         return webob.Response(content_type="text/plain", body="success")
 
+    @staticmethod
+    def __parse_host_pair(body: dict) -> list[HostClient, str, int, HostServer, str, int, str, str]:
+        req_client = body["client"]
+        req_server = body["server"]
+        client = HostClient(req_client["name"], req_client["neighbor"])
+        server = HostServer(req_server["name"], req_server["neighbor"])
+        return [client, req_client["ip_address"], req_client["port"], server, req_server["ip_address"],
+                req_server["port"], req_client.get("mac_address"), req_server.get("mac_address")]
+
     @wsgi.route("update host client", "/host-client", methods=["PUT"])
     def handle_update_host_pair(self, req, **kwargs):
         self.disaster_resistant_network_app.update_host_client(req.json["client"], req.json["fail_at_sec"],
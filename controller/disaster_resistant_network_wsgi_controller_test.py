@@ -42,7 +42,7 @@ class DisasterResistantNetworkWsgiControllerTest(unittest.TestCase):
     def testComponents(self):
         res = requests.get(self.__URL + "/switch")
         self.assertEqual(200, res.status_code)
-        switches = json.loads(res.json())["data"]["switches"]
+        switches = res.json()["data"]["switches"]
         self.assertListEqual(["s1", "s2"], sorted(switches))
 
         # add link between switches
@@ -69,7 +69,7 @@ class DisasterResistantNetworkWsgiControllerTest(unittest.TestCase):
                 "bandwidth_mbps": 1000,
                 "fail_at_sec": -1,
             }]}
-        }, json.loads(res.json()))
+        }, res.json())
 
         res = requests.get(self.__URL + "/port-to-switch")
         self.assertEqual(200, res.status_code)
@@ -79,7 +79,7 @@ class DisasterResistantNetworkWsgiControllerTest(unittest.TestCase):
                 "1": {"1": "s2"},
                 "2": {"1": "s1"}
             }}
-        }, json.loads(res.json()))
+        }, res.json())
 
         # add host pair
         res = requests.post(self.__URL + "/host-pair", data=json.dumps({
@@ -110,6 +110,7 @@ class DisasterResistantNetworkWsgiControllerTest(unittest.TestCase):
                             "neighbor": "s1",
                             "fail_at_sec": -1,
                             "datasize_gb": -1,
+                            "sent_gb": 0,
                             "ip_address": "10.0.0.1"
                         },
                         "server": {
@@ -120,7 +121,7 @@ class DisasterResistantNetworkWsgiControllerTest(unittest.TestCase):
                     }
                 ]
             }
-        }, json.loads(res.json()))
+        }, res.json())
 
         # register link fail-time
         req = requests.put(self.__URL + "/link", data=json.dumps({
@@ -140,7 +141,24 @@ class DisasterResistantNetworkWsgiControllerTest(unittest.TestCase):
                 "bandwidth_mbps": 1000,
                 "fail_at_sec": 100,
             }]}
-        }, json.loads(res.json()))
+        }, res.json())
+
+        # not modified since the last response
+        etag = res.headers["ETag"]
+        res = requests.get(self.__URL + "/link", headers={"If-None-Match": etag})
+        self.assertEqual(304, res.status_code)
+
+        res = requests.get(self.__URL + "/link", params={"fields": "switch1,fail_at_sec", "offset": 0, "limit": 1})
+        self.assertEqual(200, res.status_code)
+        self.assertDictEqual({
+            "result": "success",
+            "data": {"links": [{"switch1": "s1", "fail_at_sec": 100}]}
+        }, res.json())
+        res = requests.get(self.__URL + "/link", params={"offset": 1})
+        self.assertEqual(200, res.status_code)
+        self.assertDictEqual({"result": "success", "data": {"links": []}}, res.json())
+        res = requests.get(self.__URL + "/link", params={"fields": "unknown"})
+        self.assertEqual(400, res.status_code)
 
         # update host client
         res = requests.put(self.__URL + "/host-client", data=json.dumps({
@@ -162,6 +180,7 @@ class DisasterResistantNetworkWsgiControllerTest(unittest.TestCase):
                             "neighbor": "s1",
                             "fail_at_sec": 1000,
                             "datasize_gb": 100,
+                            "sent_gb": 0,
                             "ip_address": "10.0.0.1"
                         },
                         "server": {
@@ -172,7 +191,11 @@ class DisasterResistantNetworkWsgiControllerTest(unittest.TestCase):
                     }
                 ]
             }
-        }, json.loads(res.json()))
+        }, res.json())
+
+        res = requests.get(self.__URL + "/metrics")
+        self.assertEqual(200, res.status_code)
+        self.assertIn('drn_rest_request_seconds_count{action="handle_list_host_pairs"} 2', res.text)
 
 
 if __name__ == '__main__':
@@ -4,3 +4,6 @@ from enum import Enum
 class RoutingAlgorithm(Enum):
     DIJKSTRA = 1
     TAKAHIRA = 2
+    MULTIPATH = 3
+    OPTIMAL = 4
+    TIME_EXPANDED = 5
@@ -0,0 +1,91 @@
+from __future__ import annotations
+
+import collections
+import json
+import threading
+import time
+
+
+class Subscription(object):
+    """
+    Bounded queue of events for one subscriber. the oldest events are dropped when it is full, so a slow subscriber
+    never blocks the publisher.
+    """
+
+    def __init__(self, queue_size: int):
+        self.__events: collections.deque[bytes] = collections.deque(maxlen=queue_size)
+        self.__dropped = 0
+        self.__lock = threading.Lock()
+
+    @property
+    def dropped(self) -> int:
+        """
+        number of events dropped since the last drain
+        """
+        return self.__dropped
+
+    def put(self, event: bytes):
+        with self.__lock:
+            if len(self.__events) == self.__events.maxlen:
+                self.__dropped += 1
+            self.__events.append(event)
+
+    def drain(self) -> list[bytes]:
+        """
+        Take all queued events without blocking. a "dropped" event precedes them if some events have been dropped.
+
+        :return: events encoded as JSON lines in the order they were published
+        """
+        with self.__lock:
+            events = list(self.__events)
+            self.__events.clear()
+            dropped = self.__dropped
+            self.__dropped = 0
+        if dropped > 0:
+            events.insert(0, EventFeed.encode({"type": "dropped", "count": dropped}))
+        return events
+
+
+class EventFeed(object):
+    """
+    Publishes events of topology and routes to all subscribers.
+    Each event is a dict of "type", "seq" that increases one by one, "at" in unix time and fields of the type, and
+    it is encoded once as a JSON line shared by subscribers.
+    """
+    QUEUE_SIZE = 1000
+
+    def __init__(self, queue_size: int = QUEUE_SIZE):
+        self.__queue_size = queue_size
+        self.__subscriptions: set[Subscription] = set()
+        self.__seq = 0
+        self.__lock = threading.Lock()
+
+    @property
+    def n_subscriptions(self) -> int:
+        return len(self.__subscriptions)
+
+    def subscribe(self) -> Subscription:
+        subscription = Subscription(self.__queue_size)
+        with self.__lock:
+            self.__subscriptions.add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription):
+        with self.__lock:
+            self.__subscriptions.discard(subscription)
+
+    def publish(self, event_type: str, **fields):
+        # events are not even encoded if nobody subscribes
+        if len(self.__subscriptions) == 0:
+            return
+
+        with self.__lock:
+            self.__seq += 1
+            event = self.encode({"type": event_type, "seq": self.__seq, "at": time.time(), **fields})
+            subscriptions = list(self.__subscriptions)
+        for s in subscriptions:
+            s.put(event)
+
+    @staticmethod
+    def encode(event: dict) -> bytes:
+        return json.dumps(event, separators=(",", ":")).encode("utf-8") + b"\n"
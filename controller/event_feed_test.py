@@ -0,0 +1,39 @@
+import json
+import unittest
+
+from event_feed import EventFeed
+
+
+class EventFeedTest(unittest.TestCase):
+    def test_publish(self):
+        feed = EventFeed(queue_size=2)
+        # nobody receives events published before subscribing
+        feed.publish("link_added", switch1="s1", switch2="s2")
+
+        fast = feed.subscribe()
+        slow = feed.subscribe()
+        self.assertEqual(feed.n_subscriptions, 2)
+        feed.publish("link_added", switch1="s1", switch2="s2")
+        self.assertListEqual(self.__decode(fast.drain()), [("link_added", 1)])
+        self.assertListEqual(fast.drain(), [])
+
+        feed.publish("link_removed", switch1="s1", switch2="s2")
+        feed.publish("path_changed", client="h1c")
+        # the oldest event is dropped instead of blocking the publisher
+        self.assertEqual(slow.dropped, 1)
+        self.assertListEqual(self.__decode(slow.drain()), [("dropped", None), ("link_removed", 2), ("path_changed", 3)])
+        self.assertEqual(slow.dropped, 0)
+        self.assertListEqual(self.__decode(fast.drain()), [("link_removed", 2), ("path_changed", 3)])
+
+        feed.unsubscribe(slow)
+        feed.publish("flow_mods", add=1)
+        self.assertListEqual(slow.drain(), [])
+        self.assertEqual(json.loads(fast.drain()[0])["add"], 1)
+
+    @staticmethod
+    def __decode(events: list[bytes]) -> list[tuple[str, int]]:
+        return [(e["type"], e.get("seq")) for e in map(json.loads, events)]
+
+
+if __name__ == '__main__':
+    unittest.main()
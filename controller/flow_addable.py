@@ -3,7 +3,7 @@ from __future__ import annotations
 from typing import Optional
 
 from ryu.controller.controller import Datapath
-from ryu.ofproto.ofproto_v1_3_parser import OFPMatch, OFPAction
+from ryu.ofproto.ofproto_v1_3_parser import OFPMatch, OFPAction, OFPBucket
 
 
 class FlowAddable:
@@ -13,7 +13,8 @@ class FlowAddable:
             priority: int,
             match: OFPMatch,
             actions: list[OFPAction],
-            buffer_id: Optional[int] = None
+            buffer_id: Optional[int] = None,
+            cookie: int = 0
     ):
         ofproto = datapath.ofproto
         parser = datapath.ofproto_parser
@@ -23,6 +24,7 @@ class FlowAddable:
         if buffer_id:
             mod = parser.OFPFlowMod(
                 datapath=datapath,
+                cookie=cookie,
                 buffer_id=buffer_id,
                 priority=priority,
                 match=match,
@@ -31,9 +33,88 @@ class FlowAddable:
         else:
             mod = parser.OFPFlowMod(
                 datapath=datapath,
+                cookie=cookie,
                 priority=priority,
                 match=match,
                 instructions=inst,
             )
 
         datapath.send_msg(mod)
+
+    def _delete_flow(self, datapath: Datapath, priority: int, match: OFPMatch):
+        """
+        Delete the flow whose priority and match are exactly the same.
+        """
+        ofproto = datapath.ofproto
+        parser = datapath.ofproto_parser
+
+        mod = parser.OFPFlowMod(
+            datapath=datapath,
+            command=ofproto.OFPFC_DELETE_STRICT,
+            priority=priority,
+            match=match,
+            out_port=ofproto.OFPP_ANY,
+            out_group=ofproto.OFPG_ANY,
+        )
+        datapath.send_msg(mod)
+
+    def _request_flow_stats(self, datapath: Datapath, cookie: int, cookie_mask: int = 0xffffffffffffffff) -> int:
+        """
+        Request stats of flows whose cookie is the same in bits of cookie_mask. all flows if cookie_mask is 0.
+        replies arrive as EventOFPFlowStatsReply.
+
+        :return: xid of the request, which replies have
+        """
+        ofproto = datapath.ofproto
+        parser = datapath.ofproto_parser
+
+        req = parser.OFPFlowStatsRequest(datapath, 0, ofproto.OFPTT_ALL, ofproto.OFPP_ANY, ofproto.OFPG_ANY,
+                                         cookie, cookie_mask, parser.OFPMatch())
+        datapath.send_msg(req)
+        return req.xid
+
+    def _request_port_stats(self, datapath: Datapath):
+        """
+        Request stats of all ports. replies arrive as EventOFPPortStatsReply.
+        """
+        ofproto = datapath.ofproto
+        parser = datapath.ofproto_parser
+
+        datapath.send_msg(parser.OFPPortStatsRequest(datapath, 0, ofproto.OFPP_ANY))
+
+    def _send_barrier(self, datapath: Datapath):
+        datapath.send_msg(datapath.ofproto_parser.OFPBarrierRequest(datapath))
+
+    def _add_group(self, datapath: Datapath, group_id: int, buckets: list[OFPBucket]):
+        """
+        Add SELECT group that sends each packet to one of buckets chosen by their weights.
+        """
+        ofproto = datapath.ofproto
+        parser = datapath.ofproto_parser
+
+        mod = parser.OFPGroupMod(datapath, ofproto.OFPGC_ADD, ofproto.OFPGT_SELECT, group_id, buckets)
+        datapath.send_msg(mod)
+
+    def _modify_group(self, datapath: Datapath, group_id: int, buckets: list[OFPBucket]):
+        ofproto = datapath.ofproto
+        parser = datapath.ofproto_parser
+
+        mod = parser.OFPGroupMod(datapath, ofproto.OFPGC_MODIFY, ofproto.OFPGT_SELECT, group_id, buckets)
+        datapath.send_msg(mod)
+
+    def _delete_group(self, datapath: Datapath, group_id: int):
+        ofproto = datapath.ofproto
+        parser = datapath.ofproto_parser
+
+        mod = parser.OFPGroupMod(datapath, ofproto.OFPGC_DELETE, ofproto.OFPGT_SELECT, group_id)
+        datapath.send_msg(mod)
+
+    def _delete_all_groups(self, datapath: Datapath):
+        """
+        Delete all groups, and flows that refer to them are deleted by the datapath as well.
+        """
+        ofproto = datapath.ofproto
+        parser = datapath.ofproto_parser
+
+        mod = parser.OFPGroupMod(datapath, ofproto.OFPGC_DELETE, ofproto.OFPGT_SELECT, ofproto.OFPG_ALL)
+        datapath.send_msg(mod)
@@ -0,0 +1,141 @@
+from __future__ import annotations
+
+import threading
+from typing import Optional, Union
+
+# (eth_type, destination ip address). destination is ipv4_dst for IP and arp_tpa for ARP.
+FlowKey = tuple[int, str]
+
+# buckets of SELECT group sorted by out_port. tuple[(out_port, weight)]
+Buckets = tuple[tuple[int, int], ...]
+
+# action of route flow. out_port to output packets, or Buckets to split packets by the group.
+FlowAction = Union[int, Buckets]
+
+
+class FlowDiff(object):
+    def __init__(self):
+        # list[(FlowKey, FlowAction)]. flows whose buckets only have changed are not included.
+        self.added: list[tuple[FlowKey, FlowAction]] = []
+        self.modified: list[tuple[FlowKey, FlowAction]] = []
+        # list[FlowKey]
+        self.deleted: list[FlowKey] = []
+        # list[(group_id, Buckets)]
+        self.added_groups: list[tuple[int, Buckets]] = []
+        self.modified_groups: list[tuple[int, Buckets]] = []
+        # list[group_id]
+        self.deleted_groups: list[int] = []
+
+    def __len__(self):
+        return len(self.added) + len(self.modified) + len(self.deleted) + \
+            len(self.added_groups) + len(self.modified_groups) + len(self.deleted_groups)
+
+
+class FlowTable(object):
+    """
+    Model of route flows and their groups installed in each datapath, which is used to send only differences of them.
+    Each flow whose action is Buckets has its own group while its action stays Buckets.
+    Updates are serialized, so that each diff is taken from the flows that the previous one has left.
+    """
+
+    def __init__(self):
+        # dict[dpid, dict[FlowKey, FlowAction]]
+        self.__flows: dict[int, dict[FlowKey, FlowAction]] = {}
+        # dict[dpid, dict[FlowKey, group_id]]
+        self.__group_ids: dict[int, dict[FlowKey, int]] = {}
+        # group ids are not reused, so that a group left in a reconnected datapath never conflicts
+        self.__next_group_id = 1
+        self.__lock = threading.Lock()
+
+    @property
+    def flows(self) -> dict[int, dict[FlowKey, FlowAction]]:
+        return self.__flows
+
+    def group_id(self, dpid: int, key: FlowKey) -> Optional[int]:
+        """
+        :return: id of group of the flow. None if action of the flow is not Buckets.
+        """
+        return self.__group_ids.get(dpid, {}).get(key)
+
+    def update(self, flows: dict[int, dict[FlowKey, FlowAction]]) -> dict[int, FlowDiff]:
+        """
+        Replace installed flows with flows, and return what has to be sent to each datapath for that.
+
+        :param flows: all route flows that should be installed. dict[dpid, dict[FlowKey, FlowAction]]
+        :return: differences of each datapath that has any. dict[dpid, FlowDiff]
+        """
+        with self.__lock:
+            return self.__update(flows)
+
+    def __update(self, flows: dict[int, dict[FlowKey, FlowAction]]) -> dict[int, FlowDiff]:
+        diffs: dict[int, FlowDiff] = {}
+        for dpid in self.__flows.keys() | flows.keys():
+            installed = self.__flows.get(dpid, {})
+            desired = flows.get(dpid, {})
+            group_ids = self.__group_ids.setdefault(dpid, {})
+
+            diff = FlowDiff()
+            for key, action in desired.items():
+                installed_action = installed.get(key)
+                if isinstance(action, tuple):
+                    group_id = group_ids.get(key)
+                    if group_id is None:
+                        group_id = self.__next_group_id
+                        self.__next_group_id += 1
+                        group_ids[key] = group_id
+                        diff.added_groups.append((group_id, action))
+                    elif installed_action != action:
+                        diff.modified_groups.append((group_id, action))
+                else:
+                    group_id = group_ids.pop(key, None)
+                    if group_id is not None:
+                        diff.deleted_groups.append(group_id)
+
+                if installed_action is None:
+                    diff.added.append((key, action))
+                elif installed_action != action and not (isinstance(action, tuple) and
+                                                         isinstance(installed_action, tuple)):
+                    diff.modified.append((key, action))
+            for key in installed.keys() - desired.keys():
+                diff.deleted.append(key)
+                group_id = group_ids.pop(key, None)
+                if group_id is not None:
+                    diff.deleted_groups.append(group_id)
+
+            if len(group_ids) == 0:
+                self.__group_ids.pop(dpid)
+            if len(diff) > 0:
+                diffs[dpid] = diff
+
+        self.__flows = {dpid: dict(v) for dpid, v in flows.items() if len(v) > 0}
+        return diffs
+
+    def adopt(self, dpid: int, flows: dict[FlowKey, int]) -> bool:
+        """
+        Take flows found in the datapath as installed, e.g. when it has kept flows over restart of the controller,
+        so that only differences from them are sent. Flows whose action is a group must have been deleted with
+        all groups of the datapath. This does nothing if flows of the datapath are already known.
+
+        :param flows: route flows in the datapath whose action is out_port. dict[FlowKey, out_port]
+        :return: whether flows are adopted
+        """
+        with self.__lock:
+            if dpid in self.__flows or dpid in self.__group_ids:
+                return False
+            if len(flows) > 0:
+                self.__flows[dpid] = dict(flows)
+            return True
+
+    def forget(self, dpid: int):
+        """
+        Forget flows and groups of the datapath, e.g. when it is disconnected.
+        """
+        with self.__lock:
+            self.__flows.pop(dpid, None)
+            self.__group_ids.pop(dpid, None)
+
+    def reset(self):
+        with self.__lock:
+            self.__flows = {}
+            self.__group_ids = {}
+            self.__next_group_id = 1
@@ -0,0 +1,84 @@
+import unittest
+
+from flow_table import FlowTable
+
+ETH_TYPE_IP = 0x0800
+ETH_TYPE_ARP = 0x0806
+
+
+class FlowTableTest(unittest.TestCase):
+    def test_update(self):
+        table = FlowTable()
+
+        diffs = table.update({
+            1: {(ETH_TYPE_IP, "10.0.0.1"): 1, (ETH_TYPE_ARP, "10.0.0.1"): 1},
+            2: {(ETH_TYPE_IP, "10.0.0.2"): 2},
+        })
+        self.assertListEqual(sorted(diffs.keys()), [1, 2])
+        self.assertListEqual(sorted(diffs[1].added), [((ETH_TYPE_IP, "10.0.0.1"), 1), ((ETH_TYPE_ARP, "10.0.0.1"), 1)])
+        self.assertListEqual(diffs[2].added, [((ETH_TYPE_IP, "10.0.0.2"), 2)])
+
+        # unchanged flows are not sent again
+        diffs = table.update({
+            1: {(ETH_TYPE_IP, "10.0.0.1"): 3, (ETH_TYPE_ARP, "10.0.0.1"): 1},
+            3: {(ETH_TYPE_IP, "10.0.0.2"): 1},
+        })
+        self.assertListEqual(sorted(diffs.keys()), [1, 2, 3])
+        self.assertEqual(len(diffs[1]), 1)
+        self.assertListEqual(diffs[1].modified, [((ETH_TYPE_IP, "10.0.0.1"), 3)])
+        self.assertEqual(len(diffs[2]), 1)
+        self.assertListEqual(diffs[2].deleted, [(ETH_TYPE_IP, "10.0.0.2")])
+        self.assertListEqual(diffs[3].added, [((ETH_TYPE_IP, "10.0.0.2"), 1)])
+        self.assertNotIn(2, table.flows)
+
+        self.assertDictEqual(table.update(table.flows), {})
+
+    def test_update_groups(self):
+        table = FlowTable()
+        key = (ETH_TYPE_IP, "10.0.0.1")
+
+        # flow is added with its group
+        diffs = table.update({1: {key: ((1, 10), (2, 20))}})
+        group_id = table.group_id(1, key)
+        self.assertListEqual(diffs[1].added_groups, [(group_id, ((1, 10), (2, 20)))])
+        self.assertListEqual(diffs[1].added, [(key, ((1, 10), (2, 20)))])
+
+        # only the group is modified when buckets change
+        diffs = table.update({1: {key: ((1, 10), (3, 20))}})
+        self.assertEqual(len(diffs[1]), 1)
+        self.assertListEqual(diffs[1].modified_groups, [(group_id, ((1, 10), (3, 20)))])
+
+        # flow outputs to port directly, and the group is no longer used
+        diffs = table.update({1: {key: 3}})
+        self.assertEqual(len(diffs[1]), 2)
+        self.assertListEqual(diffs[1].modified, [(key, 3)])
+        self.assertListEqual(diffs[1].deleted_groups, [group_id])
+        self.assertIsNone(table.group_id(1, key))
+
+        # new group is created again
+        diffs = table.update({1: {key: ((1, 10), (3, 20))}})
+        self.assertNotEqual(table.group_id(1, key), group_id)
+        self.assertListEqual(diffs[1].modified, [(key, ((1, 10), (3, 20)))])
+        self.assertListEqual(diffs[1].added_groups, [(table.group_id(1, key), ((1, 10), (3, 20)))])
+
+        diffs = table.update({})
+        self.assertListEqual(diffs[1].deleted, [key])
+        self.assertEqual(len(diffs[1].deleted_groups), 1)
+
+    def test_adopt(self):
+        table = FlowTable()
+        self.assertTrue(table.adopt(1, {(ETH_TYPE_IP, "10.0.0.1"): 1, (ETH_TYPE_IP, "10.0.0.2"): 2}))
+
+        # only differences from flows left in the datapath are sent
+        diffs = table.update({1: {(ETH_TYPE_IP, "10.0.0.1"): 1, (ETH_TYPE_IP, "10.0.0.3"): 3}})
+        self.assertListEqual(diffs[1].added, [((ETH_TYPE_IP, "10.0.0.3"), 3)])
+        self.assertListEqual(diffs[1].deleted, [(ETH_TYPE_IP, "10.0.0.2")])
+        self.assertEqual(len(diffs[1]), 2)
+
+        # known flows are not overwritten
+        self.assertFalse(table.adopt(1, {}))
+        self.assertEqual(len(table.flows[1]), 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
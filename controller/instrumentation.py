@@ -0,0 +1,225 @@
+from __future__ import annotations
+
+import bisect
+import contextlib
+import cProfile
+import functools
+import threading
+import time
+from typing import Callable, Optional
+
+# upper bounds(sec) of histogram buckets from 100us to 10s
+DEFAULT_BUCKETS = (0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1, 5, 10)
+
+# labels of a sample as sorted (name, value) pairs
+Labels = tuple[tuple[str, str], ...]
+
+
+class Histogram(object):
+    """
+    Count of observed values in each bucket, and their sum.
+    """
+
+    def __init__(self, buckets: tuple[float, ...]):
+        self.__buckets = buckets
+        # the last one is for values larger than any bucket
+        self.__counts = [0] * (len(buckets) + 1)
+        self.__sum = 0.0
+
+    def observe(self, value: float):
+        self.__counts[bisect.bisect_left(self.__buckets, value)] += 1
+        self.__sum += value
+
+    @property
+    def count(self) -> int:
+        return sum(self.__counts)
+
+    @property
+    def sum(self) -> float:
+        return self.__sum
+
+    def cumulative_counts(self) -> list[tuple[float, int]]:
+        """
+        :return: list[(upper bound, count of values not larger than it)] ending with (inf, count)
+        """
+        counts = []
+        total = 0
+        for bound, count in zip(self.__buckets + (float("inf"),), self.__counts):
+            total += count
+            counts.append((bound, total))
+        return counts
+
+
+class _Timer(object):
+    __slots__ = ("__observe", "__started_at")
+
+    def __init__(self, observe: Callable[[float], None]):
+        """
+        :param observe: function to observe the duration(sec)
+        """
+        self.__observe = observe
+        self.__started_at = 0.0
+
+    def __enter__(self):
+        self.__started_at = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.__observe(time.perf_counter() - self.__started_at)
+        return False
+
+
+class Metrics(object):
+    """
+    Histograms of durations of hot paths, and values collected by callbacks, which are exposed in Prometheus text
+    format. Nothing is measured while it is disabled, so instrumented code pays only for checking the flag.
+    """
+
+    def __init__(self, buckets: tuple[float, ...] = DEFAULT_BUCKETS):
+        self.__buckets = buckets
+        self.__enabled = False
+        # dict[name, dict[Labels, Histogram]]
+        self.__histograms: dict[str, dict[Labels, Histogram]] = {}
+        # dict[name, (type, help, label name, callback returning dict[label value, value])]
+        self.__callbacks: dict[str, tuple[str, str, str, Callable[[], dict[str, float]]]] = {}
+        self.__helps: dict[str, str] = {}
+        self.__lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return self.__enabled
+
+    def enable(self, enabled: bool = True):
+        self.__enabled = enabled
+
+    def describe(self, name: str, help_text: str):
+        self.__helps[name] = help_text
+
+    def register_callback(self, name: str, metric_type: str, help_text: str, label: str,
+                          callback: Callable[[], dict[str, float]]):
+        """
+        Expose values that are kept elsewhere, e.g. counters of the controller, which are read on every scrape.
+
+        :param metric_type: "counter" or "gauge"
+        :param label: name of the label whose values are keys of the dict returned by callback
+        """
+        self.__callbacks[name] = (metric_type, help_text, label, callback)
+
+    def observe(self, name: str, value: float, **labels: str):
+        if self.__enabled:
+            self.__observe(name, tuple(sorted(labels.items())), value)
+
+    def __observe(self, name: str, labels: Labels, value: float):
+        with self.__lock:
+            histograms = self.__histograms.get(name)
+            if histograms is None:
+                histograms = self.__histograms[name] = {}
+            histogram = histograms.get(labels)
+            if histogram is None:
+                histogram = histograms[labels] = Histogram(self.__buckets)
+            histogram.observe(value)
+
+    def timer(self, name: str, **labels: str):
+        """
+        :return: context manager that observes the duration(sec) of its block
+        """
+        if not self.__enabled:
+            return contextlib.nullcontext()
+        key: Labels = tuple(sorted(labels.items()))
+        return _Timer(lambda sec: self.__observe(name, key, sec))
+
+    def timed(self, name: str, **labels: str):
+        """
+        :return: decorator that observes the duration(sec) of each call
+        """
+        key: Labels = tuple(sorted(labels.items()))
+
+        def decorator(f):
+            @functools.wraps(f)
+            def wrapper(*args, **kwargs):
+                if not self.__enabled:
+                    return f(*args, **kwargs)
+                started_at = time.perf_counter()
+                try:
+                    return f(*args, **kwargs)
+                finally:
+                    self.__observe(name, key, time.perf_counter() - started_at)
+
+            return wrapper
+
+        return decorator
+
+    def reset(self):
+        with self.__lock:
+            self.__histograms = {}
+
+    def to_prometheus(self) -> str:
+        """
+        :return: all metrics in Prometheus text exposition format
+        """
+        with self.__lock:
+            histograms = {name: {k: (h.cumulative_counts(), h.sum) for k, h in v.items()}
+                          for name, v in self.__histograms.items()}
+
+        lines = []
+        for name, samples in sorted(histograms.items()):
+            lines += self.__header(name, "histogram", self.__helps.get(name))
+            for labels, (counts, total) in sorted(samples.items()):
+                for bound, count in counts:
+                    le = "+Inf" if bound == float("inf") else repr(bound)
+                    lines.append(f"{name}_bucket{self.__format_labels(labels + (('le', le),))} {count}")
+                lines.append(f"{name}_sum{self.__format_labels(labels)} {total!r}")
+                lines.append(f"{name}_count{self.__format_labels(labels)} {counts[-1][1]}")
+        for name, (metric_type, help_text, label, callback) in sorted(self.__callbacks.items()):
+            lines += self.__header(name, metric_type, help_text)
+            for k, v in sorted(callback().items()):
+                lines.append(f"{name}{self.__format_labels(((label, k),))} {float(v)!r}")
+        return "\n".join(lines) + "\n"
+
+    @staticmethod
+    def __header(name: str, metric_type: str, help_text: Optional[str]) -> list[str]:
+        lines = [] if help_text is None else [f"# HELP {name} {help_text}"]
+        return lines + [f"# TYPE {name} {metric_type}"]
+
+    @staticmethod
+    def __format_labels(labels: Labels) -> str:
+        if len(labels) == 0:
+            return ""
+        escaped = (str(v).replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n") for _, v in labels)
+        return "{" + ",".join(f'{k}="{v}"' for (k, _), v in zip(labels, escaped)) + "}"
+
+
+class Profiler(object):
+    """
+    cProfile of the next run of a function, which is requested beforehand and dumped to a file. it costs nothing
+    unless requested.
+    """
+
+    def __init__(self):
+        # file to dump the next run to
+        self.__path: Optional[str] = None
+        self.__lock = threading.Lock()
+
+    def request(self, path: str):
+        with self.__lock:
+            self.__path = path
+
+    def run(self, f: Callable, *args, **kwargs):
+        """
+        Call f, profiling it if requested.
+        """
+        with self.__lock:
+            path = self.__path
+            self.__path = None
+        if path is None:
+            return f(*args, **kwargs)
+
+        profile = cProfile.Profile()
+        try:
+            return profile.runcall(f, *args, **kwargs)
+        finally:
+            profile.dump_stats(path)
+
+
+# metrics shared by modules of the controller, which are exposed by /metrics
+METRICS = Metrics()
@@ -0,0 +1,81 @@
+import os
+import pstats
+import tempfile
+import unittest
+
+from instrumentation import Metrics, Profiler
+
+
+class MetricsTest(unittest.TestCase):
+    def test_disabled(self):
+        metrics = Metrics()
+
+        @metrics.timed("f_seconds")
+        def f(x):
+            return x * 2
+
+        self.assertEqual(f(2), 4)
+        with metrics.timer("g_seconds"):
+            pass
+        metrics.observe("h_seconds", 1)
+        self.assertEqual(metrics.to_prometheus(), "\n")
+
+    def test_to_prometheus(self):
+        metrics = Metrics(buckets=(0.1, 1))
+        metrics.enable()
+        metrics.describe("rest_seconds", "duration of REST requests")
+        for v in [0.05, 0.1, 0.5, 2]:
+            metrics.observe("rest_seconds", v, action="list_links")
+        metrics.register_callback("flow_mods_total", "counter", "flow-mods sent", "kind",
+                                  lambda: {"add": 3, "delete": 1})
+
+        self.assertEqual(metrics.to_prometheus(), "\n".join([
+            '# HELP rest_seconds duration of REST requests',
+            '# TYPE rest_seconds histogram',
+            'rest_seconds_bucket{action="list_links",le="0.1"} 2',
+            'rest_seconds_bucket{action="list_links",le="1"} 3',
+            'rest_seconds_bucket{action="list_links",le="+Inf"} 4',
+            'rest_seconds_sum{action="list_links"} 2.65',
+            'rest_seconds_count{action="list_links"} 4',
+            '# HELP flow_mods_total flow-mods sent',
+            '# TYPE flow_mods_total counter',
+            'flow_mods_total{kind="add"} 3.0',
+            'flow_mods_total{kind="delete"} 1.0',
+        ]) + "\n")
+
+        metrics.reset()
+        self.assertNotIn("rest_seconds", metrics.to_prometheus())
+
+    def test_timed(self):
+        metrics = Metrics()
+        metrics.enable()
+
+        @metrics.timed("f_seconds")
+        def f(x):
+            return x * 2
+
+        self.assertEqual(f(2), 4)
+        with metrics.timer("f_seconds"):
+            pass
+        self.assertIn("f_seconds_count 2", metrics.to_prometheus())
+
+
+class ProfilerTest(unittest.TestCase):
+    def test_run(self):
+        profiler = Profiler()
+        with tempfile.TemporaryDirectory() as d:
+            path = os.path.join(d, "test.prof")
+            self.assertEqual(profiler.run(sum, [1, 2]), 3)
+            self.assertFalse(os.path.exists(path))
+
+            # only the next run is profiled
+            profiler.request(path)
+            self.assertEqual(profiler.run(sum, [1, 2]), 3)
+            self.assertGreater(pstats.Stats(path).total_calls, 0)
+            os.remove(path)
+            profiler.run(sum, [1, 2])
+            self.assertFalse(os.path.exists(path))
+
+
+if __name__ == '__main__':
+    unittest.main()
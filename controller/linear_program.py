@@ -0,0 +1,42 @@
+from __future__ import annotations
+
+from typing import Optional
+
+import numpy as np
+from scipy import sparse
+from scipy.optimize import OptimizeResult
+
+# status of linprog
+STATUS_OPTIMAL = 0
+STATUS_LIMIT_REACHED = 1
+
+# violation of constraints less than this relative to their scale is regarded as feasible
+FEASIBILITY_TOL = 10 ** -6
+
+
+def usable_solution(res: OptimizeResult, a_ub: sparse.spmatrix, b_ub: np.ndarray,
+                    a_eq: Optional[sparse.spmatrix] = None, b_eq: Optional[np.ndarray] = None,
+                    upper_bounds: Optional[np.ndarray] = None) -> Optional[np.ndarray]:
+    """
+    Solution of linprog whose variables are bounded below by 0.
+    When the solver stops at the time limit, the incumbent it has found is feasible but not optimal, and it is still
+    better than nothing.
+
+    :param upper_bounds: upper bound of each variable. None if they are not bounded above.
+    :return: the optimum, or the incumbent if it satisfies the constraints. None otherwise.
+    """
+    if res.status == STATUS_OPTIMAL:
+        return res.x
+    if res.status != STATUS_LIMIT_REACHED or res.x is None:
+        return None
+
+    x = res.x
+    if not np.all(np.isfinite(x)) or np.any(x < -FEASIBILITY_TOL):
+        return None
+    if upper_bounds is not None and np.any(x > upper_bounds + FEASIBILITY_TOL * np.maximum(np.abs(upper_bounds), 1)):
+        return None
+    if np.any(a_ub @ x > b_ub + FEASIBILITY_TOL * np.maximum(np.abs(b_ub), 1)):
+        return None
+    if a_eq is not None and np.any(np.abs(a_eq @ x - b_eq) > FEASIBILITY_TOL * np.maximum(np.abs(b_eq), 1)):
+        return None
+    return x
@@ -0,0 +1,41 @@
+import unittest
+
+import numpy as np
+from scipy import sparse
+from scipy.optimize import OptimizeResult
+
+from linear_program import usable_solution
+
+
+class LinearProgramTest(unittest.TestCase):
+    def test_usable_solution(self):
+        # x0 + x1 <= 10, x0 - x1 == 0, x0 <= 4
+        a_ub = sparse.csr_matrix([[1, 1]])
+        b_ub = np.array([10])
+        a_eq = sparse.csr_matrix([[1, -1]])
+        b_eq = np.array([0])
+        upper_bounds = np.array([4, np.inf])
+
+        def solution(status, x):
+            res = OptimizeResult(status=status, x=None if x is None else np.array(x, dtype=np.float64))
+            return usable_solution(res, a_ub, b_ub, a_eq, b_eq, upper_bounds)
+
+        # the optimum is used as it is
+        self.assertListEqual(solution(0, [4, 4]).tolist(), [4, 4])
+        # infeasible or unbounded problem has no solution
+        self.assertIsNone(solution(2, None))
+        self.assertIsNone(solution(3, [4, 4]))
+
+        # feasible incumbent at the time limit is used
+        self.assertListEqual(solution(1, [3, 3]).tolist(), [3, 3])
+        self.assertIsNone(solution(1, None))
+        # incumbent violating any constraint is not used
+        self.assertIsNone(solution(1, [-1, -1]))
+        self.assertIsNone(solution(1, [5, 5]))
+        self.assertIsNone(solution(1, [3, 2]))
+        self.assertIsNone(solution(1, [np.nan, np.nan]))
+        self.assertIsNone(usable_solution(OptimizeResult(status=1, x=np.array([6., 6.])), a_ub, b_ub))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,101 @@
+from __future__ import annotations
+
+from typing import Optional, Union
+
+import numpy as np
+
+from components import Link
+
+
+class LinkArrays(object):
+    """
+    Array-backed copy of topology for vectorized calculation over links.
+    Switches and links are identified by integer indices in the order they are given.
+    """
+
+    def __init__(self, switches: list[str], links: list[Link]):
+        """
+        :param switches: names of switches. switches that only appear in links are appended.
+        :param links: links of the topology
+        """
+        self.__switches: list[str] = list(switches)
+        # dict[switch_name, index of switch]
+        self.__switch_index: dict[str, int] = {s: i for i, s in enumerate(self.__switches)}
+        self.__links: list[Link] = list(links)
+        # dict[Link, index of link]
+        self.__link_index: dict[Link, int] = {l: i for i, l in enumerate(self.__links)}
+
+        self.__endpoints = np.empty((len(self.__links), 2), dtype=np.int64)
+        for i, l in enumerate(self.__links):
+            self.__endpoints[i] = (self.__add_switch(l.switch1), self.__add_switch(l.switch2))
+
+        self.__bandwidth_mbps = np.array([l.bandwidth_mbps for l in self.__links], dtype=np.float64)
+        # link whose fail_at_sec is unknown never fails
+        self.__fail_at_sec = np.array([np.inf if l.fail_at_sec == -1 else l.fail_at_sec for l in self.__links],
+                                      dtype=np.float64)
+
+        # list[list[(index of neighbor switch, index of link)]] indexed by switch
+        self.__adjacency: list[list[tuple[int, int]]] = [[] for _ in self.__switches]
+        for i, (s1, s2) in enumerate(self.__endpoints.tolist()):
+            self.__adjacency[s1].append((s2, i))
+            self.__adjacency[s2].append((s1, i))
+
+    def __add_switch(self, switch: str) -> int:
+        index = self.__switch_index.get(switch)
+        if index is None:
+            index = len(self.__switches)
+            self.__switches.append(switch)
+            self.__switch_index[switch] = index
+        return index
+
+    @property
+    def switches(self) -> list[str]:
+        return self.__switches
+
+    @property
+    def links(self) -> list[Link]:
+        return self.__links
+
+    @property
+    def endpoints(self) -> np.ndarray:
+        """
+        indices of switches on both sides of each link. shape is (len(links), 2).
+        """
+        return self.__endpoints
+
+    @property
+    def bandwidth_mbps(self) -> np.ndarray:
+        return self.__bandwidth_mbps
+
+    @property
+    def fail_at_sec(self) -> np.ndarray:
+        """
+        fail_at_sec of each link. inf if it is unknown.
+        """
+        return self.__fail_at_sec
+
+    @property
+    def adjacency(self) -> list[list[tuple[int, int]]]:
+        return self.__adjacency
+
+    def switch_index(self, switch: str) -> Optional[int]:
+        return self.__switch_index.get(switch)
+
+    def link_indices(self, links: list[Link]) -> np.ndarray:
+        """
+        :return: indices of links. links that are not in this topology are skipped.
+        """
+        indices = [self.__link_index.get(l) for l in links]
+        return np.array([i for i in indices if i is not None], dtype=np.int64)
+
+    def expected_bandwidths(self, nth_updates: Union[int, np.ndarray], update_interval_sec: int) -> np.ndarray:
+        """
+        Calculate expected bandwidth of each link in interval from nth_update * update_interval_sec, which is
+        bandwidth multiplied by the ratio of time that the link is operating in the interval.
+
+        :param nth_updates: one nth_update, or 1-D array of them to calculate all intervals at once
+        :return: shape is (len(links),) for one nth_update, and (len(nth_updates), len(links)) for array
+        """
+        elapsed_sec = np.asarray(nth_updates, dtype=np.float64)[..., np.newaxis] * update_interval_sec
+        ope_ratio = np.clip((self.__fail_at_sec - elapsed_sec) / update_interval_sec, 0, 1)
+        return ope_ratio * self.__bandwidth_mbps
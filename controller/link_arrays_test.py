@@ -0,0 +1,33 @@
+import unittest
+
+import numpy as np
+
+from components import Link
+from link_arrays import LinkArrays
+
+
+class LinkArraysTest(unittest.TestCase):
+    def test_expected_bandwidths(self):
+        """
+        s1 --100-- s2 --10-- s3 --1-- s4
+        """
+        links = [Link('s1', 's2', 100), Link('s2', 's3', 10, 45), Link('s4', 's3', 1, 30)]
+        arrays = LinkArrays(['s1', 's2', 's3'], links)
+
+        self.assertListEqual(arrays.switches, ['s1', 's2', 's3', 's4'])
+        self.assertListEqual(arrays.endpoints.tolist(), [[0, 1], [1, 2], [3, 2]])
+        self.assertListEqual(arrays.adjacency[2], [(1, 1), (3, 2)])
+
+        np.testing.assert_array_equal(arrays.expected_bandwidths(0, 30), [100, 10, 1])
+        np.testing.assert_array_equal(arrays.expected_bandwidths(1, 30), [100, 5, 0])
+        np.testing.assert_array_equal(arrays.expected_bandwidths(np.arange(3), 30), [
+            [100, 10, 1],
+            [100, 5, 0],
+            [100, 0, 0],
+        ])
+
+        self.assertListEqual(arrays.link_indices([Link('s3', 's2', 10), Link('s1', 's4', 1)]).tolist(), [1])
+
+
+if __name__ == '__main__':
+    unittest.main()
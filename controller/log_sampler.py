@@ -0,0 +1,35 @@
+from __future__ import annotations
+
+from typing import Hashable
+
+
+class LogSampler(object):
+    """
+    Sampler of frequent events of each key, e.g. PacketIn of each datapath, so that logging all of them doesn't
+    dominate the controller under a flood. The first event and then every rate-th event of each key are sampled.
+    """
+
+    def __init__(self, rate: int):
+        """
+        :param rate: one of this number of events is sampled. every event is sampled if this is 1.
+        """
+        if rate < 1:
+            raise ValueError(f"rate must be greater than 0, got {rate}")
+        self.__rate = rate
+        # number of events not sampled since the last sampled one. dict[key, count]
+        self.__skipped: dict[Hashable, int] = {}
+
+    def sample(self, key: Hashable) -> int:
+        """
+        :return: number of events of key since the last sampled one including this event. 0 if this is not sampled.
+        """
+        skipped = self.__skipped.get(key)
+        if skipped is None or skipped + 1 >= self.__rate:
+            self.__skipped[key] = 0
+            return 1 if skipped is None else skipped + 1
+
+        self.__skipped[key] = skipped + 1
+        return 0
+
+    def reset(self):
+        self.__skipped = {}
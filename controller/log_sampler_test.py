@@ -0,0 +1,18 @@
+import unittest
+
+from log_sampler import LogSampler
+
+
+class LogSamplerTest(unittest.TestCase):
+    def test_sample(self):
+        sampler = LogSampler(3)
+        self.assertListEqual([sampler.sample(1) for _ in range(7)], [1, 0, 0, 3, 0, 0, 3])
+        # each key is sampled independently
+        self.assertEqual(sampler.sample(2), 1)
+
+        with self.assertRaises(ValueError):
+            LogSampler(0)
+
+
+if __name__ == '__main__':
+    unittest.main()
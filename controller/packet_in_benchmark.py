@@ -0,0 +1,109 @@
+"""
+Benchmark of the PacketIn path by replaying synthetic PacketIn of ARP requests, IPv4 and IPv6 from many datapaths.
+It compares parsing by ryu.lib.packet with logging every PacketIn, which the controller did before, with parsing only
+the headers that are needed by struct with sampled logging.
+
+usage: python packet_in_benchmark.py [--events N] [--datapaths N] [--repeat N]
+"""
+from __future__ import annotations
+
+import io
+import logging
+import random
+import struct
+import timeit
+from argparse import ArgumentParser, Namespace
+
+from ryu.lib.packet import arp, ethernet, packet
+
+from log_sampler import LogSampler
+from packet_parser import parse_ethernet, parse_arp
+
+ETH_TYPE_IP = 0x0800
+ETH_TYPE_ARP = 0x0806
+ETH_TYPE_IPV6 = 0x86dd
+LOG_SAMPLING = 100
+
+
+def synthetic_events(n_events: int, n_datapaths: int, seed: int = 0) -> list[tuple[int, bytes]]:
+    """
+    :return: list[(dpid, frame)] of ARP requests, IPv4 packets and IPv6 packets in equal proportions
+    """
+    rand = random.Random(seed)
+    events = []
+    for _ in range(n_events):
+        src = struct.pack("!HI", 0, rand.randint(1, 2 ** 32 - 1))
+        dst = struct.pack("!HI", 0, rand.randint(1, 2 ** 32 - 1))
+        kind = rand.randrange(3)
+        if kind == 0:
+            frame = b"\xff" * 6 + src + struct.pack("!H", ETH_TYPE_ARP) + \
+                struct.pack("!HHBBH6s4s6s4s", 1, ETH_TYPE_IP, 6, 4, 1, src, bytes([10, 0, 0, 1]), bytes(6),
+                            bytes([10, 0, 0, 2]))
+        elif kind == 1:
+            frame = dst + src + struct.pack("!H", ETH_TYPE_IP) + bytes(46)
+        else:
+            frame = dst + src + struct.pack("!H", ETH_TYPE_IPV6) + bytes(46)
+        events.append((rand.randint(1, n_datapaths), frame))
+    return events
+
+
+def legacy_handle(logger: logging.Logger, dpid: int, data: bytes):
+    pkt = packet.Packet(data)
+    eth = pkt.get_protocol(ethernet.ethernet)
+    if eth.ethertype == ETH_TYPE_IPV6:
+        return
+    if eth.ethertype == ETH_TYPE_ARP:
+        pkt.get_protocol(arp.arp)
+    logger.info("[INFO]PacketIn ether_type:%s datapath:%s mac_src:%s mac_dst:%s in_port:%d",
+                hex(eth.ethertype), dpid, eth.src, eth.dst, 1)
+
+
+def fast_handle(logger: logging.Logger, sampler: LogSampler, dpid: int, data: bytes):
+    eth = parse_ethernet(data)
+    if eth is None or eth.ethertype == ETH_TYPE_IPV6:
+        return
+    if eth.ethertype == ETH_TYPE_ARP:
+        parse_arp(data, eth)
+    count = sampler.sample(dpid)
+    if count > 0:
+        logger.info("[INFO]PacketIn ether_type:%s datapath:%s mac_src:%s mac_dst:%s in_port:%d (%d since the last log)",
+                    hex(eth.ethertype), dpid, eth.src, eth.dst, 1, count)
+
+
+def main():
+    args = parse()
+    events = synthetic_events(args.events, args.datapaths)
+
+    # log into memory, so that the cost of formatting and handling is measured without the terminal
+    logger = logging.getLogger("packet_in_benchmark")
+    logger.addHandler(logging.StreamHandler(io.StringIO()))
+    logger.setLevel(logging.INFO)
+    logger.propagate = False
+
+    def run_legacy():
+        for dpid, data in events:
+            legacy_handle(logger, dpid, data)
+
+    def run_fast():
+        sampler = LogSampler(LOG_SAMPLING)
+        for dpid, data in events:
+            fast_handle(logger, sampler, dpid, data)
+
+    legacy_sec = min(timeit.repeat(run_legacy, number=1, repeat=args.repeat))
+    fast_sec = min(timeit.repeat(run_fast, number=1, repeat=args.repeat))
+    print(f"{'':<8}{'events/s':>14}{'us/event':>10}")
+    for name, sec in [("legacy", legacy_sec), ("fast", fast_sec)]:
+        print(f"{name:<8}{len(events) / sec:>14.0f}{sec / len(events) * 10 ** 6:>10.2f}")
+    print(f"speedup: {legacy_sec / fast_sec:.1f}x")
+
+
+def parse() -> Namespace:
+    parser = ArgumentParser()
+    parser.add_argument("--events", dest="events", type=int, default=100000, help="number of PacketIn to replay")
+    parser.add_argument("--datapaths", dest="datapaths", type=int, default=100, help="number of datapaths")
+    parser.add_argument("--repeat", dest="repeat", type=int, default=3, help="number of repetitions")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    main()
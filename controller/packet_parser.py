@@ -0,0 +1,86 @@
+from __future__ import annotations
+
+import socket
+import struct
+from typing import Optional
+
+ETH_TYPE_ARP = 0x0806
+ETH_TYPE_VLAN = 0x8100
+ARP_REQUEST = 1
+ARP_REPLY = 2
+
+# destination mac, source mac, ethertype
+_ETHERNET = struct.Struct("!6s6sH")
+# hardware type, protocol type, hardware size, protocol size, opcode, sender mac, sender ip, target mac, target ip
+_ARP = struct.Struct("!HHBBH6s4s6s4s")
+_VLAN_TAG_SIZE = 4
+
+
+class EthernetHeader(object):
+    __slots__ = ("dst", "src", "ethertype", "payload_offset")
+
+    def __init__(self, dst: str, src: str, ethertype: int, payload_offset: int):
+        """
+        :param ethertype: ethertype of the payload, which is inside a VLAN tag if any
+        :param payload_offset: offset of the payload in the frame
+        """
+        self.dst = dst
+        self.src = src
+        self.ethertype = ethertype
+        self.payload_offset = payload_offset
+
+
+class ArpPacket(object):
+    __slots__ = ("opcode", "src_mac", "src_ip", "dst_mac", "dst_ip")
+
+    def __init__(self, opcode: int, src_mac: str, src_ip: str, dst_mac: str, dst_ip: str):
+        self.opcode = opcode
+        self.src_mac = src_mac
+        self.src_ip = src_ip
+        self.dst_mac = dst_mac
+        self.dst_ip = dst_ip
+
+
+def parse_ethernet(data: bytes) -> Optional[EthernetHeader]:
+    """
+    Parse only the Ethernet header of the frame without copying the rest of it.
+
+    :return: None if the frame is too short
+    """
+    if len(data) < _ETHERNET.size:
+        return None
+
+    dst, src, ethertype = _ETHERNET.unpack_from(data)
+    offset = _ETHERNET.size
+    if ethertype == ETH_TYPE_VLAN:
+        if len(data) < offset + _VLAN_TAG_SIZE:
+            return None
+        ethertype, = struct.unpack_from("!H", data, offset + 2)
+        offset += _VLAN_TAG_SIZE
+    return EthernetHeader(dst.hex(":"), src.hex(":"), ethertype, offset)
+
+
+def parse_arp(data: bytes, eth: EthernetHeader) -> Optional[ArpPacket]:
+    """
+    :return: None if the payload is not ARP of IPv4 over Ethernet
+    """
+    if eth.ethertype != ETH_TYPE_ARP or len(data) < eth.payload_offset + _ARP.size:
+        return None
+
+    hw_type, proto_type, hw_size, proto_size, opcode, src_mac, src_ip, dst_mac, dst_ip = \
+        _ARP.unpack_from(data, eth.payload_offset)
+    if hw_size != 6 or proto_size != 4:
+        return None
+    return ArpPacket(opcode, src_mac.hex(":"), socket.inet_ntoa(src_ip), dst_mac.hex(":"), socket.inet_ntoa(dst_ip))
+
+
+def build_arp_reply(req: ArpPacket, mac: str) -> bytes:
+    """
+    :param mac: mac address of the target of req
+    :return: Ethernet frame of ARP reply to req
+    """
+    src_mac = bytes.fromhex(mac.replace(":", ""))
+    dst_mac = bytes.fromhex(req.src_mac.replace(":", ""))
+    return _ETHERNET.pack(dst_mac, src_mac, ETH_TYPE_ARP) + \
+        _ARP.pack(1, 0x0800, 6, 4, ARP_REPLY, src_mac, socket.inet_aton(req.dst_ip), dst_mac,
+                  socket.inet_aton(req.src_ip))
@@ -0,0 +1,43 @@
+import struct
+import unittest
+
+from packet_parser import parse_ethernet, parse_arp, build_arp_reply, ARP_REQUEST, ARP_REPLY
+
+
+class PacketParserTest(unittest.TestCase):
+    def test_parse_arp_request(self):
+        request = bytes.fromhex("ffffffffffff" "000000000001" "0806") + \
+            bytes.fromhex("0001" "0800" "06" "04" "0001" "000000000001" "0a000001" "000000000000" "0a000002")
+
+        eth = parse_ethernet(request)
+        self.assertEqual(eth.dst, "ff:ff:ff:ff:ff:ff")
+        self.assertEqual(eth.src, "00:00:00:00:00:01")
+        self.assertEqual(eth.ethertype, 0x0806)
+
+        req = parse_arp(request, eth)
+        self.assertEqual(req.opcode, ARP_REQUEST)
+        self.assertEqual((req.src_mac, req.src_ip), ("00:00:00:00:00:01", "10.0.0.1"))
+        self.assertEqual(req.dst_ip, "10.0.0.2")
+
+        # reply goes back to the sender from the target
+        reply = build_arp_reply(req, "00:00:00:00:00:02")
+        eth = parse_ethernet(reply)
+        self.assertEqual((eth.dst, eth.src), ("00:00:00:00:00:01", "00:00:00:00:00:02"))
+        res = parse_arp(reply, eth)
+        self.assertEqual(res.opcode, ARP_REPLY)
+        self.assertEqual((res.src_mac, res.src_ip), ("00:00:00:00:00:02", "10.0.0.2"))
+        self.assertEqual((res.dst_mac, res.dst_ip), ("00:00:00:00:00:01", "10.0.0.1"))
+
+    def test_parse_ethernet_with_vlan(self):
+        frame = bytes.fromhex("000000000002" "000000000001" "8100") + struct.pack("!HH", 10, 0x0800) + bytes(20)
+        eth = parse_ethernet(frame)
+        self.assertEqual(eth.ethertype, 0x0800)
+        self.assertEqual(eth.payload_offset, 18)
+        self.assertIsNone(parse_arp(frame, eth))
+
+        self.assertIsNone(parse_ethernet(frame[:13]))
+        self.assertIsNone(parse_ethernet(frame[:16]))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,50 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import threading
+from typing import Callable, Hashable
+
+
+class ResponseCache(object):
+    """
+    JSON bodies of responses cached per generation of the model that they are built from.
+    Every mutation of the model bumps the generation, which drops all cached bodies, so a body is serialized at most
+    once per generation however often it is requested.
+    """
+
+    def __init__(self):
+        self.__generation = 0
+        # dict[key, (body, etag)] built in the current generation
+        self.__bodies: dict[Hashable, tuple[bytes, str]] = {}
+        # responses are built by wsgi threads while the model is mutated by the others
+        self.__lock = threading.Lock()
+
+    @property
+    def generation(self) -> int:
+        return self.__generation
+
+    def bump(self):
+        with self.__lock:
+            self.__generation += 1
+            self.__bodies = {}
+
+    def get(self, key: Hashable, build: Callable[[], object]) -> tuple[bytes, str]:
+        """
+        :param key: key of the response including its parameters
+        :param build: function to build the object to be encoded as JSON, which is called only if it is not cached
+        :return: (body, etag). etag is the digest of body, so it stays valid across generations and restarts.
+        """
+        with self.__lock:
+            generation = self.__generation
+            cached = self.__bodies.get(key)
+        if cached is not None:
+            return cached
+
+        body = json.dumps(build(), separators=(",", ":")).encode("utf-8")
+        cached = (body, hashlib.sha1(body).hexdigest())
+        with self.__lock:
+            # the body may be built from the model mutated meanwhile, which must not be cached for the new generation
+            if generation == self.__generation:
+                self.__bodies[key] = cached
+        return cached
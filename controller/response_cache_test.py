@@ -0,0 +1,48 @@
+import json
+import unittest
+
+from response_cache import ResponseCache
+
+
+class ResponseCacheTest(unittest.TestCase):
+    def test_get(self):
+        cache = ResponseCache()
+        builds = []
+
+        def build():
+            builds.append(cache.generation)
+            return {"generation": cache.generation}
+
+        body, etag = cache.get("a", build)
+        self.assertDictEqual(json.loads(body), {"generation": 0})
+        # cached until bumped
+        self.assertTupleEqual(cache.get("a", build), (body, etag))
+        self.assertListEqual(builds, [0])
+        cache.get("b", build)
+        self.assertListEqual(builds, [0, 0])
+
+        cache.bump()
+        new_body, new_etag = cache.get("a", build)
+        self.assertDictEqual(json.loads(new_body), {"generation": 1})
+        self.assertNotEqual(new_etag, etag)
+        self.assertListEqual(builds, [0, 0, 1])
+
+        # the same body has the same etag in any generation
+        cache.bump()
+        self.assertEqual(cache.get("c", lambda: {"generation": 1})[1], new_etag)
+
+    def test_get_while_bumped(self):
+        cache = ResponseCache()
+
+        def build():
+            cache.bump()
+            return {}
+
+        cache.get("a", build)
+        # the body built across generations is not cached
+        cache.get("a", build)
+        self.assertEqual(cache.generation, 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,15 +1,47 @@
 from __future__ import annotations
 
-from typing import Optional
+import heapq
+import math
+import time
+from typing import Optional, Union
 
-from components import Switch, Link, Path, HostServer, HostClient, DirectedLink
+import numpy as np
+from scipy import sparse
+from scipy.optimize import linprog
+
+from components import Switch, Link, Path, MultiPath, HostServer, HostClient
 from enums import RoutingAlgorithm
+from linear_program import usable_solution
+from link_arrays import LinkArrays
+from time_expanded_planner import TimeExpandedPlanner, Commodity
+
+
+# compact and picklable copy of RouteCalculator.
+# (routing_algorithm, host_pairs, switches, links, measured_bandwidths) where
+# host_pairs: tuple[(client_name, client_neighbor, fail_at_sec, datasize_gb, sent_gb, server_name, server_neighbor)]
+# switches: tuple[switch_name]
+# links: tuple[(switch1_name, switch2_name, bandwidth_mbps, fail_at_sec)]
+# measured_bandwidths: tuple[(switch1_name, switch2_name, available_bandwidth_mbps)]
+Snapshot = tuple[int, tuple[tuple[str, str, int, int, float, str, str], ...], tuple[str, ...],
+                 tuple[tuple[str, str, float, int], ...], tuple[tuple[str, str, float], ...]]
+
+# compact paths of host pairs. tuple[(client_name, tuple[switch_name on path])] for Path, and
+# tuple[(client_name, tuple[(tuple[switch_name on path], weight)])] for MultiPath
+CompactPaths = tuple[tuple[str, Union[tuple[str, ...], tuple[tuple[tuple[str, ...], float], ...]]], ...]
 
 
 class RouteCalculator(object):
     # approximate infinite cost and bandwidth
     COST_INF = 10 ** 10
     BANDWIDTH_INF = 10 ** 10
+    # max number of widest paths that one host pair takes in multipath. merged flow of them can be decomposed into
+    # more paths.
+    MAX_WIDEST_PATHS = 4
+    # bandwidth(Mbps) less than this is regarded as 0 in multipath
+    BANDWIDTH_EPS = 10 ** -6
+    # time budget of linear programming solver for optimal and time expanded as a ratio to update interval, which is
+    # shared by intervals calculated at once. greedy is used instead if no feasible solution is found in time.
+    OPTIMAL_TIME_LIMIT_RATIO = 0.5
 
     def __init__(self, routing_algorithm: RoutingAlgorithm = RoutingAlgorithm.DIJKSTRA,
                  host_pairs: list[list[HostClient, HostServer]] = None,
@@ -22,15 +54,122 @@ class RouteCalculator(object):
         else:
             self.__host_pairs = host_pairs
 
-        if switches is None:
-            self.__switches = []
-        else:
-            self.__switches = switches
+        # index of the topology graph. every lookup is O(1) or O(degree).
+        # dict[switch_name, Switch]
+        self.__switches: dict[str, Switch] = {}
+        # dict[(switch1_name, switch2_name), Link] with normalized key. see __link_key
+        self.__links: dict[tuple[str, str], Link] = {}
+        # dict[switch_name, dict[neighbor_switch_name, Link]]
+        self.__adjacency: dict[str, dict[str, Link]] = {}
+        # array-backed copy of the topology. this is built lazily and dropped when the topology changes.
+        self.__link_arrays: Optional[LinkArrays] = None
+        # available bandwidth of links measured by port stats. dict[(switch1_name, switch2_name), Mbps] with
+        # normalized key
+        self.__measured_bandwidths: dict[tuple[str, str], float] = {}
+
+        for s in switches or []:
+            self.add_switch(s)
+        for l in links or []:
+            self.add_link(l)
+
+    @staticmethod
+    def from_snapshot(snapshot: Snapshot) -> RouteCalculator:
+        routing_algorithm, host_pairs, switches, links, measured_bandwidths = snapshot
+        route_calculator = RouteCalculator(
+            RoutingAlgorithm(routing_algorithm),
+            [[HostClient(c, c_neighbor, fail_at_sec, datasize_gb, sent_gb), HostServer(s, s_neighbor)]
+             for c, c_neighbor, fail_at_sec, datasize_gb, sent_gb, s, s_neighbor in host_pairs],
+            [Switch(s) for s in switches],
+            [Link(s1, s2, bw, fail_at_sec) for s1, s2, bw, fail_at_sec in links],
+        )
+        for s1, s2, bw in measured_bandwidths:
+            route_calculator.update_measured_bandwidth(s1, s2, bw)
+        return route_calculator
+
+    def snapshot(self) -> Snapshot:
+        return (
+            self.__routing_algorithm.value,
+            tuple((c.name, c.neighbor_switch, c.fail_at_sec, c.datasize_gb, c.sent_gb, s.name, s.neighbor_switch)
+                  for c, s in self.__host_pairs),
+            tuple(self.__switches.keys()),
+            tuple((l.switch1, l.switch2, l.bandwidth_mbps, l.fail_at_sec) for l in self.__links.values()),
+            tuple((s1, s2, bw) for (s1, s2), bw in self.__measured_bandwidths.items()),
+        )
+
+    def fingerprint(self, progress_step: float = 0, bandwidth_step: float = 0) -> int:
+        """
+        :param progress_step: fraction of data size of each host pair. if positive, progress of host pairs is included
+            in steps of it, so that the fingerprint changes when a host pair has progressed by the step.
+        :param bandwidth_step: fraction of bandwidth of each link. if positive, measured bandwidth of links is included
+            in steps of it, so that the fingerprint changes when it has diverged from nominal one by the step.
+        :return: hash of everything that paths depend on. it changes when topology, failure or host pair changes, or
+            a host pair finishes. progress of host pairs and measured bandwidth are excluded unless their steps are
+            given, so that they are updated without replanning.
+        """
+        routing_algorithm, host_pairs, switches, links, _ = self.snapshot()
+        finished = tuple(c.name for c, _ in self.__host_pairs if c.is_finished())
+        key = (routing_algorithm, tuple(h[:4] + h[5:] for h in host_pairs), switches, links, finished)
+        if progress_step > 0:
+            key += (tuple(int(c.sent_gb // (c.datasize_gb * progress_step)) if c.datasize_gb > 0 else 0
+                          for c, _ in self.__host_pairs),)
+        if bandwidth_step > 0:
+            key += (tuple((k, int(bw // (self.__links[k].bandwidth_mbps * bandwidth_step)))
+                          for k, bw in sorted(self.__measured_bandwidths.items())
+                          if self.__links[k].bandwidth_mbps > 0),)
+        return hash(key)
+
+    def last_fail_at_sec(self) -> int:
+        """
+        :return: the latest fail_at_sec among links and clients. -1 if none of them has fail_at_sec.
+        """
+        fail_at_secs = [l.fail_at_sec for l in self.__links.values()] + [c.fail_at_sec for c, _ in self.__host_pairs]
+        return max(fail_at_secs, default=-1)
 
-        if links is None:
-            self.__links = []
-        else:
-            self.__links = links
+    @staticmethod
+    def compact_paths(paths: list[list[HostClient, HostServer, Union[Path, MultiPath]]]) -> CompactPaths:
+        def compact(path: Union[Path, MultiPath]):
+            if isinstance(path, MultiPath):
+                return tuple((p.switches, w) for p, w in zip(path.paths, path.weights))
+            return path.switches
+
+        return tuple((client.name, compact(path)) for client, _, path in paths)
+
+    def restore_paths(self, paths: CompactPaths) -> list[list[HostClient, HostServer, Union[Path, MultiPath]]]:
+        """
+        Restore compact paths with host pairs and links of this RouteCalculator.
+        Paths of unknown clients or crossing removed links are dropped. MultiPath keeps the rest of its paths.
+        """
+        host_pairs = {c.name: [c, s] for c, s in self.__host_pairs}
+        result: list[list[HostClient, HostServer, Union[Path, MultiPath]]] = []
+        for client, compact in paths:
+            host_pair = host_pairs.get(client)
+            if host_pair is None:
+                continue
+
+            # switch names of Path, or pairs of switch names and weight of MultiPath
+            if len(compact) == 0 or isinstance(compact[0], str):
+                path = self.__restore_path(compact)
+                if path is not None:
+                    result.append([host_pair[0], host_pair[1], path])
+                continue
+
+            restored = [(self.__restore_path(switches), w) for switches, w in compact]
+            restored = [(p, w) for p, w in restored if p is not None]
+            if len(restored) == 0:
+                continue
+            result.append([host_pair[0], host_pair[1],
+                           MultiPath([p for p, _ in restored], [w for _, w in restored])])
+
+        return result
+
+    def __restore_path(self, switches: tuple[str, ...]) -> Optional[Path]:
+        """
+        :return: None if the path crosses a removed link
+        """
+        links = [self.__find_link_by_switches(switches[i], switches[i + 1]) for i in range(len(switches) - 1)]
+        if any(l is None for l in links):
+            return None
+        return Path.from_switches(list(switches), links)
 
     @property
     def host_pairs(self) -> list[list[HostClient, HostServer]]:
@@ -53,6 +192,25 @@ class RouteCalculator(object):
         self.__host_pairs.pop(index)
         self.add_host_pairs(client, server)
 
+    def update_sent_gb(self, client: str, sent_gb: float) -> bool:
+        """
+        :param sent_gb: size(GB) of data that the server has received from the client
+        :return: True if sent_gb of the client has changed
+        """
+        index = self.__find_host_pair_by_client(client)
+        if index is None or self.__host_pairs[index][0].sent_gb == sent_gb:
+            return False
+        self.__host_pairs[index][0].sent_gb = sent_gb
+        return True
+
+    def __active_host_pairs(self, clients: Optional[set[str]], elapsed_sec: float) \
+            -> list[list[HostClient, HostServer]]:
+        """
+        :return: host pairs of clients that have neither sent all data nor failed. all clients if clients is None.
+        """
+        return [[c, s] for c, s in self.__host_pairs
+                if (clients is None or c.name in clients) and not c.is_finished() and not c.is_failed(elapsed_sec)]
+
     def __find_host_pair_by_client(self, client: str) -> Optional[int]:
         for i in range(len(self.host_pairs)):
             host_pair = self.host_pairs[i]
@@ -61,29 +219,43 @@ class RouteCalculator(object):
 
     @property
     def switches(self) -> list[Switch]:
-        return self.__switches
+        return list(self.__switches.values())
+
+    @property
+    def link_arrays(self) -> LinkArrays:
+        if self.__link_arrays is None:
+            self.__link_arrays = LinkArrays(list(self.__switches.keys()), list(self.__links.values()))
+        return self.__link_arrays
 
     def add_switch(self, switch: Switch):
-        self.__switches.append(switch)
+        self.__link_arrays = None
+        self.__switches[switch.name] = switch
+        self.__adjacency.setdefault(switch.name, {})
 
     def rm_switch(self, switch: str):
         switch = self.__find_switch(switch)
         if switch is None:
             return
 
-        self.__switches.remove(switch)
-        links = self.__find_links_by_switch(switch)
-        for l in links:
+        for l in self.__find_links_by_switch(switch):
             self.rm_link(l.switch1, l.switch2)
+        self.__link_arrays = None
+        self.__switches.pop(switch.name)
+        self.__adjacency.pop(switch.name, None)
 
     @property
     def links(self) -> list[Link]:
-        return self.__links
+        return list(self.__links.values())
 
     def add_link(self, link: Link):
-        found = self.__find_link_by_switches(link.switch1, link.switch2)
-        if found is None:
-            self.__links.append(link)
+        key = self.__link_key(link.switch1, link.switch2)
+        if key in self.__links:
+            return
+
+        self.__link_arrays = None
+        self.__links[key] = link
+        self.__adjacency.setdefault(link.switch1, {})[link.switch2] = link
+        self.__adjacency.setdefault(link.switch2, {})[link.switch1] = link
 
     def register_link_fail_time(self, switch1: str, switch2: str, fail_at_sec: int):
         link = self.__find_link_by_switches(switch1, switch2)
@@ -93,68 +265,170 @@ class RouteCalculator(object):
         self.rm_link(switch1, switch2)
         self.add_link(link)
 
-    def rm_link(self, switch1: str, switch2: str):
-        link = self.__find_link_by_switches(switch1, switch2)
+    def update_measured_bandwidth(self, switch1: str, switch2: str, available_bandwidth_mbps: float):
+        """
+        Register bandwidth of the link that is not used by traffic other than host pairs. takahira method, multipath,
+        optimal and the current interval of time expanded don't use more bandwidth than this.
+        """
+        key = self.__link_key(switch1, switch2)
+        if key in self.__links:
+            self.__measured_bandwidths[key] = available_bandwidth_mbps
+
+    def rm_link(self, switch1: str, switch2: str) -> Optional[Link]:
+        """
+        :return: removed link. None if there is no link between the switches.
+        """
+        self.__measured_bandwidths.pop(self.__link_key(switch1, switch2), None)
+        link = self.__links.pop(self.__link_key(switch1, switch2), None)
         if link is None:
-            return
-        self.__links.remove(link)
+            return None
+
+        self.__link_arrays = None
+        self.__adjacency[link.switch1].pop(link.switch2, None)
+        self.__adjacency[link.switch2].pop(link.switch1, None)
+        return link
+
+    def calc_shortest_path(self, nth_update: int = 0, update_interval_sec: int = 0,
+                           clients: Optional[set[str]] = None,
+                           fixed_paths: Optional[list[Union[Path, MultiPath]]] = None) \
+            -> list[list[HostClient, HostServer, Union[Path, MultiPath]]]:
+        """
+        :param clients: names of clients whose paths are calculated. if None, paths of all host pairs are calculated.
+        :param fixed_paths: paths of the other host pairs that are kept as they are.
+            bandwidth used by them is not available for takahira method and multipath.
+        :return: Path of each host pair, or MultiPath for multipath. host pairs that have sent all data or whose
+            client has failed are not included.
+        """
+        host_pairs = self.__active_host_pairs(clients, nth_update * update_interval_sec)
 
-    def calc_shortest_path(self, nth_update: int = 0, update_interval_sec: int = 0) \
-            -> list[list[HostClient, HostServer, Path]]:
         if self.__routing_algorithm == RoutingAlgorithm.DIJKSTRA:
-            return self.__calc_dijkstra()
+            return self.__calc_dijkstra(host_pairs)
 
         if self.__routing_algorithm == RoutingAlgorithm.TAKAHIRA:
-            return self.__calc_takahira(nth_update, update_interval_sec)
+            return self.__calc_takahira(host_pairs, nth_update, update_interval_sec, fixed_paths or [])
+
+        if self.__routing_algorithm == RoutingAlgorithm.MULTIPATH:
+            return self.__calc_multipath(host_pairs, nth_update, update_interval_sec, fixed_paths or [])
+
+        if self.__routing_algorithm == RoutingAlgorithm.OPTIMAL:
+            return self.__calc_optimal(host_pairs, nth_update, update_interval_sec, fixed_paths or [],
+                                       self.OPTIMAL_TIME_LIMIT_RATIO * update_interval_sec)
+
+        if self.__routing_algorithm == RoutingAlgorithm.TIME_EXPANDED:
+            # paths of this interval taking account of the rest of the disaster window
+            last_nth_update = max(self.last_fail_at_sec() // max(update_interval_sec, 1) + 1, nth_update)
+            return self.__calc_time_expanded(host_pairs, nth_update, last_nth_update, update_interval_sec,
+                                             fixed_paths or [])[0]
 
         raise ValueError(f"Routing algorithm is invalid: {self.__routing_algorithm}")
 
-    # TODO: fix to use host_pair instead of src and dst
-    def __calc_dijkstra(self) -> list[list[HostClient, HostServer, Path]]:
+    def calc_route_plan(self, first_nth_update: int, last_nth_update: int, update_interval_sec: int) \
+            -> list[list[list[HostClient, HostServer, Union[Path, MultiPath]]]]:
         """
-        Calculate the shortest path from src to dst by dijkstra.
+        Calculate paths of all host pairs in each interval from first_nth_update to last_nth_update.
+        Time expanded plans all intervals at once, and the other algorithms calculate each interval independently.
+        Optimal and time expanded take one time budget of the solver for all intervals.
+
+        :return: paths of each interval in order
+        """
+        if self.__routing_algorithm == RoutingAlgorithm.TIME_EXPANDED:
+            return self.__calc_time_expanded(self.__active_host_pairs(None, first_nth_update * update_interval_sec),
+                                             first_nth_update, last_nth_update, update_interval_sec, [])
+
+        if self.__routing_algorithm == RoutingAlgorithm.OPTIMAL:
+            # each interval takes an equal share of the time left, so that time left by fast intervals is carried over
+            deadline = time.perf_counter() + self.OPTIMAL_TIME_LIMIT_RATIO * update_interval_sec
+            plan: list[list[list[HostClient, HostServer, Union[Path, MultiPath]]]] = []
+            for n in range(first_nth_update, last_nth_update + 1):
+                time_limit_sec = max(deadline - time.perf_counter(), 0) / (last_nth_update + 1 - n)
+                plan.append(self.__calc_optimal(self.__active_host_pairs(None, n * update_interval_sec), n,
+                                                update_interval_sec, [], time_limit_sec))
+            return plan
+
+        return [self.calc_shortest_path(n, update_interval_sec) for n in range(first_nth_update, last_nth_update + 1)]
+
+    def __calc_dijkstra(self, host_pairs: list[list[HostClient, HostServer]]) \
+            -> list[list[HostClient, HostServer, Path]]:
+        """
+        Calculate the shortest path of each host pair by dijkstra.
+        Host pairs whose clients are connected to the same switch share one shortest path tree.
 
         :return:
-        Path:shortest path from src to dst
-        """
-        link_to_switch: dict[Switch, Link] = {}
-        fixed_switches = [self.__src]
-        costs = {self.__src: 0}
-        for s in self.__switches:
-            if s != self.__src:
-                costs[s] = self.COST_INF
-
-        # update neighbors of last fixed switch
-        while self.__dst not in fixed_switches:
-            last_fixed_switch = fixed_switches[-1]
-            for neighbor in self.__neighbors(last_fixed_switch):
-                # don't update fixed_neighbor
-                if neighbor in fixed_switches:
-                    continue
+        list[list[HostClient, HostServer, Path]]: shortest path from client to server of each host pair
+        """
+        trees: dict[str, dict[str, Link]] = {}
+        result: list[list[HostClient, HostServer, Path]] = []
+        for [client, server] in host_pairs:
+            src = client.neighbor_switch
+            if src not in trees:
+                trees[src] = self.calc_shortest_path_tree(src)
 
-                # update cost if it's less than current
-                link_to_neighbor = self.__find_link_by_switches(last_fixed_switch.name, neighbor.name)
-                if costs[last_fixed_switch] + link_to_neighbor.cost() < costs[neighbor]:
-                    costs[neighbor] = costs[last_fixed_switch] + link_to_neighbor.cost()
-                    link_to_switch[neighbor] = link_to_neighbor
+            path = self.__path_from_tree(trees[src], src, server.neighbor_switch)
+            result.append([client, server, Path() if path is None else path])
 
-            cost_of_not_fixed_switches = dict(filter(lambda x: x[0] not in fixed_switches, costs.items()))
-            next_fixed_switch = min(cost_of_not_fixed_switches.items(), key=lambda x: x[1])[0]
-            fixed_switches.append(next_fixed_switch)
+        return result
 
-        path = Path()
-        switch = self.__dst
-        while switch != self.__src:
-            if link_to_switch.get(switch) is None:
-                return
+    def calc_shortest_path_tree(self, src: str) -> dict[str, Link]:
+        """
+        Calculate the shortest paths from src to all reachable switches by dijkstra with binary heap.
 
-            path.push(link_to_switch[switch])
-            switch = self.__find_opposite_switch(link_to_switch[switch], switch)
+        :param src: name of root switch
+        :return:
+        dict[str, Link]: link toward src of each reachable switch except src. this is predecessor tree rooted at src.
+        """
+        link_to_switch: dict[str, Link] = {}
+        costs: dict[str, float] = {src: 0}
+        fixed_switches: set[str] = set()
+
+        # entries are (cost, sequence, switch_name). sequence keeps the order stable among the same cost.
+        sequence = 0
+        heap = [(0, sequence, src)]
+        while len(heap) > 0:
+            cost, _, switch = heapq.heappop(heap)
+            # skip stale entry whose cost has been already improved
+            if switch in fixed_switches:
+                continue
+            fixed_switches.add(switch)
+
+            for neighbor, link in self.__adjacency.get(switch, {}).items():
+                if neighbor in fixed_switches:
+                    continue
+
+                new_cost = cost + link.cost
+                if new_cost < costs.get(neighbor, self.COST_INF):
+                    costs[neighbor] = new_cost
+                    link_to_switch[neighbor] = link
+                    sequence += 1
+                    heapq.heappush(heap, (new_cost, sequence, neighbor))
 
-        return path
+        return link_to_switch
+
+    @staticmethod
+    def __path_from_tree(link_to_switch: dict[str, Link], src: str, dst: str) -> Optional[Path]:
+        """
+        Trace predecessor tree back from dst to src.
 
-    # TODO: implement
-    def __calc_takahira(self, nth_update: int, update_interval_sec: int) \
+        :return:
+        Path: path directed from src to dst. None if dst is unreachable.
+        """
+        switches: list[str] = [dst]
+        links: list[Link] = []
+        switch = dst
+        while switch != src:
+            link = link_to_switch.get(switch)
+            if link is None:
+                return None
+
+            switch = link.switch1 if link.switch2 == switch else link.switch2
+            switches.append(switch)
+            links.append(link)
+
+        switches.reverse()
+        links.reverse()
+        return Path.from_switches(switches, links)
+
+    def __calc_takahira(self, host_pairs: list[list[HostClient, HostServer]], nth_update: int,
+                        update_interval_sec: int, fixed_paths: list[Union[Path, MultiPath]]) \
             -> list[list[HostClient, HostServer, Path]]:
         """
         Calculate the path from src to dst by takahira method taking into account effect by disaster and amount of
@@ -163,123 +437,508 @@ class RouteCalculator(object):
         :return:
         Path:efficient path from src to dst with consideration for disaster and data size
         """
+        arrays = self.link_arrays
+        # expected bandwidth of each link in this interval, indexed by link of arrays
+        expected_bw_gbps = self.__available_bandwidths(arrays, nth_update, update_interval_sec, fixed_paths)
+
+        # assign path to each host pair greedily in descending order of requested bandwidth
+        requested_bandwidths = self.__sort_by_requested_bandwidth(host_pairs, nth_update * update_interval_sec)
+        result: list[list[HostClient, HostServer, Path]] = []
+        for [client, server, req_bw] in requested_bandwidths:
+            path = self.__calc_widest_path(arrays, expected_bw_gbps.tolist(), client.neighbor_switch,
+                                           server.neighbor_switch)
+            result.append([client, server, path])
+            self.__subtract_bandwidth(arrays, expected_bw_gbps, path)
+
+        return result
+
+    def __available_bandwidths(self, arrays: LinkArrays, nth_update: int, update_interval_sec: int,
+                               fixed_paths: list[Union[Path, MultiPath]]) -> np.ndarray:
+        """
+        :return: expected bandwidth of each link in the interval, which is limited by measured bandwidth, except
+            bandwidth used by fixed paths. indexed by link of arrays
+        """
         if nth_update < 0:
             raise ValueError(f"nth_update must be greater than 0, got {nth_update}")
         if update_interval_sec < 1:
             raise ValueError(f"update_interval_sec must be greater than 0, got {update_interval_sec}")
 
-        elapsed_sec = nth_update * update_interval_sec
-        next_elapsed_sec = elapsed_sec + update_interval_sec
-
-        # dict[switch1_name, dict[switch2_name, bw]]
-        expected_bw_gbps: dict[str, dict[str, float]] = {s.name: {} for s in self.__switches}
-        # dict[switch1_name, dict[switch2_name, Link]]
-        switch_to_link: dict[str, dict[str, Link]] = {s.name: {} for s in self.__switches}
-        # calculate expected bandwidths between each connected switches.
-        for l in self.__links:
-            if l.fail_at_sec == -1 or next_elapsed_sec <= l.fail_at_sec:
-                ope_ratio = 1
-            elif elapsed_sec <= l.fail_at_sec < next_elapsed_sec:
-                ope_ratio = (l.fail_at_sec - elapsed_sec) / update_interval_sec
-            else:
-                ope_ratio = 0
-
-            expected_bw = ope_ratio * l.bandwidth_mbps
-            expected_bw_gbps[l.switch1][l.switch2] = expected_bw
-            expected_bw_gbps[l.switch2][l.switch1] = expected_bw
-            switch_to_link[l.switch1][l.switch2] = l
-            switch_to_link[l.switch2][l.switch1] = l
-
-        # calculate requested bw of each host pair
-        requested_bandwidths: list[list[HostClient, HostServer, float]] = []
-        for [client, server] in self.__host_pairs:
-            # TODO: consider whether client and server have already failed
-            requested_bandwidths.append([client, server, client.datasize_gb / client.fail_at_sec])
-
-        # sort order by bw desc
-        requested_bandwidths.sort(key=lambda x: x[2], reverse=True)
-
-        # assign path to each host pair greedily
-        result: list[list[HostClient, HostServer, Path]] = []
+        bandwidths = arrays.expected_bandwidths(nth_update, update_interval_sec)
+        if len(self.__measured_bandwidths) > 0:
+            links = [self.__links[k] for k in self.__measured_bandwidths.keys()]
+            indices = arrays.link_indices(links)
+            bandwidths[indices] = np.minimum(bandwidths[indices], list(self.__measured_bandwidths.values()))
+        for path in fixed_paths:
+            self.__subtract_bandwidth(arrays, bandwidths, path)
+        return bandwidths
+
+    @staticmethod
+    def __subtract_bandwidth(arrays: LinkArrays, bandwidths: np.ndarray, path: Union[Path, MultiPath]):
+        """
+        Subtract bottleneck bandwidth of path, or weight of each path of MultiPath, from each link on it in place.
+        Links that have been removed after path was calculated are skipped.
+        """
+        if isinstance(path, MultiPath):
+            for p, w in zip(path.paths, path.weights):
+                bandwidths[arrays.link_indices(list(p.hops))] -= w
+            return
+
+        bandwidths[arrays.link_indices(list(path.hops))] -= path.bottleneck_bw_gbps()
+
+    def __calc_widest_path(self, arrays: LinkArrays, bandwidths: list[float], src: str, dst: str) -> Path:
+        """
+        Calculate the path from src to dst that has maximum bottleneck bandwidth.
+        Links whose bandwidth is not positive are still available as they are better than no path.
+
+        :param bandwidths: bandwidth of each link indexed by link of arrays
+        :return:
+        Path: widest path directed from src to dst. empty if src equals dst or dst is unreachable.
+        """
+        src_index = arrays.switch_index(src)
+        dst_index = arrays.switch_index(dst)
+        if src_index is None or dst_index is None:
+            return Path()
+
+        link_to_switch = self.__calc_widest_tree(arrays, bandwidths, src_index, dst_index)
+        tree = {arrays.switches[i]: arrays.links[l] for i, l in enumerate(link_to_switch) if l is not None}
+        path = self.__path_from_tree(tree, src, dst)
+        return Path() if path is None else path
+
+    def __calc_widest_tree(self, arrays: LinkArrays, bandwidths: list[float], src_index: int, dst_index: int,
+                           min_bandwidth: float = -math.inf) -> list[Optional[int]]:
+        """
+        Calculate widest paths from src toward dst by dijkstra with max-heap. search stops when dst is reached.
+
+        :param min_bandwidth: links whose bandwidth is less than or equal to this are not available
+        :return: index of link toward src of each switch indexed by switch. None for src and unreached switches.
+        """
+        adjacency = arrays.adjacency
+        link_to_switch: list[Optional[int]] = [None] * len(adjacency)
+        widths: list[float] = [-self.BANDWIDTH_INF] * len(adjacency)
+        widths[src_index] = self.BANDWIDTH_INF
+        fixed_switches: list[bool] = [False] * len(adjacency)
+
+        # entries are (-width, sequence, switch_index) because heapq is min-heap.
+        sequence = 0
+        heap = [(-self.BANDWIDTH_INF, sequence, src_index)]
+        while len(heap) > 0:
+            negative_width, _, switch = heapq.heappop(heap)
+            if fixed_switches[switch]:
+                continue
+            fixed_switches[switch] = True
+            if switch == dst_index:
+                break
+
+            for neighbor, link in adjacency[switch]:
+                if fixed_switches[neighbor] or bandwidths[link] <= min_bandwidth:
+                    continue
+
+                width = min(-negative_width, bandwidths[link])
+                if width > widths[neighbor]:
+                    widths[neighbor] = width
+                    link_to_switch[neighbor] = link
+                    sequence += 1
+                    heapq.heappush(heap, (-width, sequence, neighbor))
+
+        return link_to_switch
+
+    def __calc_multipath(self, host_pairs: list[list[HostClient, HostServer]], nth_update: int,
+                         update_interval_sec: int, fixed_paths: list[Union[Path, MultiPath]]) \
+            -> list[list[HostClient, HostServer, MultiPath]]:
+        """
+        Split each host pair into paths so that it can use more bandwidth than any single path.
+        Host pairs are assigned greedily in the same order as takahira method, and each of them takes successive
+        widest paths on the remaining bandwidth until its requested bandwidth is satisfied.
+
+        :return:
+        list[list[HostClient, HostServer, MultiPath]]: paths of each host pair weighted by assigned bandwidth
+        """
+        arrays = self.link_arrays
+        bandwidths = self.__available_bandwidths(arrays, nth_update, update_interval_sec, fixed_paths)
+
+        requested_bandwidths = self.__sort_by_requested_bandwidth(host_pairs, nth_update * update_interval_sec)
+        result: list[list[HostClient, HostServer, MultiPath]] = []
         for [client, server, req_bw] in requested_bandwidths:
-            # bandwidths all between each two switches. dict[switch1_name, dict[switch2_name, bw]]
-            bandwidths: dict[str, dict[str, float]] = {s.name: {} for s in self.__switches}
-
-            # path between each switch pair that has maximum bottleneck bw
-            paths: dict[str, dict[str, Path]] = {s.name: {} for s in self.__switches}
-
-            for s1 in self.__switches:
-                for s2 in self.__switches:
-                    bw = self.BANDWIDTH_INF if s1 == s2 else -self.BANDWIDTH_INF
-                    bandwidths[s1.name][s2.name] = bw
-                    bandwidths[s2.name][s1.name] = bw
-                    paths[s1.name][s2.name] = Path()
-
-            for s1, v in expected_bw_gbps.items():
-                for s2, exp_bw in v.items():
-                    bandwidths[s1][s2] = exp_bw
-                    bandwidths[s2][s1] = exp_bw
-
-            for s1, v in switch_to_link.items():
-                for s2, link in v.items():
-                    paths[s1][s2] = Path([DirectedLink.from_link(link, s1, s2)])
-                    paths[s2][s1] = Path([DirectedLink.from_link(link, s2, s1)])
-
-            # calc maximum bottleneck bw and its path of each switch pair by Algorithm like Floyd-Warshall
-            for s1 in self.__switches:
-                for s2 in self.__switches:
-                    for s3 in self.__switches:
-                        bw_direct = bandwidths[s1.name][s3.name]
-                        bw_via_s2 = min(bandwidths[s1.name][s2.name], bandwidths[s2.name][s3.name])
-                        if bw_direct < bw_via_s2:
-                            bandwidths[s1.name][s3.name] = bw_via_s2
-                            bandwidths[s3.name][s1.name] = bw_via_s2
-                            paths[s1.name][s3.name] = Path.merge(paths[s1.name][s2.name], paths[s2.name][s3.name])
-                            paths[s3.name][s1.name] = Path.merge(paths[s3.name][s2.name], paths[s2.name][s1.name])
-
-            path = paths[client.neighbor_switch][server.neighbor_switch]
-            result.append([client, server, path])
+            src_index = arrays.switch_index(client.neighbor_switch)
+            dst_index = arrays.switch_index(server.neighbor_switch)
+            if src_index is None or dst_index is None or src_index == dst_index:
+                result.append([client, server, MultiPath()])
+                continue
 
-            # subtract assigned bw from each link on path
-            bottleneck = path.bottleneck_bw_gbps()
-            for l in path.links:
-                expected_bw_gbps[l.switch1][l.switch2] = expected_bw_gbps[l.switch1][l.switch2] - bottleneck
-                expected_bw_gbps[l.switch2][l.switch1] = expected_bw_gbps[l.switch2][l.switch1] - bottleneck
+            multipath = self.__calc_multipath_of_pair(arrays, bandwidths.tolist(), src_index, dst_index, req_bw)
+            if multipath.len == 0:
+                multipath = self.__calc_unassigned_path(arrays, bandwidths, client, server)
+
+            result.append([client, server, multipath])
+            self.__subtract_bandwidth(arrays, bandwidths, multipath)
 
         return result
 
-    def __neighbors(self, switch: Switch) -> list[Switch]:
-        links = filter(lambda x: switch.name in [x.switch1, x.switch2], self.__links)
-        neighbors = map(lambda x: self.__find_opposite_switch(x, switch), links)
-        return list(filter(lambda x: x is not None, neighbors))
+    def __calc_unassigned_path(self, arrays: LinkArrays, bandwidths: np.ndarray, client: HostClient,
+                               server: HostServer) -> MultiPath:
+        """
+        :return: the widest path without assigned bandwidth for host pair that gets no bandwidth.
+            all paths are full, but the widest one is better than no path.
+        """
+        path = self.__calc_widest_path(arrays, bandwidths.tolist(), client.neighbor_switch, server.neighbor_switch)
+        return MultiPath() if path.len == 0 else MultiPath([path], [0])
 
-    def __find_switch(self, name: str) -> Optional[Switch]:
-        result = list(filter(lambda x: x.name == name, self.__switches))
-        if len(result) == 0:
-            return
+    def __calc_optimal(self, host_pairs: list[list[HostClient, HostServer]], nth_update: int,
+                       update_interval_sec: int, fixed_paths: list[Union[Path, MultiPath]], time_limit_sec: float) \
+            -> list[list[HostClient, HostServer, Union[Path, MultiPath]]]:
+        """
+        Calculate paths of all host pairs at once by multi-commodity flow that maximizes data sent in the interval
+        before each client fails. it is solved as linear programming:
+
+        maximize    sum_k t_k * x_k - eps * sum_k sum_a f_ka
+        subject to  sum of f_ka out of switch - sum of f_ka into switch = x_k at src, -x_k at dst, 0 otherwise
+                    sum_k (f_k(u->v) + f_k(v->u)) <= expected bandwidth of link (u, v)
+                    0 <= x_k <= requested bandwidth of k, 0 <= f_ka
+
+        where x_k is bandwidth of host pair k, f_ka is its flow on directed link a, and t_k is the ratio of time
+        that client of k is alive in the interval. eps keeps flows from taking detours.
+        If the solver stops at time_limit_sec, the best feasible solution found so far is used. If it has found none,
+        paths are calculated greedily by takahira method.
+
+        :return:
+        list[list[HostClient, HostServer, MultiPath]]: paths of each host pair weighted by assigned bandwidth, or
+            list[list[HostClient, HostServer, Path]] by takahira method
+        """
+        arrays = self.link_arrays
+        bandwidths = self.__available_bandwidths(arrays, nth_update, update_interval_sec, fixed_paths)
+
+        elapsed_sec = nth_update * update_interval_sec
+        # host pairs that can send data in this interval. list[(index in host_pairs, src, dst, t_k, requested)]
+        commodities: list[tuple[int, int, int, float, float]] = []
+        for i, [client, server] in enumerate(host_pairs):
+            src_index = arrays.switch_index(client.neighbor_switch)
+            dst_index = arrays.switch_index(server.neighbor_switch)
+            alive_ratio = 1 if client.fail_at_sec < 0 else \
+                min(max((client.fail_at_sec - elapsed_sec) / update_interval_sec, 0), 1)
+            if src_index is not None and dst_index is not None and src_index != dst_index and alive_ratio > 0:
+                commodities.append((i, src_index, dst_index, alive_ratio,
+                                    self.__requested_bandwidth_mbps(client, elapsed_sec)))
+
+        flows = self.__solve_multi_commodity_flow(arrays, np.maximum(bandwidths, 0), commodities, time_limit_sec)
+        if flows is None:
+            return self.__calc_takahira(host_pairs, nth_update, update_interval_sec, fixed_paths)
+
+        # dict[index in host_pairs, MultiPath]
+        multipaths: dict[int, MultiPath] = {}
+        endpoints = arrays.endpoints.tolist()
+        for (i, src_index, dst_index, _, _), f in zip(commodities, flows):
+            flow: dict[int, dict[int, float]] = {}
+            link_between: dict[tuple[int, int], int] = {}
+            # flows of the host pair in opposite directions on a link cancel each other
+            for link in np.flatnonzero(np.abs(f) > self.BANDWIDTH_EPS).tolist():
+                bw = float(f[link])
+                u, v = endpoints[link] if bw > 0 else reversed(endpoints[link])
+                self.__add_flow(flow, u, v, abs(bw))
+                link_between[(u, v)] = link
+            multipaths[i] = self.__decompose_flow(arrays, flow, link_between, src_index, dst_index)
+
+        result: list[list[HostClient, HostServer, MultiPath]] = []
+        for i, [client, server] in enumerate(host_pairs):
+            multipath = multipaths.get(i)
+            if multipath is None or multipath.len == 0:
+                multipath = self.__calc_unassigned_path(arrays, bandwidths, client, server)
+            result.append([client, server, multipath])
+
+        return result
 
-        return result[0]
+    def __solve_multi_commodity_flow(self, arrays: LinkArrays, bandwidths: np.ndarray,
+                                     commodities: list[tuple[int, int, int, float, float]], time_limit_sec: float) \
+            -> Optional[list[np.ndarray]]:
+        """
+        :param commodities: list[(index of host pair, src switch index, dst switch index, t_k, requested bandwidth)]
+        :return: net flow of each commodity on each link from switch1 to switch2, which is negative for the opposite
+            direction. None if no feasible solution is found in time.
+        """
+        if len(commodities) == 0:
+            return []
+
+        n_switches = len(arrays.switches)
+        n_links = len(arrays.links)
+        n_arcs = 2 * n_links
+        n_commodities = len(commodities)
+        # variables are f_ka of all commodities in order, and then x_k. arc a < n_links goes from switch1 to switch2
+        # of link a, and arc n_links + a goes in the opposite direction.
+        n_variables = n_commodities * n_arcs + n_commodities
+        tails = np.concatenate([arrays.endpoints[:, 0], arrays.endpoints[:, 1]])
+        heads = np.concatenate([arrays.endpoints[:, 1], arrays.endpoints[:, 0]])
+        arcs = np.arange(n_arcs)
+
+        # flow conservation. row k * n_switches + switch.
+        rows, cols, values = [], [], []
+        for k, (_, src_index, dst_index, _, _) in enumerate(commodities):
+            row = k * n_switches
+            rows += [row + tails, row + heads, [row + src_index, row + dst_index]]
+            cols += [k * n_arcs + arcs, k * n_arcs + arcs, [n_commodities * n_arcs + k] * 2]
+            values += [np.ones(n_arcs), -np.ones(n_arcs), [-1, 1]]
+        a_eq = sparse.csr_matrix((np.concatenate(values), (np.concatenate(rows), np.concatenate(cols))),
+                                 shape=(n_commodities * n_switches, n_variables))
+
+        # capacity of each link shared by both directions
+        link_of_arc = np.concatenate([np.arange(n_links), np.arange(n_links)])
+        a_ub = sparse.csr_matrix(
+            (np.ones(n_commodities * n_arcs),
+             (np.tile(link_of_arc, n_commodities), np.arange(n_commodities * n_arcs))),
+            shape=(n_links, n_variables))
+
+        alive_ratios = np.array([c[3] for c in commodities])
+        # detour of any simple path costs less than sending data by it
+        eps = alive_ratios.min() / (2 * max(n_switches, 1))
+        cost = np.concatenate([np.full(n_commodities * n_arcs, eps), -alive_ratios])
+
+        bounds = np.zeros((n_variables, 2))
+        bounds[:, 1] = np.inf
+        bounds[n_commodities * n_arcs:, 1] = [c[4] for c in commodities]
+
+        b_eq = np.zeros(a_eq.shape[0])
+        res = linprog(cost, A_ub=a_ub, b_ub=bandwidths, A_eq=a_eq, b_eq=b_eq, bounds=bounds, method="highs",
+                      options={"time_limit": time_limit_sec})
+        x = usable_solution(res, a_ub, bandwidths, a_eq, b_eq, bounds[:, 1])
+        if x is None:
+            return None
+
+        return [x[k * n_arcs:k * n_arcs + n_links] - x[k * n_arcs + n_links:(k + 1) * n_arcs]
+                for k in range(n_commodities)]
+
+    def __calc_time_expanded(self, host_pairs: list[list[HostClient, HostServer]], first_nth_update: int,
+                             last_nth_update: int, update_interval_sec: int,
+                             fixed_paths: list[Union[Path, MultiPath]]) \
+            -> list[list[list[HostClient, HostServer, MultiPath]]]:
+        """
+        Plan paths of host pairs over intervals from first_nth_update to last_nth_update so as to maximize data sent
+        before clients fail, which can send data early over links that will fail. see TimeExpandedPlanner.
+        If the planner finds no feasible schedule within its time budget, each interval is calculated by multipath.
+
+        :param fixed_paths: paths of the other host pairs in the first interval
+        :return: paths of each host pair weighted by assigned bandwidth in each interval
+        """
+        arrays = self.link_arrays
+        nth_updates = list(range(first_nth_update, last_nth_update + 1))
+        bandwidths = arrays.expected_bandwidths(np.array(nth_updates), update_interval_sec)
+        bandwidths[0] = self.__available_bandwidths(arrays, first_nth_update, update_interval_sec, fixed_paths)
+
+        # dict[index in host_pairs, index in commodities]
+        commodity_indices: dict[int, int] = {}
+        commodities: list[Commodity] = []
+        for i, [client, server] in enumerate(host_pairs):
+            src_index = arrays.switch_index(client.neighbor_switch)
+            dst_index = arrays.switch_index(server.neighbor_switch)
+            if src_index is not None and dst_index is not None and src_index != dst_index:
+                commodity_indices[i] = len(commodities)
+                commodities.append((src_index, dst_index, client.fail_at_sec, client.remaining_gb))
+
+        planner = TimeExpandedPlanner(arrays, update_interval_sec, self.OPTIMAL_TIME_LIMIT_RATIO * update_interval_sec)
+        plan = planner.plan(commodities, first_nth_update, np.maximum(bandwidths, 0))
+        if plan is None:
+            return [self.__calc_multipath(host_pairs, n, update_interval_sec, fixed_paths if t == 0 else [])
+                    for t, n in enumerate(nth_updates)]
+
+        result: list[list[list[HostClient, HostServer, MultiPath]]] = []
+        for t in range(len(nth_updates)):
+            paths: list[list[HostClient, HostServer, MultiPath]] = []
+            for i, [client, server] in enumerate(host_pairs):
+                k = commodity_indices.get(i)
+                multipath = MultiPath()
+                if k is not None:
+                    # candidate paths of the host pair can cross each other
+                    flow: dict[int, dict[int, float]] = {}
+                    link_between: dict[tuple[int, int], int] = {}
+                    for switches, links, bw in plan[t][k]:
+                        for u, v, l in zip(switches, switches[1:], links):
+                            self.__merge_flow(flow, u, v, bw)
+                            link_between[(u, v)] = l
+                    multipath = self.__decompose_flow(arrays, flow, link_between, commodities[k][0],
+                                                      commodities[k][1])
+                if multipath.len == 0:
+                    multipath = self.__calc_unassigned_path(arrays, bandwidths[t], client, server)
+                paths.append([client, server, multipath])
+            result.append(paths)
+
+        return result
+
+    def __sort_by_requested_bandwidth(self, host_pairs: list[list[HostClient, HostServer]], elapsed_sec: float) \
+            -> list[list[HostClient, HostServer, float]]:
+        """
+        :return: host pairs with their requested bandwidth in descending order of it. host pairs whose requested
+            bandwidth is unknown come last, so that they take the rest of bandwidth.
+        """
+        requested_bandwidths = [[client, server, self.__requested_bandwidth_mbps(client, elapsed_sec)]
+                                for client, server in host_pairs]
+        requested_bandwidths.sort(key=lambda x: -1 if math.isinf(x[2]) else x[2], reverse=True)
+        return requested_bandwidths
+
+    @staticmethod
+    def __requested_bandwidth_mbps(client: HostClient, elapsed_sec: float) -> float:
+        """
+        :return: bandwidth to send the rest of data before the client fails. inf if datasize or fail_at_sec is
+            unknown, or the client has already failed.
+        """
+        remaining_sec = client.fail_at_sec - elapsed_sec
+        if client.fail_at_sec < 0 or remaining_sec <= 0 or client.datasize_gb < 0:
+            return math.inf
+        return client.remaining_gb * 8 * 1000 / remaining_sec
+
+    def __calc_multipath_of_pair(self, arrays: LinkArrays, bandwidths: list[float], src_index: int,
+                                 dst_index: int, req_bw: float) -> MultiPath:
+        """
+        Find up to MAX_WIDEST_PATHS successive widest paths with positive bandwidth, and merge them into flow.
+        Flows in opposite directions on a link and directed cycles are cancelled, so the flow is decomposed into
+        paths whose union has no directed cycle.
+
+        :param bandwidths: bandwidth of each link indexed by link of arrays. this is updated in place.
+        :return: empty if there is no path with positive bandwidth
+        """
+        endpoints = arrays.endpoints.tolist()
+        # flow on each directed link. dict[from switch index, dict[to switch index, bandwidth]]
+        flow: dict[int, dict[int, float]] = {}
+        # dict[(from switch index, to switch index), index of link]
+        link_between: dict[tuple[int, int], int] = {}
+        assigned_bw = 0
+        for _ in range(self.MAX_WIDEST_PATHS):
+            if req_bw - assigned_bw <= self.BANDWIDTH_EPS:
+                break
+
+            link_to_switch = self.__calc_widest_tree(arrays, bandwidths, src_index, dst_index, self.BANDWIDTH_EPS)
+            if link_to_switch[dst_index] is None:
+                break
+
+            # trace back from dst to src
+            hops: list[tuple[int, int, int]] = []
+            switch = dst_index
+            while switch != src_index:
+                link = link_to_switch[switch]
+                s1, s2 = endpoints[link]
+                prev = s1 if s2 == switch else s2
+                hops.append((prev, switch, link))
+                switch = prev
+
+            width = min(min(bandwidths[l] for _, _, l in hops), req_bw - assigned_bw)
+            for u, v, l in hops:
+                link_between[(u, v)] = l
+                # the link gets back bandwidth of flows cancelled in both directions
+                bandwidths[l] += 2 * self.__merge_flow(flow, u, v, width) - width
+            assigned_bw += width
+
+        return self.__decompose_flow(arrays, flow, link_between, src_index, dst_index)
+
+    def __decompose_flow(self, arrays: LinkArrays, flow: dict[int, dict[int, float]],
+                         link_between: dict[tuple[int, int], int], src_index: int, dst_index: int) -> MultiPath:
+        """
+        Cancel directed cycles of flow from src to dst, and decompose it into paths. flow is consumed.
+
+        :param flow: flow on each directed link. dict[from switch index, dict[to switch index, bandwidth]]
+        :param link_between: index of link of each directed link in flow. dict[(from, to), index of link]
+        :return: paths weighted by their bandwidth, whose union has no directed cycle
+        """
+        cycle = self.__find_cycle(flow)
+        while cycle is not None:
+            edges = list(zip(cycle, cycle[1:] + cycle[:1]))
+            cancelled = min(flow[u][v] for u, v in edges)
+            for u, v in edges:
+                self.__add_flow(flow, u, v, -cancelled)
+            cycle = self.__find_cycle(flow)
+
+        # decompose flow into paths from src to dst. each walk reaches dst as flow has no cycle.
+        paths: list[Path] = []
+        weights: list[float] = []
+        while len(flow.get(src_index, {})) > 0:
+            switches = [src_index]
+            while switches[-1] != dst_index and len(flow.get(switches[-1], {})) > 0:
+                out = flow[switches[-1]]
+                switches.append(max(out, key=out.get))
+            if switches[-1] != dst_index:
+                break
+
+            edges = list(zip(switches, switches[1:]))
+            width = min(flow[u][v] for u, v in edges)
+            for u, v in edges:
+                self.__add_flow(flow, u, v, -width)
+            paths.append(Path.from_switches([arrays.switches[i] for i in switches],
+                                            [arrays.links[link_between[e]] for e in edges]))
+            weights.append(width)
+
+        return MultiPath(paths, weights)
+
+    def __merge_flow(self, flow: dict[int, dict[int, float]], u: int, v: int, bandwidth: float) -> float:
+        """
+        Add bandwidth to flow from u to v cancelling flow in the opposite direction.
+
+        :return: cancelled bandwidth
+        """
+        cancelled = min(flow.get(v, {}).get(u, 0), bandwidth)
+        if cancelled > 0:
+            self.__add_flow(flow, v, u, -cancelled)
+        self.__add_flow(flow, u, v, bandwidth - cancelled)
+        return cancelled
+
+    def __add_flow(self, flow: dict[int, dict[int, float]], u: int, v: int, bandwidth: float):
+        """
+        Add bandwidth to flow from u to v. flow that becomes 0 is removed.
+        """
+        out = flow.setdefault(u, {})
+        out[v] = out.get(v, 0) + bandwidth
+        if out[v] <= self.BANDWIDTH_EPS:
+            out.pop(v)
+            if len(out) == 0:
+                flow.pop(u)
+
+    @staticmethod
+    def __find_cycle(flow: dict[int, dict[int, float]]) -> Optional[list[int]]:
+        """
+        Find a directed cycle of flow by depth first search.
+
+        :return: switch indices on the cycle in order. None if flow has no cycle.
+        """
+        # 1: on the current search path, 2: searched
+        states: dict[int, int] = {}
+        for root in flow.keys():
+            if root in states:
+                continue
+
+            states[root] = 1
+            search_path = [root]
+            stack = [iter(flow[root])]
+            while len(stack) > 0:
+                v = next(stack[-1], None)
+                if v is None:
+                    states[search_path.pop()] = 2
+                    stack.pop()
+                    continue
+
+                state = states.get(v)
+                if state == 1:
+                    return search_path[search_path.index(v):]
+                if state is None:
+                    states[v] = 1
+                    search_path.append(v)
+                    stack.append(iter(flow.get(v, {})))
+
+        return None
+
+    def __find_switch(self, name: str) -> Optional[Switch]:
+        return self.__switches.get(name)
 
     # return link between the two switches
     def __find_link_by_switches(self, switch1: str, switch2: str) -> Optional[Link]:
-        switches = [switch1, switch2]
-        result = list(filter(lambda x: x.switch1 in switches and x.switch2 in switches, self.__links))
-        if len(result) == 0:
-            return
-
-        return result[0]
+        return self.__links.get(self.__link_key(switch1, switch2))
 
     # return links connected to the switch
     def __find_links_by_switch(self, switch: Switch) -> list[Link]:
-        return list(filter(lambda x: x.switch1 == switch.name or x.switch2 == switch.name, self.__links))
+        return list(self.__adjacency.get(switch.name, {}).values())
 
-    def __find_opposite_switch(self, link: Link, switch: Switch) -> Optional[Switch]:
-        if switch.name != link.switch1:
-            return self.__find_switch(link.switch1)
-        else:
-            return self.__find_switch(link.switch2)
+    @staticmethod
+    def __link_key(switch1: str, switch2: str) -> tuple[str, str]:
+        # links are undirected, so (s1, s2) and (s2, s1) share the same key
+        return (switch1, switch2) if switch1 <= switch2 else (switch2, switch1)
 
     def reset(self):
         self.__host_pairs = []
-        self.__switches = []
-        self.__links = []
+        self.__switches = {}
+        self.__links = {}
+        self.__adjacency = {}
+        self.__link_arrays = None
+        self.__measured_bandwidths = {}
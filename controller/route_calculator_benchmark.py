@@ -0,0 +1,253 @@
+"""
+Benchmark of RouteCalculator across topology sizes. This runs without Ryu and Mininet.
+Topologies are grids built in the same layout as DisasterResistantNetworkTopo.build, and results are written as JSON
+so that they can be compared between commits. Besides calculation time, data delivered by the paths before each
+client fails is compared between routing algorithms.
+
+usage: python route_calculator_benchmark.py [--sizes 3 5 10 ...] [--pairs N] [--output FILE] [--baseline FILE]
+"""
+from __future__ import annotations
+
+import json
+import random
+import statistics
+import subprocess
+import sys
+import time
+import tracemalloc
+from argparse import ArgumentParser, Namespace
+from typing import Optional, Union
+
+import numpy as np
+from scipy.optimize import linprog
+
+from components import Switch, Link, Path, MultiPath, HostClient, HostServer
+from enums import RoutingAlgorithm
+from route_calculator import RouteCalculator
+
+UPDATE_INTERVAL_SEC = 30
+BW_MIN_MBPS = 500
+BW_MAX_MBPS = 1000
+
+# same as experiment. (datasize_gb, fail_at_sec)
+CLIENTS = [(20, 300), (50, 450), (100, 600)]
+LINK_FAIL_MIN_SEC = 60
+LINK_FAIL_MAX_SEC = 600
+# ratio of links that fail in random-failure variant
+LINK_FAIL_RATIO = 0.25
+
+VARIANTS = ["uniform", "random-bandwidth", "random-failure"]
+
+
+def build_topology(size: int, variant: str, seed: int, n_host_pairs: int = len(CLIENTS)) \
+        -> tuple[list[Switch], list[Link], list[list[HostClient, HostServer]]]:
+    """
+    Build grid topology in the same layout as DisasterResistantNetworkTopo.build.
+    Host pairs more than those of the topology are placed at random switches.
+
+    h3s --- s1 --- s2 --- s3 --- h1c
+             |     |      |
+    h1s --- s4 --- s5 --- s6 --- h2c
+             |     |      |
+    h2s --- s7 --- s8 --- s9 --- h3c
+    """
+    rand = random.Random(seed)
+
+    def bandwidth() -> int:
+        return BW_MAX_MBPS if variant == "uniform" else rand.randint(BW_MIN_MBPS, BW_MAX_MBPS)
+
+    def fail_at_sec() -> int:
+        if variant != "random-failure" or rand.random() >= LINK_FAIL_RATIO:
+            return -1
+        return rand.randint(LINK_FAIL_MIN_SEC, LINK_FAIL_MAX_SEC)
+
+    switches = [Switch(f"s{size * i + j + 1}") for i in range(size) for j in range(size)]
+    links = []
+    for i in range(size):
+        for j in range(size):
+            switch = switches[size * i + j]
+            if j != size - 1:
+                links.append(Link(switch.name, switches[size * i + j + 1].name, bandwidth(), fail_at_sec()))
+            if i != size - 1:
+                links.append(Link(switch.name, switches[size * (i + 1) + j].name, bandwidth(), fail_at_sec()))
+
+    neighbors = [
+        (switches[size - 1], switches[size]),
+        (switches[size * (size // 2 + 1) - 1], switches[size * (size - 1)]),
+        (switches[size * size - 1], switches[0]),
+    ]
+    host_pairs = []
+    for i, ((client, server), (datasize_gb, client_fail_at_sec)) in enumerate(zip(neighbors, CLIENTS)):
+        host_pairs.append([HostClient(f"h{i + 1}c", client.name, client_fail_at_sec, datasize_gb),
+                           HostServer(f"h{i + 1}s", server.name)])
+    for i in range(len(host_pairs), n_host_pairs):
+        client, server = rand.sample(switches, 2)
+        datasize_gb, client_fail_at_sec = rand.choice(CLIENTS)
+        host_pairs.append([HostClient(f"h{i + 1}c", client.name, client_fail_at_sec, datasize_gb),
+                           HostServer(f"h{i + 1}s", server.name)])
+
+    return switches, links, host_pairs[:n_host_pairs]
+
+
+def run(size: int, variant: str, algorithm: RoutingAlgorithm, seed: int, n_host_pairs: int) -> dict:
+    switches, links, host_pairs = build_topology(size, variant, seed, n_host_pairs)
+    last_fail_at_sec = max([l.fail_at_sec for l in links] + [c.fail_at_sec for c, _ in host_pairs])
+    nth_updates = range(last_fail_at_sec // UPDATE_INTERVAL_SEC + 1)
+
+    # data that each client has not sent yet. dict[client_name, Mbit]
+    remaining_mbit = {c.name: c.datasize_gb * 8 * 1000 for c, _ in host_pairs}
+
+    def send(n: int, paths: list[list[HostClient, HostServer, Union[Path, MultiPath]]]):
+        for client, sent_mbit in deliver(route_calculator, paths, n, remaining_mbit).items():
+            remaining_mbit[client] -= sent_mbit
+            # progress measured by flow stats in the controller
+            route_calculator.update_sent_gb(client, next(c.datasize_gb for c, _ in host_pairs if c.name == client) -
+                                            remaining_mbit[client] / 8 / 1000)
+
+    # time each interval without tracemalloc, which slows down calculation
+    route_calculator = RouteCalculator(algorithm, host_pairs, switches, links)
+    if algorithm == RoutingAlgorithm.TIME_EXPANDED:
+        # all intervals are planned at once, and they share the time equally
+        started_at = time.perf_counter()
+        plan = route_calculator.calc_route_plan(nth_updates[0], nth_updates[-1], UPDATE_INTERVAL_SEC)
+        times_sec = [(time.perf_counter() - started_at) / len(plan)] * len(plan)
+        for n, paths in zip(nth_updates, plan):
+            send(n, paths)
+    else:
+        times_sec = []
+        for n in nth_updates:
+            started_at = time.perf_counter()
+            paths = route_calculator.calc_shortest_path(n, UPDATE_INTERVAL_SEC)
+            times_sec.append(time.perf_counter() - started_at)
+            send(n, paths)
+
+    # peak memory of the first interval including building internal index of RouteCalculator
+    for c, _ in host_pairs:
+        c.sent_gb = 0
+    route_calculator = RouteCalculator(algorithm, host_pairs, switches, links)
+    tracemalloc.start()
+    route_calculator.calc_shortest_path(0, UPDATE_INTERVAL_SEC)
+    _, peak_bytes = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {
+        "size": size,
+        "variant": variant,
+        "host_pairs": len(host_pairs),
+        "algorithm": algorithm.name,
+        "switches": len(switches),
+        "links": len(links),
+        "intervals": len(times_sec),
+        "mean_sec": statistics.mean(times_sec),
+        "median_sec": statistics.median(times_sec),
+        "max_sec": max(times_sec),
+        "total_sec": sum(times_sec),
+        "peak_memory_bytes": peak_bytes,
+        "requested_gb": sum(c.datasize_gb for c, _ in host_pairs),
+        "delivered_gb": sum(c.datasize_gb - remaining_mbit[c.name] / 8 / 1000 for c, _ in host_pairs),
+    }
+
+
+def deliver(route_calculator: RouteCalculator, paths: list[list[HostClient, HostServer, Union[Path, MultiPath]]],
+            nth_update: int, remaining_mbit: dict[str, float]) -> dict[str, float]:
+    """
+    Send as much data as paths allow in the interval until each client fails.
+    Each host pair sends at one rate split over its paths by their weights, and rates of all host pairs are chosen to
+    maximize data sent within expected bandwidth of links, which is the best that the paths can achieve.
+
+    :return: data(Mbit) sent by each client. dict[client_name, Mbit]
+    """
+    arrays = route_calculator.link_arrays
+    elapsed_sec = nth_update * UPDATE_INTERVAL_SEC
+
+    # list[(client_name, alive_sec, weighted paths)]
+    senders: list[tuple[str, float, list[tuple[Path, float]]]] = []
+    for client, _, path in paths:
+        alive_sec = UPDATE_INTERVAL_SEC if client.fail_at_sec < 0 else \
+            min(max(client.fail_at_sec - elapsed_sec, 0), UPDATE_INTERVAL_SEC)
+        weighted_paths = list(zip(path.paths, path.weights)) if isinstance(path, MultiPath) else [(path, 1)]
+        if alive_sec > 0 and remaining_mbit[client.name] > 0 and any(p.len > 0 for p, _ in weighted_paths):
+            senders.append((client.name, alive_sec, weighted_paths))
+    if len(senders) == 0:
+        return {}
+
+    # share of traffic of each host pair on each link. shape is (len(links), len(senders))
+    shares = np.zeros((len(arrays.links), len(senders)))
+    for k, (_, _, weighted_paths) in enumerate(senders):
+        total = sum(w for _, w in weighted_paths)
+        for p, w in weighted_paths:
+            shares[arrays.link_indices(list(p.hops)), k] += w / total if total > 0 else 1 / len(weighted_paths)
+
+    alive_sec = np.array([s[1] for s in senders])
+    max_rates = [remaining_mbit[s[0]] / s[1] for s in senders]
+    capacities = np.maximum(arrays.expected_bandwidths(nth_update, UPDATE_INTERVAL_SEC), 0)
+    res = linprog(-alive_sec, A_ub=shares, b_ub=capacities, bounds=[(0, r) for r in max_rates], method="highs")
+    if res.status != 0:
+        # sending nothing is always feasible, so this is a failure of the solver, which must not abort the run
+        print(f"warning: no data is delivered in {nth_update}th interval, because solver failed: {res.message}",
+              file=sys.stderr)
+        return {}
+    return {s[0]: rate * s[1] for s, rate in zip(senders, res.x)}
+
+
+def commit() -> Optional[str]:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def key(result: dict) -> tuple[int, str, str, int]:
+    return result["size"], result["variant"], result["algorithm"], result.get("host_pairs", len(CLIENTS))
+
+
+def main():
+    args = parse()
+    algorithms = [RoutingAlgorithm[a.upper()] for a in args.algorithms]
+
+    baseline: dict[tuple[int, str, str, int], dict] = {}
+    if args.baseline is not None:
+        with open(args.baseline) as f:
+            baseline = {key(r): r for r in json.load(f)["results"]}
+
+    print(f"{'size':>5} {'variant':<17}{'algorithm':<14}{'mean[ms]':>10}{'max[ms]':>10}{'peak[KiB]':>11}"
+          f"{'sent[GB]':>10}{'vs base':>9}")
+    results = []
+    for size in args.sizes:
+        for variant in args.variants:
+            for algorithm in algorithms:
+                r = run(size, variant, algorithm, args.seed, args.pairs)
+                results.append(r)
+
+                base = baseline.get(key(r))
+                ratio = f"{r['mean_sec'] / base['mean_sec']:>8.2f}x" if base is not None else f"{'-':>9}"
+                print(f"{size:>5} {variant:<17}{algorithm.name:<14}{r['mean_sec'] * 1000:>10.2f}"
+                      f"{r['max_sec'] * 1000:>10.2f}{r['peak_memory_bytes'] / 1024:>11.1f}"
+                      f"{r['delivered_gb']:>10.1f}{ratio}")
+
+    with open(args.output, "w") as f:
+        json.dump({"commit": commit(), "seed": args.seed, "update_interval_sec": UPDATE_INTERVAL_SEC,
+                   "results": results}, f, indent=2)
+
+
+def parse() -> Namespace:
+    parser = ArgumentParser()
+    parser.add_argument("--sizes", dest="sizes", nargs="+", type=int, default=[3, 5, 10, 20, 50, 100],
+                        help="sizes of grid topology")
+    parser.add_argument("--variants", dest="variants", nargs="+", type=str, default=VARIANTS, choices=VARIANTS,
+                        help="variants of bandwidth and failure of links")
+    parser.add_argument("--algorithms", dest="algorithms", nargs="+", type=str,
+                        default=[a.name.lower() for a in RoutingAlgorithm], help="routing algorithms")
+    parser.add_argument("--pairs", dest="pairs", type=int, default=len(CLIENTS),
+                        help="number of host pairs. pairs other than those of the topology are placed at random")
+    parser.add_argument("--seed", dest="seed", type=int, default=0, help="seed of random bandwidth and failure")
+    parser.add_argument("--output", dest="output", type=str, default="route_calculator_benchmark.json",
+                        help="file to write results as JSON")
+    parser.add_argument("--baseline", dest="baseline", type=str, default=None,
+                        help="results of another commit to compare with")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,29 +1,34 @@
+import random
 import unittest
+from unittest.mock import patch
 
-from components import HostClient, HostServer, Path, DirectedLink
+from components import HostClient, HostServer, Path, DirectedLink, MultiPath
 from enums import RoutingAlgorithm
 from route_calculator import RouteCalculator, Switch, Link
 
 
-# FIXME: follow RouteCalculator implementation
 class RouteCalculatorTest(unittest.TestCase):
-    @unittest.skip('not implement')
-    def test_calc_shortest_path_simple_topology(self):
+    def test_calc_dijkstra_with_simple_topology(self):
         """
-        n1(src) --1-- n2(dst)
+        h1-s --- s1 --1-- s2 --- h1-c
         """
-        src = Switch("n1")
-        dst = Switch("n2")
-        links = [Link(src.name, dst.name, 1)]
-
-        router = RouteCalculator([src, dst], links, src, dst)
-        path = router.calc_shortest_path()
+        client = HostClient('h1-c', 's2')
+        server = HostServer('h1-s', 's1')
+        link = Link('s1', 's2', 1)
+        router = RouteCalculator(
+            routing_algorithm=RoutingAlgorithm.DIJKSTRA,
+            host_pairs=[[client, server]],
+            switches=[Switch('s1'), Switch('s2')],
+            links=[link]
+        )
+        paths = router.calc_shortest_path()
 
-        self.assertIsNotNone(path)
-        self.assertListEqual(path.links, links)
+        self.assertEqual(len(paths), 1)
+        self.assertEqual(paths[0][0], client)
+        self.assertEqual(paths[0][1], server)
+        self.assertListEqual(paths[0][2].links, [DirectedLink.from_link(link, 's2', 's1')])
 
-    @unittest.skip('not implement')
-    def test_calc_shortest_path_complex_topology(self):
+    def test_calc_dijkstra_with_complex_topology(self):
         """
         n01 --2-- n02 --3-- n03 --1-- n04
          |      /  |      /  |      /  |
@@ -76,27 +81,54 @@ class RouteCalculatorTest(unittest.TestCase):
             Link("n15", "n16", 4),
         ]
 
-        router = RouteCalculator(switches, links, Switch("n13"), Switch("n4"))
-        path = router.calc_shortest_path()
-        self.assertIsNotNone(path)
-        self.assertListEqual(path.links, [
-            links[21],
-            links[13],
-            links[6],
-            links[5],
-        ])
+        # both pairs share the shortest path tree rooted at n13
+        host_pairs = [
+            [HostClient('h1-c', 'n13'), HostServer('h1-s', 'n4')],
+            [HostClient('h2-c', 'n13'), HostServer('h2-s', 'n16')],
+        ]
+        router = RouteCalculator(RoutingAlgorithm.DIJKSTRA, host_pairs, switches, links)
+        paths = router.calc_shortest_path()
 
-        router.set_dst(Switch("n16"))
-        path = router.calc_shortest_path()
-        self.assertIsNotNone(path)
-        self.assertListEqual(path.links, [
-            links[21],
-            links[22],
-            links[26],
-            links[25],
-            links[29],
+        self.assertEqual(len(paths), 2)
+        self.assertListEqual(paths[0][2].links, [
+            DirectedLink.from_link(links[30], 'n13', 'n14'),
+            DirectedLink.from_link(links[24], 'n14', 'n10'),
+            DirectedLink.from_link(links[20], 'n10', 'n9'),
+            DirectedLink.from_link(links[13], 'n9', 'n6'),
+            DirectedLink.from_link(links[12], 'n6', 'n7'),
+            DirectedLink.from_link(links[8], 'n7', 'n4'),
+        ])
+        self.assertListEqual(paths[1][2].links, [
+            DirectedLink.from_link(links[30], 'n13', 'n14'),
+            DirectedLink.from_link(links[31], 'n14', 'n15'),
+            DirectedLink.from_link(links[32], 'n15', 'n16'),
         ])
 
+        # predecessor tree can be reused to trace path to any switch
+        tree = router.calc_shortest_path_tree('n13')
+        self.assertEqual(len(tree), 15)
+        self.assertEqual(tree['n16'], links[32])
+
+    def test_topology_index(self):
+        """
+        s1 --1-- s2 --2-- s3
+        """
+        links = [Link('s1', 's2', 1), Link('s2', 's3', 2)]
+        router = RouteCalculator(switches=[Switch('s1'), Switch('s2'), Switch('s3')], links=links)
+
+        # duplicated link is ignored regardless of direction
+        router.add_link(Link('s2', 's1', 10))
+        self.assertListEqual(router.links, links)
+
+        # link whose fail time is registered is moved to the tail
+        router.register_link_fail_time('s2', 's1', 100)
+        self.assertListEqual(router.links, [links[1], links[0]])
+        self.assertEqual(router.links[1].fail_at_sec, 100)
+
+        router.rm_switch('s2')
+        self.assertListEqual(router.switches, [Switch('s1'), Switch('s3')])
+        self.assertListEqual(router.links, [])
+
     def test_calc_takahira_with_simple_topology(self):
         """
         h1-s --- s1 --1-- s2 --- h1-c
@@ -273,6 +305,433 @@ class RouteCalculatorTest(unittest.TestCase):
             DirectedLink.from_link(links[1], 's3', 's1'),
         ])
 
+    def test_calc_takahira_considering_progress(self):
+        """
+        h1-s --- s1 --100-- s2 --- h2-c
+                 |          |
+                 1          10
+                 |          |
+        h2-s --- s3 --100-- s4 --- h1-c
+        """
+        host_pairs = [
+            [HostClient('h1-c', 's4', 1000, 20), HostServer('h1-s', 's1')],
+            [HostClient('h2-c', 's2', 1000, 100), HostServer('h2-s', 's3')],
+            [HostClient('h3-c', 's2', 1000, 50), HostServer('h3-s', 's1')],
+        ]
+        router = RouteCalculator(
+            routing_algorithm=RoutingAlgorithm.TAKAHIRA,
+            host_pairs=host_pairs,
+            switches=[Switch('s1'), Switch('s2'), Switch('s3'), Switch('s4')],
+            links=[
+                Link('s1', 's2', 100, 1000),
+                Link('s1', 's3', 1, 1000),
+                Link('s2', 's4', 10, 1000),
+                Link('s3', 's4', 100, 1000),
+            ]
+        )
+        fingerprint = router.fingerprint()
+
+        # h2 pair has sent most of its data, so h1 pair is preferred, and h3 pair that has sent all drops out
+        router.update_sent_gb('h2-c', 95)
+        router.update_sent_gb('h3-c', 50)
+        paths = router.calc_shortest_path(0, 30)
+        self.assertListEqual([p[0] for p in paths], [host_pairs[0][0], host_pairs[1][0]])
+        self.assertNotEqual(router.fingerprint(), fingerprint)
+
+        # progress alone doesn't change fingerprint
+        fingerprint = router.fingerprint()
+        router.update_sent_gb('h2-c', 96)
+        self.assertEqual(router.fingerprint(), fingerprint)
+
+        # unless it is counted in steps of 10% of data size, and progress within a step doesn't change it either
+        fingerprint = router.fingerprint(progress_step=0.1)
+        router.update_sent_gb('h2-c', 99)
+        self.assertEqual(router.fingerprint(progress_step=0.1), fingerprint)
+        router.update_sent_gb('h1-c', 2)
+        self.assertNotEqual(router.fingerprint(progress_step=0.1), fingerprint)
+
+        # all clients have failed
+        self.assertListEqual(router.calc_shortest_path(34, 30), [])
+
+    def test_calc_takahira_with_measured_bandwidth(self):
+        """
+        h1-s --- s1 --100-- s2 --- h1-c
+                 |          |
+                 1          10
+                 |          |
+                 s3 --100-- s4
+        """
+        host_pairs = [[HostClient('h1-c', 's2', 1000, 20), HostServer('h1-s', 's3')]]
+        links = [
+            Link('s1', 's2', 100, 1000),
+            Link('s1', 's3', 1, 1000),
+            Link('s2', 's4', 10, 1000),
+            Link('s3', 's4', 100, 1000),
+        ]
+        router = RouteCalculator(
+            routing_algorithm=RoutingAlgorithm.TAKAHIRA,
+            host_pairs=host_pairs,
+            switches=[Switch('s1'), Switch('s2'), Switch('s3'), Switch('s4')],
+            links=links
+        )
+        fingerprint = router.fingerprint()
+        nominal = router.fingerprint(bandwidth_step=0.1)
+
+        # most of s2-s4 is used by other traffic
+        router.update_measured_bandwidth('s4', 's2', 0.5)
+        self.assertEqual(router.fingerprint(), fingerprint)
+        # unless it is counted in steps of 10% of bandwidth, and a change within a step doesn't change it either
+        self.assertNotEqual(router.fingerprint(bandwidth_step=0.1), nominal)
+        fingerprint = router.fingerprint(bandwidth_step=0.1)
+        router.update_measured_bandwidth('s4', 's2', 0.8)
+        self.assertEqual(router.fingerprint(bandwidth_step=0.1), fingerprint)
+        router.update_measured_bandwidth('s4', 's2', 0.5)
+        copied = RouteCalculator.from_snapshot(router.snapshot())
+        self.assertEqual(copied.snapshot(), router.snapshot())
+
+        paths = copied.calc_shortest_path(0, 30)
+        self.assertTupleEqual(paths[0][2].switches, ('s2', 's1', 's3'))
+
+    def test_calc_takahira_for_some_clients(self):
+        """
+        h1-s --- s1 --100-- s2 --- h2-c
+                 |          |
+                 1          10
+                 |          |
+        h2-s --- s3 --100-- s4 --- h1-c
+        """
+        host_pairs = [
+            [HostClient('h1-c', 's4', 1000, 20), HostServer('h1-s', 's1')],
+            [HostClient('h2-c', 's2', 500, 20), HostServer('h2-s', 's3')],
+        ]
+        links = [
+            Link('s1', 's2', 100, 1000),
+            Link('s1', 's3', 1, 1000),
+            Link('s2', 's4', 10, 1000),
+            Link('s3', 's4', 100, 1000),
+        ]
+        router = RouteCalculator(
+            routing_algorithm=RoutingAlgorithm.TAKAHIRA,
+            host_pairs=host_pairs,
+            switches=[Switch('s1'), Switch('s2'), Switch('s3'), Switch('s4')],
+            links=links
+        )
+        paths = router.calc_shortest_path(0, 30)
+
+        # Link(s2-s4) on path for h2 pair fails, and only h2 pair is rerouted keeping path for h1 pair
+        self.assertEqual(router.rm_link('s4', 's2'), links[2])
+        self.assertIsNone(router.rm_link('s4', 's2'))
+        paths = router.calc_shortest_path(0, 30, {'h2-c'}, [paths[1][2]])
+
+        self.assertEqual(len(paths), 1)
+        self.assertEqual(paths[0][0], host_pairs[1][0])
+        self.assertListEqual(paths[0][2].links, [
+            DirectedLink.from_link(links[0], 's2', 's1'),
+            DirectedLink.from_link(links[1], 's1', 's3'),
+        ])
+
+    def test_snapshot(self):
+        """
+        h1-s --- s1 --100-- s2 --- h2-c
+                 |          |
+                 1          10
+                 |          |
+        h2-s --- s3 --100-- s4 --- h1-c
+        """
+        host_pairs = [
+            [HostClient('h1-c', 's4', 1000, 20), HostServer('h1-s', 's1')],
+            [HostClient('h2-c', 's2', 500, 20), HostServer('h2-s', 's3')],
+        ]
+        links = [
+            Link('s1', 's2', 100, 1000),
+            Link('s1', 's3', 1, 1000),
+            Link('s2', 's4', 10, 1000),
+            Link('s3', 's4', 100, 100),
+        ]
+        router = RouteCalculator(
+            routing_algorithm=RoutingAlgorithm.TAKAHIRA,
+            host_pairs=host_pairs,
+            switches=[Switch('s1'), Switch('s2'), Switch('s3'), Switch('s4')],
+            links=links
+        )
+
+        # paths calculated by the copy are restored with host pairs and links of the original
+        copied = RouteCalculator.from_snapshot(router.snapshot())
+        self.assertEqual(copied.snapshot(), router.snapshot())
+        compact_paths = RouteCalculator.compact_paths(copied.calc_shortest_path(0, 30))
+        paths = router.restore_paths(compact_paths)
+        self.assertListEqual(paths, router.calc_shortest_path(0, 30))
+        self.assertIs(paths[0][0], host_pairs[1][0])
+        self.assertIs(paths[0][2].hops[0], links[2])
+
+        # path crossing removed link is dropped
+        router.rm_link('s1', 's3')
+        self.assertListEqual([p[0] for p in router.restore_paths(compact_paths)], [host_pairs[1][0]])
+
+    def test_calc_takahira_equals_floyd_warshall_on_random_grids(self):
+        """
+        Widest path chosen on each greedy step must be as wide as the one found by the former Floyd-Warshall like
+        algorithm on the same remaining bandwidths.
+        """
+        for seed in range(30):
+            rand = random.Random(seed)
+            size = rand.randint(3, 6)
+            switches, links, host_pairs = self.__random_grid(rand, size)
+            router = RouteCalculator(RoutingAlgorithm.TAKAHIRA, host_pairs, switches, links)
+
+            nth_update = rand.randint(0, 10)
+            update_interval_sec = 30
+            paths = router.calc_shortest_path(nth_update, update_interval_sec)
+
+            bandwidths = self.__expected_bandwidths(switches, links, nth_update, update_interval_sec)
+            # clients that have already failed drop out, and the rest are ranked by bandwidth for the remaining time
+            elapsed_sec = nth_update * update_interval_sec
+            requested = sorted([h for h in host_pairs if h[0].fail_at_sec > elapsed_sec],
+                               key=lambda x: x[0].datasize_gb * 8 * 1000 / (x[0].fail_at_sec - elapsed_sec),
+                               reverse=True)
+            self.assertListEqual([p[0] for p in paths], [h[0] for h in requested])
+            for [client, server, path] in paths:
+                expected = self.__widest_bandwidth_by_floyd_warshall(
+                    switches, bandwidths, client.neighbor_switch, server.neighbor_switch)
+
+                # path must be connected from client to server
+                switch = client.neighbor_switch
+                for l in path.links:
+                    self.assertEqual(l.switch1, switch)
+                    switch = l.switch2
+                self.assertEqual(switch, server.neighbor_switch)
+
+                actual = min([bandwidths[l.switch1][l.switch2] for l in path.links])
+                self.assertEqual(actual, expected, f"seed={seed} client={client.name}")
+
+                bottleneck = path.bottleneck_bw_gbps()
+                for l in path.links:
+                    bandwidths[l.switch1][l.switch2] -= bottleneck
+                    bandwidths[l.switch2][l.switch1] -= bottleneck
+
+    def test_calc_multipath_with_simple_topology(self):
+        """
+        h1-s --- s1 --100-- s2 --- h1-c
+                 |          |
+                100        100
+                 |          |
+                 s3 --100-- s4 --- h2-c
+        """
+        host_pairs = [
+            # requests 1600Mbps, which is more than the topology has
+            [HostClient('h1-c', 's2', 100, 20), HostServer('h1-s', 's1')],
+        ]
+        links = [
+            Link('s1', 's2', 100, 1000),
+            Link('s1', 's3', 100, 1000),
+            Link('s2', 's4', 100, 1000),
+            Link('s3', 's4', 100, 1000),
+        ]
+        router = RouteCalculator(
+            routing_algorithm=RoutingAlgorithm.MULTIPATH,
+            host_pairs=host_pairs,
+            switches=[Switch('s1'), Switch('s2'), Switch('s3'), Switch('s4')],
+            links=links
+        )
+        paths = router.calc_shortest_path(0, 30)
+
+        self.assertEqual(len(paths), 1)
+        multipath: MultiPath = paths[0][2]
+        self.assertDictEqual(dict(zip([p.switches for p in multipath.paths], multipath.weights)), {
+            ('s2', 's1'): 100,
+            ('s2', 's4', 's3', 's1'): 100,
+        })
+
+        # only requested bandwidth(150Mbps) is assigned, and the rest is left for h2 pair
+        router.update_host_client('h1-c', 160, 3)
+        router.add_host_pairs(HostClient('h2-c', 's4', 100, 1), HostServer('h2-s', 's1'))
+        paths = router.calc_shortest_path(0, 30)
+        self.assertListEqual([p[0].name for p in paths], ['h1-c', 'h2-c'])
+        self.assertAlmostEqual(paths[0][2].bandwidth_mbps(), 150)
+        self.assertAlmostEqual(paths[1][2].bandwidth_mbps(), 50)
+
+        # compact paths keep weights
+        compact_paths = RouteCalculator.compact_paths(paths)
+        self.assertListEqual(router.restore_paths(compact_paths), paths)
+
+    def test_calc_multipath_on_random_grids(self):
+        """
+        Paths of each host pair must have no directed cycle as a whole, and assigned bandwidth must not exceed
+        expected bandwidth of any link.
+        """
+        for seed in range(30):
+            rand = random.Random(seed)
+            switches, links, host_pairs = self.__random_grid(rand, rand.randint(3, 6))
+            router = RouteCalculator(RoutingAlgorithm.MULTIPATH, host_pairs, switches, links)
+            paths = router.calc_shortest_path(0, 30)
+
+            bandwidths = self.__expected_bandwidths(switches, links, 0, 30)
+            for [client, server, multipath] in paths:
+                self.assertLessEqual(multipath.bandwidth_mbps(),
+                                     client.datasize_gb * 8 * 1000 / client.fail_at_sec + 10 ** -6)
+
+                # dict[switch_name, set[next switch_name]]
+                next_switches: dict[str, set[str]] = {}
+                for p, w in zip(multipath.paths, multipath.weights):
+                    self.assertEqual(p.switches[0], client.neighbor_switch)
+                    self.assertEqual(p.switches[-1], server.neighbor_switch)
+                    for l in p.links:
+                        next_switches.setdefault(l.switch1, set()).add(l.switch2)
+                        if w > 0:
+                            bandwidths[l.switch1][l.switch2] -= w
+                            bandwidths[l.switch2][l.switch1] -= w
+                            self.assertGreater(bandwidths[l.switch1][l.switch2], -10 ** -6, f"seed={seed}")
+
+                # topological sort consumes all switches only if there is no cycle
+                in_degrees = {s: 0 for s in next_switches}
+                for v in next_switches.values():
+                    for s in v:
+                        in_degrees[s] = in_degrees.get(s, 0) + 1
+                queue = [s for s, d in in_degrees.items() if d == 0]
+                while len(queue) > 0:
+                    for s in next_switches.get(queue.pop(), set()):
+                        in_degrees[s] -= 1
+                        if in_degrees[s] == 0:
+                            queue.append(s)
+                self.assertTrue(all(d == 0 for d in in_degrees.values()), f"seed={seed}")
+
+    def test_calc_optimal_with_simple_topology(self):
+        """
+        h1-c --- s1 --100-- s2 --- h2-c
+                 |          |
+                 99        100
+                 |          |
+                 s4 --99--- s3 --- h1-s, h2-s
+        """
+        host_pairs = [
+            # request 100Mbps and 90Mbps
+            [HostClient('h1-c', 's1', 800, 10), HostServer('h1-s', 's3')],
+            [HostClient('h2-c', 's2', 800, 9), HostServer('h2-s', 's3')],
+        ]
+        links = [
+            Link('s1', 's2', 100, 1000),
+            Link('s2', 's3', 100, 1000),
+            Link('s1', 's4', 99, 1000),
+            Link('s4', 's3', 99, 1000),
+        ]
+        switches = [Switch('s1'), Switch('s2'), Switch('s3'), Switch('s4')]
+
+        # greedy takes the widest path for h1 pair, which is the only path for h2 pair
+        paths = RouteCalculator(RoutingAlgorithm.MULTIPATH, host_pairs, switches, links).calc_shortest_path(0, 30)
+        self.assertListEqual([p[2].bandwidth_mbps() for p in paths], [100, 0])
+
+        router = RouteCalculator(RoutingAlgorithm.OPTIMAL, host_pairs, switches, links)
+        paths = router.calc_shortest_path(0, 30)
+        self.assertListEqual([p[0] for p in paths], [h[0] for h in host_pairs])
+        self.assertAlmostEqual(paths[0][2].bandwidth_mbps(), 100)
+        self.assertAlmostEqual(paths[1][2].bandwidth_mbps(), 90)
+        self.assertListEqual([p.switches for p in paths[1][2].paths], [('s2', 's3')])
+
+        # takahira method is used when the solver runs out of time
+        with patch.object(RouteCalculator, 'OPTIMAL_TIME_LIMIT_RATIO', 0):
+            paths = router.calc_shortest_path(0, 30)
+        self.assertListEqual([p[2].switches for p in paths], [('s1', 's2', 's3'), ('s2', 's3')])
+
+        # intervals calculated at once share the time budget
+        plan = router.calc_route_plan(0, 2, 30)
+        self.assertListEqual([p[2].bandwidth_mbps() for p in plan[0]], [100, 90])
+        self.assertTrue(all(isinstance(p[2], MultiPath) for paths in plan for p in paths))
+        with patch.object(RouteCalculator, 'OPTIMAL_TIME_LIMIT_RATIO', 0):
+            plan = router.calc_route_plan(0, 2, 30)
+        self.assertTrue(all(isinstance(p[2], Path) for paths in plan for p in paths))
+
+    def test_calc_time_expanded_with_failing_link(self):
+        """
+        h1-c --- s1 --100-- s2 --- h1-s
+                 |          |
+                 50         50
+                 |          |
+                 +--- s3 ---+
+        """
+        # requests 100Mbps
+        host_pairs = [[HostClient('h1-c', 's1', 800, 10), HostServer('h1-s', 's2')]]
+        links = [
+            Link('s1', 's2', 100, 60),
+            Link('s1', 's3', 50),
+            Link('s3', 's2', 50),
+        ]
+        switches = [Switch('s1'), Switch('s2'), Switch('s3')]
+
+        # optimal for each interval only sends requested bandwidth before s1-s2 fails
+        router = RouteCalculator(RoutingAlgorithm.OPTIMAL, host_pairs, switches, links)
+        self.assertAlmostEqual(router.calc_shortest_path(0, 30)[0][2].bandwidth_mbps(), 100)
+
+        # time expanded uses both paths fully while s1-s2 is operating, because less bandwidth is left after that
+        router = RouteCalculator(RoutingAlgorithm.TIME_EXPANDED, host_pairs, switches, links)
+        plan = router.calc_route_plan(0, 26, 30)
+        self.assertEqual(len(plan), 27)
+        for t in [0, 1]:
+            self.assertAlmostEqual(plan[t][0][2].bandwidth_mbps(), 150, places=3)
+            self.assertEqual(plan[t][0][2].len, 2)
+        for t in range(2, 27):
+            self.assertListEqual([p.switches for p in plan[t][0][2].paths], [('s1', 's3', 's2')])
+
+        paths = router.calc_shortest_path(0, 30)
+        self.assertAlmostEqual(paths[0][2].bandwidth_mbps(), 150, places=3)
+
+    @staticmethod
+    def __random_grid(rand: random.Random, size: int) \
+            -> tuple[list[Switch], list[Link], list[list[HostClient, HostServer]]]:
+        switches = [Switch(f"s{i + 1}") for i in range(size * size)]
+        links = []
+        for i in range(size):
+            for j in range(size):
+                dpid = size * i + j + 1
+                fail_at_sec = rand.choice([-1, rand.randint(0, 600)])
+                if j != size - 1:
+                    links.append(Link(f"s{dpid}", f"s{dpid + 1}", rand.randint(500, 1000), fail_at_sec))
+                if i != size - 1:
+                    links.append(Link(f"s{dpid}", f"s{dpid + size}", rand.randint(500, 1000), fail_at_sec))
+
+        host_pairs = []
+        for i in range(rand.randint(1, 5)):
+            client, server = rand.sample(switches, 2)
+            host_pairs.append([HostClient(f"h{i}-c", client.name, rand.randint(100, 600), rand.randint(10, 100)),
+                               HostServer(f"h{i}-s", server.name)])
+
+        return switches, links, host_pairs
+
+    @staticmethod
+    def __expected_bandwidths(switches: list[Switch], links: list[Link], nth_update: int,
+                              update_interval_sec: int) -> dict[str, dict[str, float]]:
+        elapsed_sec = nth_update * update_interval_sec
+        bandwidths = {s.name: {} for s in switches}
+        for l in links:
+            if l.fail_at_sec == -1 or elapsed_sec + update_interval_sec <= l.fail_at_sec:
+                ope_ratio = 1
+            elif elapsed_sec <= l.fail_at_sec:
+                ope_ratio = (l.fail_at_sec - elapsed_sec) / update_interval_sec
+            else:
+                ope_ratio = 0
+            bandwidths[l.switch1][l.switch2] = ope_ratio * l.bandwidth_mbps
+            bandwidths[l.switch2][l.switch1] = ope_ratio * l.bandwidth_mbps
+
+        return bandwidths
+
+    @staticmethod
+    def __widest_bandwidth_by_floyd_warshall(switches: list[Switch], bandwidths: dict[str, dict[str, float]],
+                                             src: str, dst: str) -> float:
+        widest = {s1.name: {s2.name: RouteCalculator.BANDWIDTH_INF if s1 == s2 else -RouteCalculator.BANDWIDTH_INF
+                            for s2 in switches} for s1 in switches}
+        for s1, v in bandwidths.items():
+            for s2, bw in v.items():
+                widest[s1][s2] = bw
+
+        for s1 in switches:
+            for s2 in switches:
+                for s3 in switches:
+                    bw_via_s2 = min(widest[s1.name][s2.name], widest[s2.name][s3.name])
+                    if widest[s1.name][s3.name] < bw_via_s2:
+                        widest[s1.name][s3.name] = bw_via_s2
+                        widest[s3.name][s1.name] = bw_via_s2
+
+        return widest[src][dst]
+
 
 if __name__ == '__main__':
     unittest.main()
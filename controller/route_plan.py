@@ -0,0 +1,136 @@
+from __future__ import annotations
+
+from typing import Callable, Optional
+
+from route_calculator import RouteCalculator, Snapshot, CompactPaths
+
+
+class RoutePlan(object):
+    """
+    Paths of host pairs precomputed for consecutive intervals of path update.
+    Only differences between consecutive intervals are stored, and paths after the last interval don't change.
+    """
+
+    def __init__(self, fingerprint: int, first_nth_update: int, paths: list[CompactPaths]):
+        """
+        :param fingerprint: fingerprint of the topology which paths are calculated on
+        :param first_nth_update: nth_update of the first paths
+        :param paths: paths of each interval from first_nth_update in order. this must not be empty.
+        """
+        assert len(paths) > 0
+        self.__fingerprint = fingerprint
+        self.__first_nth_update = first_nth_update
+
+        # paths of the first interval, and then changed paths of each interval.
+        # dict[client_name, switches on path]. None means that path of the client has been dropped.
+        self.__deltas: list[dict[str, Optional[tuple[str, ...]]]] = []
+        prev: dict[str, tuple[str, ...]] = {}
+        for p in paths:
+            current = dict(p)
+            delta: dict[str, Optional[tuple[str, ...]]] = {k: v for k, v in current.items() if prev.get(k) != v}
+            for k in prev.keys() - current.keys():
+                delta[k] = None
+            self.__deltas.append(delta)
+            prev = current
+
+        # paths at cursor, which makes looking up the next interval cost only its delta
+        self.__cursor = 0
+        self.__current: dict[str, tuple[str, ...]] = dict(paths[0])
+
+    @property
+    def fingerprint(self) -> int:
+        return self.__fingerprint
+
+    @property
+    def first_nth_update(self) -> int:
+        return self.__first_nth_update
+
+    @property
+    def last_nth_update(self) -> int:
+        return self.__first_nth_update + len(self.__deltas) - 1
+
+    @property
+    def deltas(self) -> list[dict[str, Optional[tuple[str, ...]]]]:
+        return self.__deltas
+
+    def covers(self, nth_update: int) -> bool:
+        return nth_update >= self.__first_nth_update
+
+    def paths_at(self, nth_update: int) -> CompactPaths:
+        if not self.covers(nth_update):
+            raise ValueError(f"nth_update must be greater than or equal to {self.__first_nth_update}, "
+                             f"got {nth_update}")
+
+        index = min(nth_update, self.last_nth_update) - self.__first_nth_update
+        if index < self.__cursor:
+            self.__cursor = 0
+            self.__current = {k: v for k, v in self.__deltas[0].items() if v is not None}
+
+        while self.__cursor < index:
+            self.__cursor += 1
+            for k, v in self.__deltas[self.__cursor].items():
+                if v is None:
+                    self.__current.pop(k, None)
+                else:
+                    self.__current[k] = v
+
+        return tuple(self.__current.items())
+
+
+class RoutePlanCache(object):
+    """
+    Route plans cached by fingerprint of RouteCalculator. Paths of an interval are looked up from the plan of the
+    current fingerprint, and a plan from the interval up to the last failure is built if there is none.
+    """
+
+    def __init__(self, calc: Callable[[Snapshot, list[int]], list[CompactPaths]], update_interval_sec: int,
+                 max_plans: int, progress_step: float = 0, bandwidth_step: float = 0):
+        """
+        :param calc: function to calculate paths of each interval of nth_updates on the snapshot
+        :param progress_step: plans are rebuilt when progress of a host pair has changed by this fraction of its data
+            size. 0 not to rebuild them on progress. see RouteCalculator.fingerprint
+        :param bandwidth_step: plans are rebuilt when measured bandwidth of a link has changed by this fraction of its
+            bandwidth. 0 not to rebuild them on measurement.
+        """
+        self.__calc = calc
+        self.__update_interval_sec = update_interval_sec
+        self.__max_plans = max_plans
+        self.__progress_step = progress_step
+        self.__bandwidth_step = bandwidth_step
+        # dict[fingerprint, RoutePlan] in order of building
+        self.__plans: dict[int, RoutePlan] = {}
+        self.__latest: Optional[RoutePlan] = None
+
+    def __len__(self):
+        return len(self.__plans)
+
+    @property
+    def latest(self) -> Optional[RoutePlan]:
+        """
+        the plan built last
+        """
+        return self.__latest
+
+    def paths_at(self, route_calculator: RouteCalculator, nth_update: int) -> CompactPaths:
+        fingerprint = route_calculator.fingerprint(self.__progress_step, self.__bandwidth_step)
+        plan = self.__plans.get(fingerprint)
+        if plan is None or not plan.covers(nth_update):
+            plan = self.__build(route_calculator, fingerprint, nth_update)
+        return plan.paths_at(nth_update)
+
+    def __build(self, route_calculator: RouteCalculator, fingerprint: int, first_nth_update: int) -> RoutePlan:
+        # all links and clients have failed after the interval containing the last failure
+        last_nth_update = max(route_calculator.last_fail_at_sec() // self.__update_interval_sec + 1,
+                              first_nth_update)
+        nth_updates = list(range(first_nth_update, last_nth_update + 1))
+        plan = RoutePlan(fingerprint, first_nth_update, self.__calc(route_calculator.snapshot(), nth_updates))
+
+        if len(self.__plans) >= self.__max_plans:
+            self.__plans.pop(next(iter(self.__plans)))
+        self.__plans[fingerprint] = plan
+        self.__latest = plan
+        return plan
+
+    def clear(self):
+        self.__plans = {}
+        self.__latest = None
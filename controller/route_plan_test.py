@@ -0,0 +1,94 @@
+import unittest
+
+from components import HostClient, HostServer
+from enums import RoutingAlgorithm
+from route_calculator import RouteCalculator, Switch, Link
+from route_plan import RoutePlan, RoutePlanCache
+
+
+class RoutePlanTest(unittest.TestCase):
+    def test_paths_at(self):
+        paths = [
+            (('h1-c', ('s1', 's2')), ('h2-c', ('s3', 's4'))),
+            (('h1-c', ('s1', 's2')), ('h2-c', ('s3', 's1', 's4'))),
+            (('h1-c', ('s1', 's2')),),
+            (('h1-c', ('s1', 's3', 's2')),),
+        ]
+        plan = RoutePlan(1, 2, paths)
+
+        # only changed paths are stored
+        self.assertListEqual(plan.deltas, [
+            {'h1-c': ('s1', 's2'), 'h2-c': ('s3', 's4')},
+            {'h2-c': ('s3', 's1', 's4')},
+            {'h2-c': None},
+            {'h1-c': ('s1', 's3', 's2')},
+        ])
+        self.assertEqual(plan.last_nth_update, 5)
+
+        for i, p in enumerate(paths):
+            self.assertDictEqual(dict(plan.paths_at(i + 2)), dict(p))
+        # paths don't change after the last interval
+        self.assertDictEqual(dict(plan.paths_at(10)), dict(paths[-1]))
+        # look back
+        self.assertDictEqual(dict(plan.paths_at(3)), dict(paths[1]))
+
+        self.assertFalse(plan.covers(1))
+        with self.assertRaises(ValueError):
+            plan.paths_at(1)
+
+
+class RoutePlanCacheTest(unittest.TestCase):
+    def test_paths_at_reflecting_progress(self):
+        """
+        h1-c --- s1 --100-- s2
+                 |          |
+                100        100
+                 |          |
+                 s3 --100-- s4 --- h1-s
+        """
+        router = RouteCalculator(
+            routing_algorithm=RoutingAlgorithm.MULTIPATH,
+            host_pairs=[[HostClient('h1-c', 's1', 1000, 20), HostServer('h1-s', 's4')]],
+            switches=[Switch('s1'), Switch('s2'), Switch('s3'), Switch('s4')],
+            links=[
+                Link('s1', 's2', 100, 1000),
+                Link('s2', 's4', 100, 1000),
+                Link('s1', 's3', 100, 1000),
+                Link('s3', 's4', 100, 1000),
+            ]
+        )
+        nth_updates = []
+
+        def calc(snapshot, n):
+            nth_updates.append(n)
+            copied = RouteCalculator.from_snapshot(snapshot)
+            return [RouteCalculator.compact_paths(copied.calc_shortest_path(i, 30)) for i in n]
+
+        cache = RoutePlanCache(calc, 30, 4, progress_step=0.1)
+        stale_cache = RoutePlanCache(calc, 30, 4)
+
+        # 20GB in 1000s needs both paths, and the plan is built once up to the last failure
+        paths = cache.paths_at(router, 0)
+        self.assertListEqual([p for p, _ in paths[0][1]], [('s1', 's2', 's4'), ('s1', 's3', 's4')])
+        self.assertEqual(cache.paths_at(router, 1), cache.latest.paths_at(1))
+        stale_cache.paths_at(router, 0)
+        self.assertListEqual(nth_updates, [list(range(0, 35)), list(range(0, 35))])
+
+        # progress within a step uses the plan
+        router.update_sent_gb('h1-c', 1)
+        cache.paths_at(router, 1)
+        self.assertEqual(len(nth_updates), 2)
+
+        # the rest of data fits in one path, and the plan is rebuilt from the next interval
+        router.update_sent_gb('h1-c', 15)
+        paths = cache.paths_at(router, 2)
+        self.assertListEqual(nth_updates[2], list(range(2, 35)))
+        self.assertListEqual([p for p, _ in paths[0][1]], [('s1', 's2', 's4')])
+        self.assertEqual(len(cache), 2)
+
+        # plan without progress still splits the flow
+        self.assertEqual(len(stale_cache.paths_at(router, 2)[0][1]), 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,86 @@
+from __future__ import annotations
+
+import time
+from concurrent.futures import ProcessPoolExecutor, Future
+from typing import Optional
+
+from route_calculator import RouteCalculator, Snapshot, CompactPaths
+
+
+class RouteResult(object):
+    def __init__(self, nth_update: int, paths: CompactPaths, calc_sec: float):
+        """
+        :param paths: paths calculated in worker. restore them by RouteCalculator.restore_paths
+        :param calc_sec: time taken to calculate paths in worker.
+            this is the time for which the controller would have been blocked.
+        """
+        self.nth_update = nth_update
+        self.paths = paths
+        self.calc_sec = calc_sec
+
+
+def calc_shortest_path_in_worker(snapshot: Snapshot, nth_update: int, update_interval_sec: int,
+                                 clients: Optional[frozenset[str]] = None,
+                                 fixed_paths: Optional[CompactPaths] = None) -> RouteResult:
+    """
+    :param clients: names of clients whose paths are calculated. if None, paths of all host pairs are calculated.
+    :param fixed_paths: paths of the other host pairs that are kept as they are
+    """
+    started_at = time.perf_counter()
+    route_calculator = RouteCalculator.from_snapshot(snapshot)
+    if fixed_paths is not None:
+        fixed_paths = [path for _, _, path in route_calculator.restore_paths(fixed_paths)]
+    paths = route_calculator.calc_shortest_path(nth_update, update_interval_sec, clients, fixed_paths)
+    return RouteResult(nth_update, RouteCalculator.compact_paths(paths), time.perf_counter() - started_at)
+
+
+def calc_route_plan_in_worker(snapshot: Snapshot, first_nth_update: int, last_nth_update: int,
+                              update_interval_sec: int) -> list[RouteResult]:
+    started_at = time.perf_counter()
+    route_calculator = RouteCalculator.from_snapshot(snapshot)
+    plan = route_calculator.calc_route_plan(first_nth_update, last_nth_update, update_interval_sec)
+    # intervals are calculated at once, so they share the time equally
+    calc_sec = (time.perf_counter() - started_at) / len(plan)
+    return [RouteResult(first_nth_update + i, RouteCalculator.compact_paths(paths), calc_sec)
+            for i, paths in enumerate(plan)]
+
+
+class RouteWorker(object):
+    """
+    Pool of processes that calculate paths off the event loop of the controller.
+    Calculations submitted at once, e.g. for different intervals, run in parallel.
+    """
+
+    def __init__(self, max_workers: Optional[int] = None):
+        self.__max_workers = max_workers
+        self.__executor: Optional[ProcessPoolExecutor] = None
+
+    def submit(self, snapshot: Snapshot, nth_update: int, update_interval_sec: int,
+               clients: Optional[frozenset[str]] = None,
+               fixed_paths: Optional[CompactPaths] = None) -> Future[RouteResult]:
+        """
+        :param clients: names of clients whose paths are calculated, e.g. to reroute them around a failed link.
+            if None, paths of all host pairs are calculated.
+        :param fixed_paths: paths of the other host pairs that are kept as they are
+        """
+        return self.__get_executor().submit(calc_shortest_path_in_worker, snapshot, nth_update, update_interval_sec,
+                                            clients, fixed_paths)
+
+    def submit_plan(self, snapshot: Snapshot, first_nth_update: int, last_nth_update: int,
+                    update_interval_sec: int) -> Future[list[RouteResult]]:
+        """
+        Calculate paths of all intervals from first_nth_update to last_nth_update in one worker.
+        """
+        return self.__get_executor().submit(calc_route_plan_in_worker, snapshot, first_nth_update, last_nth_update,
+                                            update_interval_sec)
+
+    def __get_executor(self) -> ProcessPoolExecutor:
+        # processes are started lazily, so that they don't exist until routing starts
+        if self.__executor is None:
+            self.__executor = ProcessPoolExecutor(self.__max_workers)
+        return self.__executor
+
+    def shutdown(self):
+        if self.__executor is not None:
+            self.__executor.shutdown(wait=False, cancel_futures=True)
+            self.__executor = None
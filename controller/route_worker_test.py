@@ -0,0 +1,56 @@
+import unittest
+
+from components import HostClient, HostServer, DirectedLink
+from enums import RoutingAlgorithm
+from route_calculator import RouteCalculator, Switch, Link
+from route_worker import RouteWorker
+
+
+class RouteWorkerTest(unittest.TestCase):
+    def test_submit_for_some_clients(self):
+        """
+        h1-s --- s1 --100-- s2 --- h2-c
+                 |          |
+                 1          10
+                 |          |
+        h2-s --- s3 --100-- s4 --- h1-c
+        """
+        host_pairs = [
+            [HostClient('h1-c', 's4', 1000, 20), HostServer('h1-s', 's1')],
+            [HostClient('h2-c', 's2', 500, 20), HostServer('h2-s', 's3')],
+        ]
+        links = [
+            Link('s1', 's2', 100, 1000),
+            Link('s1', 's3', 1, 1000),
+            Link('s2', 's4', 10, 1000),
+            Link('s3', 's4', 100, 1000),
+        ]
+        router = RouteCalculator(
+            routing_algorithm=RoutingAlgorithm.TAKAHIRA,
+            host_pairs=host_pairs,
+            switches=[Switch('s1'), Switch('s2'), Switch('s3'), Switch('s4')],
+            links=links
+        )
+        paths = router.calc_shortest_path(0, 30)
+
+        # Link(s2-s4) fails, and only h2 pair is rerouted in worker keeping path for h1 pair
+        router.rm_link('s4', 's2')
+        worker = RouteWorker(max_workers=1)
+        try:
+            result = worker.submit(router.snapshot(), 0, 30, frozenset({'h2-c'}),
+                                   RouteCalculator.compact_paths([paths[1]])).result()
+        finally:
+            worker.shutdown()
+
+        rerouted = router.restore_paths(result.paths)
+        self.assertListEqual(rerouted, router.calc_shortest_path(0, 30, {'h2-c'}, [paths[1][2]]))
+        self.assertEqual(len(rerouted), 1)
+        self.assertIs(rerouted[0][0], host_pairs[1][0])
+        self.assertListEqual(rerouted[0][2].links, [
+            DirectedLink.from_link(links[0], 's2', 's1'),
+            DirectedLink.from_link(links[1], 's1', 's3'),
+        ])
+
+
+if __name__ == '__main__':
+    unittest.main()
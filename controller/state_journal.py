@@ -0,0 +1,111 @@
+from __future__ import annotations
+
+import json
+import os
+from typing import IO, Callable, Optional
+
+
+class StateJournal(object):
+    """
+    Append-only journal of mutations of the controller state in JSON lines, which is replayed to restore the state
+    after restart. Each line is {"op": name of mutation, "args": its arguments}.
+    Lines are flushed one by one, so that the journal survives a crash of the process. a line that has not been
+    written completely is ignored on replay, and so is a complete line that cannot be decoded.
+    """
+
+    def __init__(self, path: str):
+        self.__path = path
+        self.__file: Optional[IO[str]] = None
+
+    @property
+    def path(self) -> str:
+        return self.__path
+
+    def append(self, op: str, args: dict):
+        if self.__file is None:
+            self.__file = open(self.__path, "a", encoding="utf-8")
+        self.__file.write(self.__encode(op, args))
+        self.__file.flush()
+
+    def replay(self) -> list[tuple[str, dict]]:
+        """
+        :return: mutations in the order they were appended. list[(op, args)]. lines that cannot be decoded are skipped.
+        """
+        return [(op, args) for op, args, e in self.__read() if e is None]
+
+    def restore(self, apply: Callable[[str, dict], None]) -> list[tuple[str, dict, Exception]]:
+        """
+        Replay mutations by apply one by one. a mutation that fails, or a line that cannot be decoded, does not stop
+        the others, and it is removed from the journal, so that it never fails again on the next restart.
+
+        :return: mutations that have failed. list[(op, args, exception)]. op of a line that cannot be decoded is the
+            line itself, and its args are empty.
+        """
+        applied: list[tuple[str, dict]] = []
+        failures: list[tuple[str, dict, Exception]] = []
+        for op, args, e in self.__read():
+            if e is None:
+                try:
+                    apply(op, args)
+                    applied.append((op, args))
+                    continue
+                except Exception as apply_error:
+                    e = apply_error
+            failures.append((op, args, e))
+
+        if len(failures) > 0:
+            self.__rewrite(applied)
+        return failures
+
+    def __read(self) -> list[tuple[str, dict, Optional[Exception]]]:
+        """
+        :return: mutations in the order they were appended with the error of decoding each line, which is None if it
+            has been decoded. list[(op, args, error)]
+        """
+        if not os.path.exists(self.__path):
+            return []
+
+        entries: list[tuple[str, dict, Optional[Exception]]] = []
+        # size of complete lines
+        size = 0
+        with open(self.__path, "rb") as f:
+            for line in f:
+                if not line.endswith(b"\n"):
+                    break
+                size += len(line)
+                try:
+                    entry = json.loads(line)
+                    op, args = entry["op"], entry["args"]
+                    if not isinstance(op, str) or not isinstance(args, dict):
+                        raise TypeError(f"Journal entry is invalid: {entry}")
+                    entries.append((op, args, None))
+                except (ValueError, KeyError, TypeError) as e:
+                    entries.append((line.decode("utf-8", errors="replace").rstrip("\n"), {}, e))
+        # the torn line is truncated, so that following lines are appended after the complete ones
+        if size < os.path.getsize(self.__path):
+            self.close()
+            os.truncate(self.__path, size)
+        return entries
+
+    def __rewrite(self, entries: list[tuple[str, dict]]):
+        self.close()
+        # replace the journal at once, so that a crash while rewriting leaves either of them
+        tmp_path = self.__path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            for op, args in entries:
+                f.write(self.__encode(op, args))
+        os.replace(tmp_path, self.__path)
+
+    @staticmethod
+    def __encode(op: str, args: dict) -> str:
+        return json.dumps({"op": op, "args": args}, separators=(",", ":")) + "\n"
+
+    def clear(self):
+        self.close()
+        if os.path.exists(self.__path):
+            os.remove(self.__path)
+
+    def close(self):
+        if self.__file is not None:
+            self.__file.close()
+            self.__file = None
@@ -0,0 +1,93 @@
+import json
+import os
+import tempfile
+import unittest
+
+from state_journal import StateJournal
+
+
+class StateJournalTest(unittest.TestCase):
+    def test_replay(self):
+        with tempfile.TemporaryDirectory() as d:
+            path = os.path.join(d, "test.journal")
+            journal = StateJournal(path)
+            self.assertListEqual(journal.replay(), [])
+
+            journal.append("add_link", {"switch1": "s1", "switch2": "s2", "bandwidth_mbps": 1000})
+            journal.append("rm_port", {"dpid": 1, "port": 2})
+            journal.close()
+            # a line torn by a crash is ignored
+            with open(path, "a") as f:
+                f.write('{"op":"rm_port","args":{"dpid"')
+
+            self.assertListEqual(StateJournal(path).replay(), [
+                ("add_link", {"switch1": "s1", "switch2": "s2", "bandwidth_mbps": 1000}),
+                ("rm_port", {"dpid": 1, "port": 2}),
+            ])
+            journal.append("rm_port", {"dpid": 2, "port": 1})
+            self.assertEqual(len(journal.replay()), 3)
+
+            journal.clear()
+            self.assertFalse(os.path.exists(path))
+            self.assertListEqual(journal.replay(), [])
+
+    def test_restore(self):
+        with tempfile.TemporaryDirectory() as d:
+            path = os.path.join(d, "test.journal")
+            journal = StateJournal(path)
+            journal.append("add_link", {"switch1": "s1", "switch2": "s2"})
+            journal.append("register_link_fail_time", {"switch1": "s1", "switch2": "s9"})
+            journal.append("add_link", {"switch1": "s2", "switch2": "s3"})
+            journal.close()
+
+            links = []
+
+            def apply(op, args):
+                if op == "register_link_fail_time" and (args["switch1"], args["switch2"]) not in links:
+                    raise AttributeError("link not found")
+                links.append((args["switch1"], args["switch2"]))
+
+            # the bad entry fails alone and the rest are restored
+            failures = StateJournal(path).restore(apply)
+            self.assertListEqual([(op, type(e)) for op, _, e in failures],
+                                 [("register_link_fail_time", AttributeError)])
+            self.assertListEqual(links, [("s1", "s2"), ("s2", "s3")])
+
+            # the bad entry is removed from the journal
+            self.assertListEqual([op for op, _ in StateJournal(path).replay()], ["add_link", "add_link"])
+
+    def test_restore_corrupt_line(self):
+        with tempfile.TemporaryDirectory() as d:
+            path = os.path.join(d, "test.journal")
+            journal = StateJournal(path)
+            journal.append("add_link", {"switch1": "s1", "switch2": "s2"})
+            journal.close()
+            # lines broken by a partial write or a hand edit, which end with a newline unlike a torn line
+            with open(path, "a") as f:
+                f.write('{"op":"add_link","ar\n')
+                f.write('{"op":"add_link"}\n')
+                f.write('["add_link"]\n')
+            journal.append("add_link", {"switch1": "s2", "switch2": "s3"})
+            journal.close()
+
+            # corrupt lines are skipped by replay
+            self.assertEqual(len(StateJournal(path).replay()), 2)
+
+            # corrupt lines fail alone and the rest are restored
+            links = []
+            failures = StateJournal(path).restore(lambda op, args: links.append((args["switch1"], args["switch2"])))
+            self.assertListEqual([(op, type(e)) for op, _, e in failures], [
+                ('{"op":"add_link","ar', json.JSONDecodeError),
+                ('{"op":"add_link"}', KeyError),
+                ('["add_link"]', TypeError),
+            ])
+            self.assertListEqual(links, [("s1", "s2"), ("s2", "s3")])
+
+            # corrupt lines are removed from the journal
+            with open(path) as f:
+                self.assertEqual(len(f.readlines()), 2)
+            self.assertListEqual(StateJournal(path).restore(lambda op, args: None), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
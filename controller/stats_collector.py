@@ -0,0 +1,142 @@
+from __future__ import annotations
+
+from typing import Optional
+
+import numpy as np
+
+from flow_table import FlowKey
+
+
+class RingBuffer(object):
+    """
+    Fixed number of the latest rows kept in one preallocated array. the oldest row is overwritten when it is full.
+    """
+
+    def __init__(self, size: int, n_fields: int):
+        self.__rows = np.full((size, n_fields), np.nan, dtype=np.float64)
+        # index of the row to be written next
+        self.__next = 0
+        self.__count = 0
+
+    def __len__(self):
+        return self.__count
+
+    def append(self, row: tuple[float, ...]):
+        self.__rows[self.__next] = row
+        self.__next = (self.__next + 1) % len(self.__rows)
+        self.__count = min(self.__count + 1, len(self.__rows))
+
+    def latest(self) -> Optional[np.ndarray]:
+        if self.__count == 0:
+            return None
+        return self.__rows[self.__next - 1]
+
+    def to_array(self) -> np.ndarray:
+        """
+        :return: copy of rows from the oldest. shape is (len(self), n_fields)
+        """
+        if self.__count < len(self.__rows):
+            return self.__rows[:self.__count].copy()
+        return np.roll(self.__rows, -self.__next, axis=0)
+
+
+class StatsCollector(object):
+    """
+    Time series of rates of ports and flows, which are calculated from cumulative byte counters of OpenFlow stats.
+    Each port and flow keeps the latest HISTORY_SIZE rates in RingBuffer.
+    This knows nothing about OpenFlow messages, so that the controller feeds counters of their replies.
+    """
+    HISTORY_SIZE = 60
+
+    def __init__(self, history_size: int = HISTORY_SIZE):
+        self.__history_size = history_size
+        # the last counters. dict[(dpid, port_no), (at_sec, rx_bytes, tx_bytes)]
+        self.__port_counters: dict[tuple[int, int], tuple[float, int, int]] = {}
+        # rows are (at_sec, rx_mbps, tx_mbps). dict[(dpid, port_no), RingBuffer]
+        self.__port_rates: dict[tuple[int, int], RingBuffer] = {}
+        # the last counters. dict[(dpid, FlowKey), (at_sec, byte_count)]
+        self.__flow_counters: dict[tuple[int, FlowKey], tuple[float, int]] = {}
+        # rows are (at_sec, mbps). dict[(dpid, FlowKey), RingBuffer]
+        self.__flow_rates: dict[tuple[int, FlowKey], RingBuffer] = {}
+
+    def record_port(self, dpid: int, port_no: int, at_sec: float, rx_bytes: int, tx_bytes: int):
+        """
+        :param at_sec: time when the counters are received
+        """
+        key = (dpid, port_no)
+        last = self.__port_counters.get(key)
+        self.__port_counters[key] = (at_sec, rx_bytes, tx_bytes)
+        # counters are reset when the port is recreated
+        if last is None or at_sec <= last[0] or rx_bytes < last[1] or tx_bytes < last[2]:
+            return
+
+        duration_sec = at_sec - last[0]
+        rx_mbps = self.__to_mbps(rx_bytes - last[1], duration_sec)
+        tx_mbps = self.__to_mbps(tx_bytes - last[2], duration_sec)
+        self.__port_rates.setdefault(key, RingBuffer(self.__history_size, 3)).append((at_sec, rx_mbps, tx_mbps))
+
+    def record_flow(self, dpid: int, key: FlowKey, at_sec: float, byte_count: int):
+        """
+        :param at_sec: time when the counter is received
+        """
+        flow = (dpid, key)
+        last = self.__flow_counters.get(flow)
+        self.__flow_counters[flow] = (at_sec, byte_count)
+        # counter is reset when the flow is reinstalled
+        if last is None or at_sec <= last[0] or byte_count < last[1]:
+            return
+
+        self.__flow_rates.setdefault(flow, RingBuffer(self.__history_size, 2)).append(
+            (at_sec, self.__to_mbps(byte_count - last[1], at_sec - last[0])))
+
+    @staticmethod
+    def __to_mbps(n_bytes: int, duration_sec: float) -> float:
+        return n_bytes * 8 / 10 ** 6 / duration_sec
+
+    def port_rate_mbps(self, dpid: int, port_no: int) -> Optional[tuple[float, float]]:
+        """
+        :return: the latest (rx_mbps, tx_mbps) of the port. None if it has not been measured yet.
+        """
+        rates = self.__port_rates.get((dpid, port_no))
+        latest = None if rates is None else rates.latest()
+        return None if latest is None else (float(latest[1]), float(latest[2]))
+
+    def flow_rate_mbps(self, dpid: int, key: FlowKey) -> Optional[float]:
+        """
+        :return: the latest rate of the flow. None if it has not been measured yet.
+        """
+        rates = self.__flow_rates.get((dpid, key))
+        latest = None if rates is None else rates.latest()
+        return None if latest is None else float(latest[1])
+
+    def forget(self, dpid: int):
+        """
+        Forget ports and flows of the datapath, e.g. when it is disconnected.
+        """
+        for d in [self.__port_counters, self.__port_rates, self.__flow_counters, self.__flow_rates]:
+            for k in [k for k in d.keys() if k[0] == dpid]:
+                d.pop(k)
+
+    def reset(self):
+        self.__port_counters = {}
+        self.__port_rates = {}
+        self.__flow_counters = {}
+        self.__flow_rates = {}
+
+    def to_dict(self) -> dict:
+        """
+        :return: rate histories of all ports and flows from the oldest, which can be encoded as JSON
+        """
+        return {
+            "ports": [{
+                "dpid": dpid,
+                "port": port_no,
+                "samples": [{"at_sec": at, "rx_mbps": rx, "tx_mbps": tx} for at, rx, tx in rates.to_array().tolist()],
+            } for (dpid, port_no), rates in sorted(self.__port_rates.items())],
+            "flows": [{
+                "dpid": dpid,
+                "eth_type": eth_type,
+                "ip": ip,
+                "samples": [{"at_sec": at, "mbps": mbps} for at, mbps in rates.to_array().tolist()],
+            } for (dpid, (eth_type, ip)), rates in sorted(self.__flow_rates.items())],
+        }
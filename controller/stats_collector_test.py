@@ -0,0 +1,56 @@
+import unittest
+
+from stats_collector import RingBuffer, StatsCollector
+
+
+class RingBufferTest(unittest.TestCase):
+    def test_append(self):
+        buffer = RingBuffer(3, 2)
+        self.assertIsNone(buffer.latest())
+        self.assertEqual(buffer.to_array().shape, (0, 2))
+
+        for i in range(5):
+            buffer.append((i, i * 10))
+
+        # only the latest rows are kept from the oldest
+        self.assertEqual(len(buffer), 3)
+        self.assertListEqual(buffer.to_array().tolist(), [[2, 20], [3, 30], [4, 40]])
+        self.assertListEqual(buffer.latest().tolist(), [4, 40])
+
+
+class StatsCollectorTest(unittest.TestCase):
+    def test_record_port(self):
+        collector = StatsCollector(history_size=2)
+        collector.record_port(1, 2, 10, 0, 0)
+        self.assertIsNone(collector.port_rate_mbps(1, 2))
+
+        collector.record_port(1, 2, 12, 10 ** 6, 5 * 10 ** 6)
+        self.assertEqual(collector.port_rate_mbps(1, 2), (4, 20))
+
+        # counters reset by recreated port are not a rate
+        collector.record_port(1, 2, 14, 0, 0)
+        self.assertEqual(collector.port_rate_mbps(1, 2), (4, 20))
+        collector.record_port(1, 2, 15, 10 ** 6, 10 ** 6)
+        self.assertEqual(collector.port_rate_mbps(1, 2), (8, 8))
+
+        self.assertDictEqual(collector.to_dict(), {
+            "ports": [{"dpid": 1, "port": 2, "samples": [
+                {"at_sec": 12, "rx_mbps": 4, "tx_mbps": 20},
+                {"at_sec": 15, "rx_mbps": 8, "tx_mbps": 8},
+            ]}],
+            "flows": [],
+        })
+
+        collector.forget(1)
+        self.assertIsNone(collector.port_rate_mbps(1, 2))
+
+    def test_record_flow(self):
+        collector = StatsCollector()
+        collector.record_flow(1, (0x0800, "10.0.0.1"), 0, 0)
+        collector.record_flow(1, (0x0800, "10.0.0.1"), 5, 125 * 10 ** 6)
+        self.assertEqual(collector.flow_rate_mbps(1, (0x0800, "10.0.0.1")), 200)
+        self.assertIsNone(collector.flow_rate_mbps(2, (0x0800, "10.0.0.1")))
+
+
+if __name__ == '__main__':
+    unittest.main()
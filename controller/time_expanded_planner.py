@@ -0,0 +1,278 @@
+from __future__ import annotations
+
+import math
+import time
+from typing import Optional
+
+import numpy as np
+from scipy import sparse
+from scipy.optimize import linprog
+from scipy.sparse import csgraph
+
+from linear_program import STATUS_OPTIMAL, usable_solution
+from link_arrays import LinkArrays
+
+# host pair to plan. (src switch index, dst switch index, fail_at_sec of client, datasize_gb)
+Commodity = tuple[int, int, int, float]
+
+# path assigned to a host pair in an interval. (switch indices on path, link indices on path, bandwidth)
+PlannedPath = tuple[tuple[int, ...], tuple[int, ...], float]
+
+
+class TimeExpandedPlanner(object):
+    """
+    Planner of paths over the whole disaster window on time-expanded network, whose layer of each interval is the
+    topology with expected bandwidth of links in the interval.
+    Data is never stored in switches, so layers are coupled only by data size of each host pair, and the schedule that
+    maximizes data sent before clients fail is solved as linear programming over paths:
+
+    maximize    sum_{k,p,t} alive_sec_kt * y_kpt - eps * sum_{k,p,t} hops_p * y_kpt
+    subject to  sum_{k,p,t} alive_sec_kt * y_kpt <= datasize of k                  for each host pair k
+                sum_{k,p: link in p} y_kpt <= expected bandwidth of link in t      for each link and interval t
+                0 <= y_kpt
+
+    where y_kpt is bandwidth of host pair k on path p in interval t.
+    Paths are generated by column generation instead of being enumerated. The problem is solved over the paths found
+    so far, starting from diverse short paths, and the shortest path of each host pair in each interval whose links
+    cost eps plus the dual price of their capacity is added if it increases the objective. When no path is added, the
+    schedule is the optimum over all paths, which is the same as that of the arc-based formulation of flows on the
+    time-expanded network. If the time budget runs out before that, the schedule over the paths found so far is used,
+    which is an approximation that sends less data than the optimum.
+    Intervals that have the same bandwidths and the same alive clients are merged into one layer, which doesn't change
+    the optimum.
+    """
+    # number of diverse paths of a host pair for each set of operating links that column generation starts with
+    INITIAL_CANDIDATE_PATHS = 4
+    # bandwidth(Mbps) less than this is regarded as 0
+    BANDWIDTH_EPS = 10 ** -6
+    # path is added only if it increases the objective by more than this ratio of its gain of sending data
+    REDUCED_COST_TOL = 10 ** -6
+    # path that is not used is dropped if it decreases the objective by more than this ratio of its gain
+    PURGE_REDUCED_COST_RATIO = 0.01
+
+    def __init__(self, arrays: LinkArrays, update_interval_sec: int, time_limit_sec: float):
+        self.__arrays = arrays
+        self.__update_interval_sec = update_interval_sec
+        self.__time_limit_sec = time_limit_sec
+        # dict[(from switch index, to switch index), index of link]
+        self.__link_between: dict[tuple[int, int], int] = {}
+        for l, (s1, s2) in enumerate(arrays.endpoints.tolist()):
+            self.__link_between[(s1, s2)] = l
+            self.__link_between[(s2, s1)] = l
+
+    def plan(self, commodities: list[Commodity], first_nth_update: int, bandwidths: np.ndarray) \
+            -> Optional[list[list[list[PlannedPath]]]]:
+        """
+        :param first_nth_update: nth_update of the first interval
+        :param bandwidths: available bandwidth of each link in each interval. shape is (intervals, len(links))
+        :return: paths of each host pair in each interval, indexed by interval and then by commodity.
+            if time runs out, the best schedule over the paths found so far, which is feasible but can send less data
+            than the optimum. None if no schedule is found in time.
+        """
+        deadline = time.perf_counter() + self.__time_limit_sec
+        n_intervals = bandwidths.shape[0]
+        if len(commodities) == 0:
+            return [[] for _ in range(n_intervals)]
+
+        # time for which each client is alive in each interval. shape is (len(commodities), intervals)
+        elapsed_sec = (first_nth_update + np.arange(n_intervals)) * self.__update_interval_sec
+        fail_at_sec = np.array([math.inf if c[2] < 0 else c[2] for c in commodities], dtype=np.float64)
+        alive_sec = np.clip(fail_at_sec[:, np.newaxis] - elapsed_sec, 0, self.__update_interval_sec)
+
+        # intervals with the same bandwidths and the same alive time of clients are solved as one interval, whose
+        # capacity is the sum of them, and its bandwidths are divided equally among them
+        _, firsts, groups, counts = np.unique(np.concatenate([bandwidths, alive_sec.T], axis=1), axis=0,
+                                              return_index=True, return_inverse=True, return_counts=True)
+        schedule = self.__solve(commodities, bandwidths[firsts] * counts[:, np.newaxis], alive_sec[:, firsts],
+                                deadline)
+        if schedule is None:
+            return None
+
+        return [[[(switches, links, bw / counts[g]) for switches, links, bw in paths] for paths in schedule[g]]
+                for g in groups.ravel().tolist()]
+
+    def __solve(self, commodities: list[Commodity], bandwidths: np.ndarray, alive_sec: np.ndarray, deadline: float) \
+            -> Optional[list[list[list[PlannedPath]]]]:
+        """
+        Solve linear programming by column generation until deadline.
+
+        :param bandwidths: capacity of each link in each interval. shape is (intervals, len(links))
+        :param alive_sec: time for which each client is alive in each interval. shape is (len(commodities), intervals)
+        :return: paths of each host pair in each interval, indexed by interval and then by commodity.
+            None if no schedule is found in time.
+        """
+        n_intervals, n_links = bandwidths.shape
+        result: list[list[list[PlannedPath]]] = [[[] for _ in commodities] for _ in range(n_intervals)]
+        if not np.any(alive_sec > 0):
+            return result
+
+        # capacity of link e in interval t is row t * n_links + e, and data size of commodity k is the row after them
+        datasize_rows = {k: n_intervals * n_links + i
+                         for i, k in enumerate(k for k, c in enumerate(commodities) if c[3] >= 0)}
+        n_rows = n_intervals * n_links + len(datasize_rows)
+        b_ub = np.concatenate([np.maximum(bandwidths, 0).ravel(),
+                               [commodities[k][3] * 8 * 1000 for k in datasize_rows]])
+        # detour of any simple path costs less than sending data by it
+        eps = alive_sec[alive_sec > 0].min() / (2 * max(len(self.__arrays.switches), 1))
+
+        # variables. list[(index of commodity, path, index of interval)]
+        variables: list[tuple[int, tuple[tuple[int, ...], tuple[int, ...]], int]] = []
+        # rows and values of each variable in constraints
+        columns: list[tuple[list[int], list[float]]] = []
+        x: Optional[np.ndarray] = None
+        # diverse short paths are given at first, so that the first solution is good even if time runs out soon
+        new_variables = self.__find_candidates(commodities, bandwidths, alive_sec)
+        while len(new_variables) > 0:
+            for k, (switches, links), t in new_variables:
+                variables.append((k, (switches, links), t))
+                rows = [t * n_links + l for l in links]
+                values = [1.0] * len(links)
+                if k in datasize_rows:
+                    rows.append(datasize_rows[k])
+                    values.append(alive_sec[k, t])
+                columns.append((rows, values))
+
+            time_limit_sec = deadline - time.perf_counter()
+            if time_limit_sec <= 0:
+                break
+            a_ub = sparse.csc_matrix(
+                (np.concatenate([values for _, values in columns]),
+                 np.concatenate([rows for rows, _ in columns]),
+                 np.cumsum([0] + [len(rows) for rows, _ in columns])),
+                shape=(n_rows, len(variables)))
+            cost = np.array([-alive_sec[k, t] + eps * len(links) for k, (_, links), t in variables])
+            # interior point method solves this degenerate problem much faster than simplex
+            res = linprog(cost, A_ub=a_ub, b_ub=b_ub, bounds=(0, None), method="highs-ipm",
+                          options={"time_limit": time_limit_sec})
+            solution = usable_solution(res, a_ub, b_ub)
+            if solution is None:
+                break
+            x = solution
+            if res.status != STATUS_OPTIMAL:
+                break
+
+            # paths that are not used and would decrease the objective are dropped to keep the problem small
+            gains = -cost
+            kept = np.flatnonzero((x > self.BANDWIDTH_EPS) |
+                                  (res.lower.marginals <= self.PURGE_REDUCED_COST_RATIO * gains))
+            variables = [variables[v] for v in kept.tolist()]
+            columns = [columns[v] for v in kept.tolist()]
+            x = x[kept]
+
+            # prices of capacity of links, and prices of data size of commodities. they are 0 or negative.
+            marginals = res.ineqlin.marginals
+            datasize_prices = np.zeros(len(commodities))
+            for k, row in datasize_rows.items():
+                datasize_prices[k] = marginals[row]
+            known = {(k, links, t) for k, (_, links), t in variables}
+            new_variables = [v for v in self.__find_paths(commodities, bandwidths, alive_sec, eps,
+                                                          marginals[:n_intervals * n_links].reshape(n_intervals,
+                                                                                                    n_links),
+                                                          datasize_prices)
+                             if (v[0], v[1][1], v[2]) not in known]
+
+        if x is None:
+            # no path is found for any host pair, or time runs out before the first solution
+            return result if len(variables) == 0 else None
+
+        for v in np.flatnonzero(x > self.BANDWIDTH_EPS).tolist():
+            k, (switches, links), t = variables[v]
+            result[t][k].append((switches, links, float(x[v])))
+        return result
+
+    def __find_paths(self, commodities: list[Commodity], bandwidths: np.ndarray, alive_sec: np.ndarray,
+                     eps: float, link_prices: np.ndarray, datasize_prices: np.ndarray) \
+            -> list[tuple[int, tuple[tuple[int, ...], tuple[int, ...]], int]]:
+        """
+        Find the path of each commodity in each interval that increases the objective the most, which is the
+        shortest path whose links cost eps plus price of their capacity.
+        Sending 1Mbps by a path p of commodity k in interval t changes the objective by
+        alive_sec_kt * (1 + datasize price of k) - sum_{link in p} (eps - price of link in t).
+
+        :param link_prices: dual values of capacity of each link in each interval. shape is (intervals, len(links))
+        :param datasize_prices: dual values of data size of each commodity
+        :return: paths that increase the objective. list[(index of commodity, path, index of interval)]
+        """
+        endpoints = self.__arrays.endpoints
+        n_switches = len(self.__arrays.switches)
+        found: list[tuple[int, tuple[tuple[int, ...], tuple[int, ...]], int]] = []
+        for t in range(bandwidths.shape[0]):
+            alive = [k for k in range(len(commodities)) if alive_sec[k, t] > 0]
+            links = np.flatnonzero(bandwidths[t] > self.BANDWIDTH_EPS)
+            if len(alive) == 0 or len(links) == 0:
+                continue
+
+            # price is 0 or negative, and it can be slightly positive by numerical error
+            costs = eps - np.minimum(link_prices[t, links], 0)
+            graph = sparse.csr_matrix(
+                (np.concatenate([costs, costs]),
+                 (np.concatenate([endpoints[links, 0], endpoints[links, 1]]),
+                  np.concatenate([endpoints[links, 1], endpoints[links, 0]]))),
+                shape=(n_switches, n_switches))
+            sources = sorted({commodities[k][0] for k in alive})
+            distances, predecessors = csgraph.dijkstra(graph, indices=sources, return_predecessors=True)
+
+            for k in alive:
+                src_index, dst_index, _, _ = commodities[k]
+                i = sources.index(src_index)
+                gain = alive_sec[k, t] * (1 + datasize_prices[k])
+                if distances[i, dst_index] - gain >= -self.REDUCED_COST_TOL * alive_sec[k, t]:
+                    continue
+
+                switches = [dst_index]
+                while switches[-1] != src_index:
+                    switches.append(int(predecessors[i, switches[-1]]))
+                switches.reverse()
+                path_links = tuple(self.__link_between[(u, v)] for u, v in zip(switches, switches[1:]))
+                found.append((k, (tuple(switches), path_links), t))
+
+        return found
+
+    def __find_candidates(self, commodities: list[Commodity], bandwidths: np.ndarray, alive_sec: np.ndarray) \
+            -> list[tuple[int, tuple[tuple[int, ...], tuple[int, ...]], int]]:
+        """
+        Find diverse short paths of each host pair on each set of operating links. After a path is found, cost of its
+        links is doubled, so that the next path avoids them.
+
+        :return: candidate paths in intervals where all of their links are operating and the client is alive.
+            list[(index of commodity, path, index of interval)]
+        """
+        arrays = self.__arrays
+        endpoints = arrays.endpoints
+        n_switches = len(arrays.switches)
+        operating = bandwidths > self.BANDWIDTH_EPS
+        # wider link costs less
+        base_costs = arrays.bandwidth_mbps.max() / np.maximum(arrays.bandwidth_mbps, self.BANDWIDTH_EPS)
+
+        candidates: list[dict[tuple[int, ...], tuple[int, ...]]] = [{} for _ in commodities]
+        for pattern in np.unique(operating, axis=0):
+            links = np.flatnonzero(pattern)
+            for k, (src_index, dst_index, _, _) in enumerate(commodities):
+                costs = base_costs[links].copy()
+                for _ in range(self.INITIAL_CANDIDATE_PATHS):
+                    graph = sparse.csr_matrix(
+                        (np.concatenate([costs, costs]),
+                         (np.concatenate([endpoints[links, 0], endpoints[links, 1]]),
+                          np.concatenate([endpoints[links, 1], endpoints[links, 0]]))),
+                        shape=(n_switches, n_switches))
+                    _, predecessors = csgraph.dijkstra(graph, indices=src_index, return_predecessors=True)
+                    if predecessors[dst_index] < 0:
+                        break
+
+                    switches = [dst_index]
+                    while switches[-1] != src_index:
+                        switches.append(int(predecessors[switches[-1]]))
+                    switches.reverse()
+                    path_links = tuple(self.__link_between[(u, v)] for u, v in zip(switches, switches[1:]))
+                    if path_links in candidates[k]:
+                        break
+
+                    candidates[k][path_links] = tuple(switches)
+                    costs[np.isin(links, path_links)] *= 2
+
+        found: list[tuple[int, tuple[tuple[int, ...], tuple[int, ...]], int]] = []
+        for k, c in enumerate(candidates):
+            for links, switches in c.items():
+                intervals = np.flatnonzero(operating[:, list(links)].all(axis=1) & (alive_sec[k] > 0))
+                found += [(k, (switches, links), t) for t in intervals.tolist()]
+        return found
@@ -0,0 +1,162 @@
+import random
+import unittest
+
+import numpy as np
+from scipy.optimize import linprog
+
+from components import Link
+from link_arrays import LinkArrays
+from time_expanded_planner import TimeExpandedPlanner, Commodity
+
+
+class TimeExpandedPlannerTest(unittest.TestCase):
+    def test_plan_with_failing_link(self):
+        """
+        s1 --100-- s2
+        |          |
+        50         50
+        |          |
+        +--- s3 ---+
+        """
+        # s1-s2 fails in the middle of 3rd interval
+        links = [Link('s1', 's2', 100, 75), Link('s1', 's3', 50), Link('s3', 's2', 50)]
+        arrays = LinkArrays(['s1', 's2', 's3'], links)
+        bandwidths = arrays.expected_bandwidths(np.arange(5), 30)
+
+        # data size that needs all bandwidth of both paths
+        datasize_gb = (150 * 75 + 50 * 75) / 8 / 1000
+        plan = TimeExpandedPlanner(arrays, 30, 10).plan([(0, 1, -1, datasize_gb)], 0, bandwidths)
+
+        self.assertEqual(len(plan), 5)
+        self.assertListEqual([sorted((p[0], round(p[2], 3)) for p in paths[0]) for paths in plan], [
+            [((0, 1), 100), ((0, 2, 1), 50)],
+            [((0, 1), 100), ((0, 2, 1), 50)],
+            [((0, 1), 50), ((0, 2, 1), 50)],
+            [((0, 2, 1), 50)],
+            [((0, 2, 1), 50)],
+        ])
+        self.assertListEqual(sorted(p[1] for p in plan[0][0]), [(0,), (1, 2)])
+
+    def test_plan_with_failing_client(self):
+        """
+        s1 --100-- s2
+        """
+        arrays = LinkArrays(['s1', 's2'], [Link('s1', 's2', 100)])
+        bandwidths = arrays.expected_bandwidths(np.arange(3), 30)
+
+        # client of the 1st pair fails after 1st interval, and the 2nd pair needs 2 intervals to send all data
+        commodities: list[Commodity] = [(0, 1, 30, 1), (0, 1, -1, 100 * 60 / 8 / 1000)]
+        plan = TimeExpandedPlanner(arrays, 30, 10).plan(commodities, 0, bandwidths)
+
+        self.assertListEqual([[round(sum(p[2] for p in paths[k]), 3) for k in range(2)] for paths in plan],
+                             [[100, 0], [0, 100], [0, 100]])
+        # no path is planned after the client fails
+        self.assertListEqual(plan[1][0], [])
+        self.assertListEqual(plan[2][0], [])
+
+        # clients that have failed before the first interval get nothing
+        plan = TimeExpandedPlanner(arrays, 30, 10).plan(commodities, 2, bandwidths)
+        self.assertListEqual([paths[0] for paths in plan], [[], [], []])
+
+    def test_plan_with_timeout(self):
+        arrays = LinkArrays(['s1', 's2'], [Link('s1', 's2', 100)])
+        bandwidths = arrays.expected_bandwidths(np.arange(3), 30)
+
+        self.assertIsNone(TimeExpandedPlanner(arrays, 30, 0).plan([(0, 1, -1, 1)], 0, bandwidths))
+        # nothing to plan is not a timeout
+        self.assertListEqual(TimeExpandedPlanner(arrays, 30, 0).plan([], 0, bandwidths), [[], [], []])
+
+    def test_plan_with_random_grid(self):
+        """
+        compare with the optimum of the arc-based formulation on time-expanded network
+        """
+        for seed in range(5):
+            rand = random.Random(seed)
+            size = 3
+            links = []
+            for i in range(size):
+                for j in range(size):
+                    dpid = size * i + j + 1
+                    fail_at_sec = rand.choice([-1, rand.randint(0, 150)])
+                    if j != size - 1:
+                        links.append(Link(f"s{dpid}", f"s{dpid + 1}", rand.randint(50, 100), fail_at_sec))
+                    if i != size - 1:
+                        links.append(Link(f"s{dpid}", f"s{dpid + size}", rand.randint(50, 100), fail_at_sec))
+            arrays = LinkArrays([f"s{i + 1}" for i in range(size * size)], links)
+            bandwidths = arrays.expected_bandwidths(np.arange(5), 30)
+            commodities: list[Commodity] = []
+            for _ in range(3):
+                src, dst = rand.sample(range(size * size), 2)
+                commodities.append((src, dst, rand.choice([-1, rand.randint(30, 150)]), rand.uniform(0.5, 2)))
+
+            plan = TimeExpandedPlanner(arrays, 30, 10).plan(commodities, 0, bandwidths)
+
+            alive_sec = self.__alive_sec(commodities, 5, 30)
+            sent_mbit = [0.0] * len(commodities)
+            for t, paths in enumerate(plan):
+                used = np.zeros(len(links))
+                for k, planned in enumerate(paths):
+                    for switches, path_links, bw in planned:
+                        self.assertEqual(switches[0], commodities[k][0])
+                        self.assertEqual(switches[-1], commodities[k][1])
+                        used[list(path_links)] += bw
+                        sent_mbit[k] += alive_sec[k, t] * bw
+                self.assertTrue(np.all(used <= bandwidths[t] + 10 ** -6), f"seed={seed}")
+            for k, (_, _, _, datasize_gb) in enumerate(commodities):
+                self.assertLessEqual(sent_mbit[k], datasize_gb * 8 * 1000 + 10 ** -3, f"seed={seed}")
+
+            self.assertAlmostEqual(sum(sent_mbit), self.__solve_arc_based(arrays, commodities, bandwidths, 30),
+                                   places=3, msg=f"seed={seed}")
+
+    @staticmethod
+    def __alive_sec(commodities: list[Commodity], n_intervals: int, update_interval_sec: int) -> np.ndarray:
+        fail_at_sec = np.array([np.inf if c[2] < 0 else c[2] for c in commodities])
+        return np.clip(fail_at_sec[:, np.newaxis] - np.arange(n_intervals) * update_interval_sec, 0,
+                       update_interval_sec)
+
+    def __solve_arc_based(self, arrays: LinkArrays, commodities: list[Commodity], bandwidths: np.ndarray,
+                          update_interval_sec: int) -> float:
+        """
+        :return: max data(Mbit) sent by flows of each commodity on each directed link in each interval
+        """
+        n_intervals, n_links = bandwidths.shape
+        n_switches = len(arrays.switches)
+        n_commodities = len(commodities)
+        alive_sec = self.__alive_sec(commodities, n_intervals, update_interval_sec)
+
+        # variables are flows f[k, t, arc] and then bandwidths x[k, t]
+        n_arcs = 2 * n_links
+        n_flows = n_commodities * n_intervals * n_arcs
+
+        def flow(k: int, t: int, arc: int) -> int:
+            return (k * n_intervals + t) * n_arcs + arc
+
+        def rate(k: int, t: int) -> int:
+            return n_flows + k * n_intervals + t
+
+        n_variables = n_flows + n_commodities * n_intervals
+        a_eq = np.zeros((n_commodities * n_intervals * n_switches, n_variables))
+        a_ub = np.zeros((n_intervals * n_links + n_commodities, n_variables))
+        b_ub = np.concatenate([bandwidths.ravel(), [c[3] * 8 * 1000 for c in commodities]])
+        cost = np.zeros(n_variables)
+        for k, (src, dst, _, _) in enumerate(commodities):
+            for t in range(n_intervals):
+                row = (k * n_intervals + t) * n_switches
+                for l, (s1, s2) in enumerate(arrays.endpoints.tolist()):
+                    for arc, (u, v) in [(l, (s1, s2)), (n_links + l, (s2, s1))]:
+                        a_eq[row + u, flow(k, t, arc)] += 1
+                        a_eq[row + v, flow(k, t, arc)] -= 1
+                        a_ub[t * n_links + l, flow(k, t, arc)] = 1
+                a_eq[row + src, rate(k, t)] = -1
+                a_eq[row + dst, rate(k, t)] = 1
+                a_ub[n_intervals * n_links + k, rate(k, t)] = alive_sec[k, t]
+                cost[rate(k, t)] = -alive_sec[k, t]
+
+        res = linprog(cost, A_ub=a_ub, b_ub=b_ub, A_eq=a_eq, b_eq=np.zeros(a_eq.shape[0]), bounds=(0, None),
+                      method="highs")
+        self.assertEqual(res.status, 0)
+        return -res.fun
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,135 @@
+from __future__ import annotations
+
+import threading
+import time
+from typing import Callable, Optional
+
+
+class _Run(object):
+    """
+    Token of one run of the scheduler, which stops its thread when cancelled even if it is calling back.
+    """
+    __slots__ = ("cancelled",)
+
+    def __init__(self):
+        self.cancelled = False
+
+
+class UpdateScheduler(object):
+    """
+    Calls back at absolute deadlines of a monotonic clock in one thread, so time spent in the callback does not
+    delay later calls. the nth call is due at the deadline of the nth interval, and intervals whose deadline has
+    passed during the previous call are skipped, so that the callback always gets the current interval.
+    """
+
+    def __init__(self, callback: Callable[[int], None], interval_sec: float,
+                 clock: Callable[[], float] = time.monotonic):
+        """
+        :param callback: function called with the number of the interval
+        """
+        self.__callback = callback
+        self.__interval_sec = interval_sec
+        self.__clock = clock
+        # deadline of the nth interval is anchor_at + (nth - anchor_nth) * interval_sec
+        self.__anchor_at = 0.0
+        self.__anchor_nth = 0
+        # interval to be called back next
+        self.__next_nth = 0
+        self.__run: Optional[_Run] = None
+        self.__last_lag_sec = 0.0
+        self.__skipped = 0
+        # woken up on cancellation and change of interval
+        self.__condition = threading.Condition()
+
+    @property
+    def interval_sec(self) -> float:
+        return self.__interval_sec
+
+    @property
+    def is_running(self) -> bool:
+        return self.__run is not None
+
+    @property
+    def last_lag_sec(self) -> float:
+        """
+        delay of the last call from its deadline
+        """
+        return self.__last_lag_sec
+
+    @property
+    def skipped(self) -> int:
+        """
+        number of intervals skipped since start
+        """
+        return self.__skipped
+
+    def start(self, first_nth: int = 0, delay_sec: float = 0):
+        """
+        Start calling back from the first_nth interval, whose deadline is delay_sec later. running one is cancelled.
+        """
+        self.cancel()
+        run = _Run()
+        with self.__condition:
+            self.__anchor_at = self.__clock() + delay_sec
+            self.__anchor_nth = first_nth
+            self.__next_nth = first_nth
+            self.__run = run
+            self.__last_lag_sec = 0.0
+            self.__skipped = 0
+        threading.Thread(target=self.__loop, args=(run,), daemon=True).start()
+
+    def cancel(self):
+        """
+        Stop calling back. the callback running now completes, but it is not waited for, so that it can cancel.
+        """
+        with self.__condition:
+            if self.__run is not None:
+                self.__run.cancelled = True
+                self.__run = None
+            self.__condition.notify_all()
+
+    def set_interval(self, interval_sec: float):
+        """
+        Change the interval from the deadline of the last interval called back, so that the next deadline is it plus
+        interval_sec. the first deadline is kept if nothing has been called back yet.
+        """
+        with self.__condition:
+            last_nth = self.__next_nth - 1
+            if last_nth >= self.__anchor_nth:
+                self.__anchor_at = self.deadline(last_nth)
+                self.__anchor_nth = last_nth
+            self.__interval_sec = interval_sec
+            self.__condition.notify_all()
+
+    def deadline(self, nth: int) -> float:
+        """
+        :return: deadline of the nth interval in time of the clock
+        """
+        return self.__anchor_at + (nth - self.__anchor_nth) * self.__interval_sec
+
+    def sec_until(self, nth: int) -> float:
+        """
+        :return: seconds until the deadline of the nth interval. negative if it has passed.
+        """
+        with self.__condition:
+            return self.deadline(nth) - self.__clock()
+
+    def __loop(self, run: _Run):
+        while True:
+            with self.__condition:
+                nth = self.__next_nth
+                while not run.cancelled and self.deadline(nth) > self.__clock():
+                    self.__condition.wait(self.deadline(nth) - self.__clock())
+                if run.cancelled:
+                    return
+                self.__last_lag_sec = self.__clock() - self.deadline(nth)
+
+            self.__callback(nth)
+
+            with self.__condition:
+                if run.cancelled:
+                    return
+                # the latest interval whose deadline has passed
+                current = self.__anchor_nth + int((self.__clock() - self.__anchor_at) // self.__interval_sec)
+                self.__next_nth = max(nth + 1, current)
+                self.__skipped += self.__next_nth - (nth + 1)
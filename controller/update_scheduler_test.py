@@ -0,0 +1,82 @@
+import threading
+import time
+import unittest
+
+from update_scheduler import UpdateScheduler
+
+
+class UpdateSchedulerTest(unittest.TestCase):
+    __INTERVAL_SEC = 0.05
+
+    def test_start(self):
+        calls = []
+        done = threading.Event()
+
+        def callback(nth):
+            calls.append((nth, time.monotonic()))
+            # time spent in the callback does not delay later calls
+            time.sleep(self.__INTERVAL_SEC / 2)
+            if len(calls) == 5:
+                done.set()
+
+        scheduler = UpdateScheduler(callback, self.__INTERVAL_SEC)
+        scheduler.start(first_nth=3)
+        self.assertTrue(done.wait(2))
+        scheduler.cancel()
+        self.assertFalse(scheduler.is_running)
+
+        self.assertListEqual([nth for nth, _ in calls], [3, 4, 5, 6, 7])
+        started_at = calls[0][1]
+        for nth, at in calls:
+            self.assertAlmostEqual(at - started_at, (nth - 3) * self.__INTERVAL_SEC, delta=self.__INTERVAL_SEC / 2)
+        self.assertEqual(scheduler.skipped, 0)
+
+        # no more calls after cancellation
+        n_calls = len(calls)
+        time.sleep(self.__INTERVAL_SEC * 2)
+        self.assertEqual(len(calls), n_calls)
+
+    def test_skip(self):
+        calls = []
+        done = threading.Event()
+
+        def callback(nth):
+            calls.append(nth)
+            if nth == 0:
+                # overrun the deadlines of the 1st and the 2nd interval
+                time.sleep(self.__INTERVAL_SEC * 2.5)
+            else:
+                done.set()
+
+        scheduler = UpdateScheduler(callback, self.__INTERVAL_SEC)
+        scheduler.start()
+        self.assertTrue(done.wait(2))
+        scheduler.cancel()
+
+        self.assertListEqual(calls, [0, 2])
+        self.assertEqual(scheduler.skipped, 1)
+        self.assertGreater(scheduler.last_lag_sec, 0)
+
+    def test_set_interval(self):
+        calls = []
+        done = threading.Event()
+
+        def callback(nth):
+            calls.append((nth, time.monotonic()))
+            if len(calls) == 3:
+                done.set()
+
+        # the 1st interval is far away until the interval is changed
+        scheduler = UpdateScheduler(callback, 60)
+        scheduler.start()
+        time.sleep(self.__INTERVAL_SEC)
+        scheduler.set_interval(self.__INTERVAL_SEC)
+        self.assertTrue(done.wait(2))
+        scheduler.cancel()
+
+        self.assertListEqual([nth for nth, _ in calls], [0, 1, 2])
+        self.assertAlmostEqual(calls[2][1] - calls[0][1], self.__INTERVAL_SEC * 2, delta=self.__INTERVAL_SEC / 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
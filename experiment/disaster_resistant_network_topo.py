@@ -18,6 +18,8 @@ class DisasterResistantNetworkTopo(Topo):
         self.__switch_port_counts = {}
         self.__links = []
         self.__host_pairs = []
+        # reuse connections to the controller
+        self.__session = requests.Session()
         super(DisasterResistantNetworkTopo, self).__init__(*args, **params)
 
     def build(self, *args, **params):
@@ -115,12 +117,14 @@ class DisasterResistantNetworkTopo(Topo):
                 "name": client_name,
                 "port": client_port,
                 "ip_address": client_ip,
+                "mac_address": client_mac,
                 "neighbor": client_neighbor
             },
             "server": {
                 "name": server_name,
                 "port": server_port,
                 "ip_address": server_ip,
+                "mac_address": server_mac,
                 "neighbor": server_neighbor
             }
         })
@@ -129,12 +133,12 @@ class DisasterResistantNetworkTopo(Topo):
         return random.randint(self.__BW_MIN_MBPS, self.__BW_MAX_MBPS)
 
     def register_links(self):
-        for l in self.__links:
-            requests.post(self.__URL + "/link", data=json.dumps(l))
+        # register all links by one request
+        self.__session.post(self.__URL + "/links", data=json.dumps(self.__links))
 
     def register_host_pairs(self):
-        for h in self.__host_pairs:
-            requests.post(self.__URL + "/host-pair", data=json.dumps(h))
+        # register all host pairs by one request
+        self.__session.post(self.__URL + "/host-pairs", data=json.dumps(self.__host_pairs))
 
 
 topos = {"disaster_resistant_network__topo": lambda: DisasterResistantNetworkTopo()}
@@ -162,7 +162,8 @@ class Experiment(object):
             requests.put(self.__URL + "/host-client", data=json.dumps({
                 "client": h.host,
                 "fail_at_sec": h.fail_at_sec,
-                "datasize_gb": host_pair["chunk"],
+                # chunk is in bytes
+                "datasize_gb": host_pair["chunk"] / 10 ** 9,
             }))
 
     def __find_host_pair_by_client(self, client: str) -> Optional[dict]: